@@ -0,0 +1,126 @@
+"""initial schema
+
+Matches the tables previously created by Base.metadata.create_all. Databases
+that were bootstrapped that way can be adopted with `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("picture", sa.String(), nullable=True),
+        sa.Column("google_id", sa.String(), nullable=False, unique=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("spotify_connected", sa.Boolean(), nullable=True),
+        sa.Column("spotify_token", sa.Text(), nullable=True),
+        sa.Column("google_fit_connected", sa.Boolean(), nullable=True),
+        sa.Column("google_fit_token", sa.Text(), nullable=True),
+        sa.Column("notion_connected", sa.Boolean(), nullable=True),
+        sa.Column("notion_token", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "analyses",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("analysis_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("overall_wellness_score", sa.Float(), nullable=True),
+        sa.Column("linguistic_score", sa.Float(), nullable=True),
+        sa.Column("consumption_score", sa.Float(), nullable=True),
+        sa.Column("behavioral_score", sa.Float(), nullable=True),
+        sa.Column("risk_level", sa.String(), nullable=True),
+        sa.Column("linguistic_details", sa.JSON(), nullable=True),
+        sa.Column("consumption_details", sa.JSON(), nullable=True),
+        sa.Column("behavioral_details", sa.JSON(), nullable=True),
+        sa.Column("predictions", sa.JSON(), nullable=True),
+        sa.Column("insights", sa.JSON(), nullable=True),
+        sa.Column("warnings", sa.JSON(), nullable=True),
+    )
+
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "raw_data",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("data_type", sa.String(), nullable=False),
+        sa.Column("raw_content", sa.JSON(), nullable=True),
+        sa.Column("processed", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "spotify_sync_state",
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("cursor", sa.BigInteger(), nullable=True),
+        sa.Column("total_plays", sa.Integer(), nullable=False),
+        sa.Column("late_night_plays", sa.Integer(), nullable=False),
+        sa.Column("features_count", sa.Integer(), nullable=False),
+        sa.Column("valence_sum", sa.Float(), nullable=False),
+        sa.Column("energy_sum", sa.Float(), nullable=False),
+        sa.Column("tempo_sum", sa.Float(), nullable=False),
+        sa.Column("danceability_sum", sa.Float(), nullable=False),
+        sa.Column("daily_series", sa.JSON(), nullable=True),
+        sa.Column("recent_items", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "media_items",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("source", sa.SmallInteger(), nullable=False),
+        sa.Column("external_id", sa.String(), nullable=False),
+        sa.UniqueConstraint("source", "external_id", name="uq_media_items_source_external_id"),
+    )
+
+    op.create_table(
+        "user_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("source", sa.SmallInteger(), nullable=False),
+        sa.Column("ts", sa.BigInteger(), nullable=False),
+        sa.Column("item_id", sa.Integer(), sa.ForeignKey("media_items.id"), nullable=True),
+        sa.Column("category", sa.SmallInteger(), nullable=True),
+        sa.Column("valence", sa.REAL(), nullable=True),
+        sa.Column("energy", sa.REAL(), nullable=True),
+    )
+    op.create_index("ix_user_events_user_source_ts", "user_events", ["user_id", "source", "ts"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_events_user_source_ts", table_name="user_events")
+    op.drop_table("user_events")
+    op.drop_table("media_items")
+    op.drop_table("spotify_sync_state")
+    op.drop_table("raw_data")
+    op.drop_table("chat_messages")
+    op.drop_table("analyses")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
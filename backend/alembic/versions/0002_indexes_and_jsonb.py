@@ -0,0 +1,83 @@
+"""indexes and jsonb detail columns
+
+Adds the (user_id, date DESC) indexes behind "latest analysis" and "chat
+history" lookups, a partial index over unprocessed raw_data, and moves the
+JSON detail columns to JSONB on PostgreSQL. Indexes are built CONCURRENTLY
+there so large tables stay writable while they are created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+JSONB_COLUMNS = {
+    "analyses": [
+        "linguistic_details", "consumption_details", "behavioral_details",
+        "predictions", "insights", "warnings",
+    ],
+    "raw_data": ["raw_content"],
+}
+
+INDEXES = [
+    ("ix_analyses_user_id_analysis_date", "analyses", ["user_id", sa.text("analysis_date DESC")], {}),
+    ("ix_analyses_user_id_created_at", "analyses", ["user_id", sa.text("created_at DESC")], {}),
+    ("ix_chat_messages_user_id_created_at", "chat_messages", ["user_id", sa.text("created_at DESC")], {}),
+    ("ix_raw_data_user_id_source_created_at", "raw_data", ["user_id", "source", sa.text("created_at DESC")], {}),
+    ("ix_raw_data_unprocessed", "raw_data", ["created_at"], {
+        "postgresql_where": sa.text("processed = 0"),
+        "sqlite_where": sa.text("processed = 0"),
+    }),
+]
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+
+    if is_postgres:
+        for table, columns in JSONB_COLUMNS.items():
+            for column in columns:
+                op.alter_column(
+                    table, column,
+                    type_=postgresql.JSONB(),
+                    postgresql_using=f"{column}::jsonb",
+                )
+
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+            op.create_index(
+                "ix_analyses_warnings", "analyses", ["warnings"],
+                postgresql_using="gin",
+                postgresql_ops={"warnings": "jsonb_path_ops"},
+                postgresql_concurrently=True,
+            )
+    else:
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, **kwargs)
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+
+    if is_postgres:
+        op.drop_index("ix_analyses_warnings", table_name="analyses")
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    if is_postgres:
+        for table, columns in JSONB_COLUMNS.items():
+            for column in columns:
+                op.alter_column(
+                    table, column,
+                    type_=sa.JSON(),
+                    postgresql_using=f"{column}::json",
+                )
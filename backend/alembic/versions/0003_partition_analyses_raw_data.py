@@ -0,0 +1,114 @@
+"""partition analyses and raw_data by month
+
+Rebuilds both tables as RANGE partitioned on created_at so the retention job
+can drop whole months instead of deleting row by row. The primary key
+becomes (id, created_at) because PostgreSQL requires the partition key in
+every unique constraint. Existing rows are copied into monthly partitions.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TABLE_INDEXES = {
+    "analyses": [
+        "CREATE INDEX ix_analyses_user_id_analysis_date ON analyses (user_id, analysis_date DESC)",
+        "CREATE INDEX ix_analyses_user_id_created_at ON analyses (user_id, created_at DESC)",
+        "CREATE INDEX ix_analyses_warnings ON analyses USING gin (warnings jsonb_path_ops)",
+    ],
+    "raw_data": [
+        "CREATE INDEX ix_raw_data_user_id_source_created_at ON raw_data (user_id, source, created_at DESC)",
+        "CREATE INDEX ix_raw_data_unprocessed ON raw_data (created_at) WHERE processed = 0",
+    ],
+}
+
+MONTHS_AHEAD = 3
+
+
+def _create_monthly_partitions(table: str) -> None:
+    # One partition per month from the oldest row up to MONTHS_AHEAD from now
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month date;
+            last_month date := date_trunc('month', now())::date + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            SELECT COALESCE(date_trunc('month', min(created_at))::date, date_trunc('month', now())::date)
+              INTO month FROM {table}_legacy;
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_' || to_char(month, 'YYYY_MM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+    op.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _partition(table: str) -> None:
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    op.execute(f"ALTER TABLE {table}_legacy RENAME CONSTRAINT {table}_pkey TO {table}_legacy_pkey")
+    for statement in TABLE_INDEXES[table]:
+        index_name = statement.split()[2]
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    op.execute(f"UPDATE {table}_legacy SET created_at = now() WHERE created_at IS NULL")
+    op.execute(f"""
+        CREATE TABLE {table} (
+            LIKE {table}_legacy INCLUDING DEFAULTS,
+            PRIMARY KEY (id, created_at),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL")
+    _create_monthly_partitions(table)
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_legacy")
+    op.execute(f"DROP TABLE {table}_legacy")
+    for statement in TABLE_INDEXES[table]:
+        op.execute(statement)
+
+
+def _unpartition(table: str) -> None:
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+    op.execute(f"ALTER TABLE {table}_partitioned RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey")
+    for statement in TABLE_INDEXES[table]:
+        index_name = statement.split()[2]
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    op.execute(f"""
+        CREATE TABLE {table} (
+            LIKE {table}_partitioned INCLUDING DEFAULTS,
+            PRIMARY KEY (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+    op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+    for statement in TABLE_INDEXES[table]:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLE_INDEXES:
+        _partition(table)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLE_INDEXES:
+        _unpartition(table)
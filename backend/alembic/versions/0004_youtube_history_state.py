@@ -0,0 +1,33 @@
+"""youtube history state
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    json_type = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+    op.create_table(
+        "youtube_history_state",
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("upload_hash", sa.String(), nullable=True),
+        sa.Column("watch_digests", sa.LargeBinary(), nullable=True),
+        sa.Column("search_digests", sa.LargeBinary(), nullable=True),
+        sa.Column("aggregates", json_type, nullable=True),
+        sa.Column("result", json_type, nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("youtube_history_state")
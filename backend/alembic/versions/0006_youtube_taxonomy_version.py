@@ -0,0 +1,25 @@
+"""youtube history taxonomy version
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("youtube_history_state", sa.Column("taxonomy_version", sa.String(), nullable=True))
+    # Existing aggregates were classified with the built-in keywords, which
+    # shipped as taxonomy version "1"
+    op.execute("UPDATE youtube_history_state SET taxonomy_version = '1' WHERE aggregates IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column("youtube_history_state", "taxonomy_version")
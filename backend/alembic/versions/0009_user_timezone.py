@@ -0,0 +1,23 @@
+"""user timezone
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL keeps the behavioral features in UTC until the user sets a zone
+    op.add_column("users", sa.Column("timezone", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "timezone")
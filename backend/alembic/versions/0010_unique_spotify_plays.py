@@ -0,0 +1,44 @@
+"""unique spotify plays
+
+Removes Spotify plays stored twice by concurrent syncs (same track and
+second; keeping the first copy) and adds a unique index so it cannot happen
+again. Different tracks within one second are distinct plays and stay. Running aggregates
+of affected users are left as they are; a fresh sync does not recompute them.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+SOURCE_SPOTIFY = 1
+
+
+def upgrade() -> None:
+    op.execute(sa.text("""
+        DELETE FROM user_events
+        WHERE source = :source
+          AND item_id IS NOT NULL
+          AND id NOT IN (
+              SELECT MIN(id) FROM user_events
+              WHERE source = :source AND item_id IS NOT NULL
+              GROUP BY user_id, ts, item_id
+          )
+    """).bindparams(source=SOURCE_SPOTIFY))
+    op.create_index(
+        "uq_user_events_spotify_play", "user_events", ["user_id", "ts", "item_id"],
+        unique=True,
+        postgresql_where=sa.text(f"source = {SOURCE_SPOTIFY}"),
+        sqlite_where=sa.text(f"source = {SOURCE_SPOTIFY}"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_user_events_spotify_play", table_name="user_events")
@@ -0,0 +1,23 @@
+"""spotify recorded analysis version
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL makes the next refresh record an analysis row
+    op.add_column("spotify_sync_state", sa.Column("recorded_version", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("spotify_sync_state", "recorded_version")
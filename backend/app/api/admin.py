@@ -0,0 +1,140 @@
+import asyncio
+import hmac
+import logging
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
+from fastapi.responses import HTMLResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.connectors.taxonomy import current_taxonomy, reload_taxonomy, taxonomy_path
+from app.core import metrics, profiling
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.core.workers import get_process_pool
+from app.models.batch import BatchJob
+from app.services.batch_analysis import SOURCES, claim_job, create_job, job_summary, mark_failed, run_batch_job
+
+logger = logging.getLogger(__name__)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not settings.ADMIN_TOKEN or not hmac.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+class BatchAnalysisRequest(BaseModel):
+    user_ids: Optional[List[str]] = None
+    filters: Optional[dict] = None
+    sources: List[str] = list(SOURCES)
+
+def run_batch_job_by_id(job_id: str):
+    # Background runs own their session. Scoring shares the app's process
+    # pool with uploads, so it only keeps BATCH_API_MAX_IN_FLIGHT chunks there
+    db = SessionLocal()
+    try:
+        run_batch_job(
+            db, db.get(BatchJob, job_id), get_process_pool(),
+            max_in_flight=settings.BATCH_API_MAX_IN_FLIGHT
+        )
+    except Exception as e:
+        logger.exception("Batch job %s failed", job_id)
+        db.close()
+        db = SessionLocal()
+        try:
+            mark_failed(db, job_id, str(e) or type(e).__name__)
+        except Exception:
+            logger.exception("Could not record failure of batch job %s", job_id)
+    finally:
+        db.close()
+
+async def start_batch_job(job_id: str):
+    await asyncio.to_thread(run_batch_job_by_id, job_id)
+
+def get_job(db: Session, job_id: str) -> BatchJob:
+    job = db.get(BatchJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job
+
+@router.post("/batch-analysis", status_code=202)
+async def create_batch_analysis(
+    request: BatchAnalysisRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    try:
+        job = create_job(db, request.user_ids, request.filters, request.sources)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    claim_job(db, job.id)
+    db.refresh(job)
+    background_tasks.add_task(start_batch_job, job.id)
+    return job_summary(job)
+
+@router.get("/batch-analysis/{job_id}")
+async def get_batch_analysis(job_id: str, db: Session = Depends(get_db)):
+    return job_summary(get_job(db, job_id))
+
+@router.post("/batch-analysis/{job_id}/resume", status_code=202)
+async def resume_batch_analysis(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    # Jobs left "running" by a crashed process can be resumed once their last
+    # checkpoint is BATCH_STALE_SECONDS old; rows are upserted by
+    # deterministic id, so overlapping chunks are harmless
+    job = get_job(db, job_id)
+    if job.status == "completed":
+        raise HTTPException(status_code=409, detail="Batch job already completed")
+    if not claim_job(db, job.id):
+        raise HTTPException(status_code=409, detail="Batch job is running")
+    db.refresh(job)
+    background_tasks.add_task(start_batch_job, job.id)
+    return job_summary(job)
+
+@router.get("/taxonomy")
+async def get_taxonomy():
+    taxonomy = current_taxonomy()
+    return {
+        "version": taxonomy.version,
+        "path": taxonomy_path(),
+        "categories": {
+            name: {
+                "code": code,
+                "sentiment": taxonomy.sentiment[name],
+                "keywords": list(taxonomy.keywords.get(name, ())),
+            }
+            for name, code in taxonomy.codes.items()
+        },
+    }
+
+@router.post("/taxonomy/reload")
+async def reload_taxonomy_now():
+    # Reloads this worker at once; the others follow within TAXONOMY_CHECK_SECONDS
+    previous = current_taxonomy().version
+    taxonomy = reload_taxonomy(force=True)
+    return {"previous_version": previous, "version": taxonomy.version, "metrics": metrics.snapshot()}
+
+@router.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+@router.get("/profiles")
+async def get_profiles(limit: int = 50):
+    # Profiles captured by this host's workers, newest first
+    return await asyncio.to_thread(profiling.list_profiles, limit)
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    report = await asyncio.to_thread(profiling.load_profile, profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
+
+@router.get("/profiles/{profile_id}/html", response_class=HTMLResponse)
+async def get_profile_html(profile_id: str):
+    html = await asyncio.to_thread(profiling.load_profile_html, profile_id)
+    if html is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return HTMLResponse(html)
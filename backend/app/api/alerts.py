@@ -0,0 +1,59 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from websockets.exceptions import ConnectionClosed
+from app.core.config import settings
+from app.core.security import verify_token
+from app.services.alerts import hub
+
+router = APIRouter()
+
+# How a gone client surfaces: Starlette's disconnect, a send after close, or
+# the websockets protocol error uvicorn lets through on send
+CLOSED = (WebSocketDisconnect, RuntimeError, ConnectionClosed)
+
+async def _receive_until_closed(websocket: WebSocket):
+    # Alerts are one-way; client frames are read only to see the close
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except CLOSED:
+        pass
+
+async def _send_alerts(websocket: WebSocket, queue: asyncio.Queue):
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.ALERT_PING_SECONDS)
+            except asyncio.TimeoutError:
+                # Pings surface dead peers even when no alerts are flowing
+                await websocket.send_text('{"type":"ping"}')
+                continue
+            await websocket.send_text(message)
+    except CLOSED:
+        pass
+
+@router.websocket("/ws")
+async def alerts_ws(websocket: WebSocket, token: str):
+    # Token only, no DB lookup: keeps the cost of idle connections minimal
+    payload = verify_token(token)
+    if not payload:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    user_id = payload["sub"]
+    queue = hub.subscribe(user_id)
+    tasks = [
+        asyncio.create_task(_receive_until_closed(websocket)),
+        asyncio.create_task(_send_alerts(websocket, queue)),
+    ]
+    try:
+        # Whichever side notices the client is gone first ends the connection
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        hub.unsubscribe(user_id, queue)
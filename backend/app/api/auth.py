@@ -37,7 +37,7 @@ async def google_callback(code: Optional[str] = None, error: Optional[str] = Non
         return RedirectResponse(f"{settings.FRONTEND_URL}?error=missing_code")
 
     # Exchange code for token (application/x-www-form-urlencoded)
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
         token_response = await client.post(
             GOOGLE_TOKEN_URL,
             headers={"Content-Type": "application/x-www-form-urlencoded"},
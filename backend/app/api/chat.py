@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
+from app.core.admission import admit, gemini_quota
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.deadline import run_with_deadline
 from app.core.security import verify_token
 from app.models.user import User
 from app.services.chatbot import MindWatchChatbot
@@ -25,19 +28,24 @@ def get_current_user(token: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
-@router.post("/message")
+@router.post("/message", dependencies=[Depends(admit("chat_message")), Depends(gemini_quota)])
 async def send_message(
     token: str,
     request: ChatRequest,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     get_current_user(token, db)
 
-    response = await chatbot.chat(
-        message=request.message,
-        history=request.history,
-        spotify_data=request.spotify_data,
-        youtube_data=request.youtube_data
+    response = await run_with_deadline(
+        http_request,
+        chatbot.chat(
+            message=request.message,
+            history=request.history,
+            spotify_data=request.spotify_data,
+            youtube_data=request.youtube_data
+        ),
+        settings.CHAT_DEADLINE_SECONDS
     )
 
     return {"response": response}
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import RedirectResponse
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, BackgroundTasks
+from fastapi.responses import RedirectResponse, ORJSONResponse, Response
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.admission import admit, admitted
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.core.deadline import run_with_deadline
 from app.core.security import verify_token
 from app.models.user import User
 from app.connectors.spotify import SpotifyConnector
-from app.connectors.youtube import YouTubeAnalyzer
+from app.services import analysis_cache
+from app.services.spotify_sync import (
+    sync_listening_history, build_analysis, listening_behavior, analysis_version, claim_analysis_version
+)
+from app.services.analysis_service import record_analysis
+from app.services.dashboard import refresh_summary
+from app.services.projections import project_spotify_analysis, project_youtube_analysis
+from app.services.youtube_history import analyze_upload
 
 router = APIRouter()
 
@@ -47,14 +59,71 @@ async def spotify_callback(
     user.spotify_token = json.dumps(token_data)
     user.spotify_connected = True
     db.commit()
+    refresh_summary(db, user.id)
+    await analysis_cache.invalidate("spotify", user.id)
 
-    from app.core.config import settings
     return RedirectResponse(
         f"{settings.FRONTEND_URL}/dashboard?spotify=connected"
     )
 
+async def refresh_spotify_analysis(user_id: str, access_token: str) -> dict:
+    # Runs after the response for background refreshes, so it owns its session.
+    # Callers hold the refresh lock
+    db = SessionLocal()
+    connector = SpotifyConnector(access_token=access_token)
+    try:
+        state, _ = await sync_listening_history(db, user_id, connector)
+        now = int(time.time())
+        analysis = listening_behavior(db, user_id, build_analysis(state), now)
+        # Unchanged history, zone and local day keep their ETag and record
+        # no new Analysis row
+        version = analysis_version(db, state, now)
+        if claim_analysis_version(db, user_id, version):
+            await record_analysis(db, user_id, "spotify", analysis)
+        return await analysis_cache.store("spotify", user_id, version, analysis)
+    finally:
+        db.close()
+
+async def refresh_spotify_analysis_in_background(user_id: str, access_token: str):
+    try:
+        await asyncio.wait_for(
+            refresh_spotify_analysis(user_id, access_token),
+            timeout=settings.SPOTIFY_ANALYSIS_DEADLINE_SECONDS
+        )
+    except asyncio.TimeoutError:
+        print(f"Spotify background refresh timed out for user {user_id}")
+    finally:
+        await analysis_cache.release_refresh_lock("spotify", user_id)
+
+async def load_spotify_analysis(user_id: str, access_token: str) -> dict:
+    # Cache misses take the refresh lock too; a request that finds it held
+    # waits for that refresh's result instead of syncing the same plays.
+    # Without Redis it syncs anyway and the locked state row keeps that safe
+    if not await analysis_cache.acquire_refresh_lock("spotify", user_id):
+        entry = await analysis_cache.wait_for_refresh("spotify", user_id)
+        if entry is not None:
+            return entry
+    try:
+        return await refresh_spotify_analysis(user_id, access_token)
+    finally:
+        await analysis_cache.release_refresh_lock("spotify", user_id)
+
+def cached_analysis_response(request: Request, entry: dict, verbose: bool = False) -> Response:
+    # Slim and verbose bodies differ, so they get distinct validators
+    etag = entry["etag"][:-1] + '-v"' if verbose else entry["etag"]
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if analysis_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(project_spotify_analysis(entry["result"], verbose), headers=headers)
+
 @router.get("/spotify/analysis")
-async def spotify_analysis(token: str, db: Session = Depends(get_db)):
+async def spotify_analysis(
+    token: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    verbose: bool = False,
+    db: Session = Depends(get_db)
+):
     user = get_current_user(token, db)
 
     if not user.spotify_connected or not user.spotify_token:
@@ -62,9 +131,24 @@ async def spotify_analysis(token: str, db: Session = Depends(get_db)):
 
     import json
     token_data = json.loads(user.spotify_token)
-    connector = SpotifyConnector(access_token=token_data["access_token"])
-    analysis = await connector.get_full_analysis()
-    return analysis
+
+    # Serve the cached result; refresh it in the background once it goes stale
+    cached = await analysis_cache.get_cached("spotify", user.id)
+    if cached:
+        if not analysis_cache.is_fresh(cached) and await analysis_cache.acquire_refresh_lock("spotify", user.id):
+            background_tasks.add_task(
+                refresh_spotify_analysis_in_background, user.id, token_data["access_token"]
+            )
+        return cached_analysis_response(request, cached, verbose)
+
+    # Only cache misses do real work, so only they take an admission slot
+    async with admitted("spotify_analysis", user.id):
+        entry = await run_with_deadline(
+            request,
+            load_spotify_analysis(user.id, token_data["access_token"]),
+            settings.SPOTIFY_ANALYSIS_DEADLINE_SECONDS
+        )
+    return cached_analysis_response(request, entry, verbose)
 
 @router.get("/spotify/status")
 async def spotify_status(token: str, db: Session = Depends(get_db)):
@@ -102,32 +186,35 @@ async def spotify_debug(token: str, db: Session = Depends(get_db)):
 
 # ─── YOUTUBE ────────────────────────────────────────────
 
-@router.post("/youtube/analyze")
+@router.post("/youtube/analyze", dependencies=[Depends(admit("youtube_analyze"))])
 async def youtube_analyze(
     token: str,
+    request: Request,
     watch_history: UploadFile = File(...),
     search_history: UploadFile = File(None),
+    verbose: bool = False,
     db: Session = Depends(get_db)
 ):
-    get_current_user(token, db)
-
-    # Read watch history
-    watch_content = await watch_history.read()
-    watch_html = watch_content.decode("utf-8", errors="ignore")
+    user = get_current_user(token, db)
 
-    # Read search history if provided
-    search_html = ""
-    if search_history:
-        search_content = await search_history.read()
-        search_html = search_content.decode("utf-8", errors="ignore")
+    # Only entries missing from earlier uploads are parsed into the aggregates
+    timeout = settings.YOUTUBE_ANALYZE_DEADLINE_SECONDS
+    analysis, updated = await run_with_deadline(
+        request,
+        analyze_upload(
+            db,
+            user.id,
+            watch_history.file,
+            search_history.file if search_history else None,
+            deadline=time.time() + timeout
+        ),
+        timeout
+    )
 
-    # Parse and analyze
-    analyzer = YouTubeAnalyzer()
-    videos = analyzer.parse_watch_history(watch_html)
-    searches = analyzer.parse_search_history(search_html) if search_html else []
-    analysis = analyzer.analyze(videos, searches)
+    if updated and "error" not in analysis:
+        await record_analysis(db, user.id, "youtube", analysis)
 
-    return analysis
+    return ORJSONResponse(project_youtube_analysis(analysis, verbose))
 
 @router.get("/youtube/sample")
 async def youtube_sample(token: str, db: Session = Depends(get_db)):
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.security import verify_token
+from app.services import analysis_cache
+from app.services.dashboard import get_summary
+
+router = APIRouter()
+
+@router.get("/summary")
+async def dashboard_summary(token: str, request: Request, db: Session = Depends(get_db)):
+    # Token only, then one primary-key read of the materialized summary
+    payload = verify_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    summary = get_summary(db, payload["sub"])
+    if summary is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    etag = analysis_cache.make_etag(summary.user_id, f"dashboard:{summary.version}")
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if analysis_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(summary.payload, headers=headers)
@@ -3,7 +3,11 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import verify_token
 from app.models.user import User
+from app.services import analysis_cache
+from app.services.account import delete_user
+from app.services.dashboard import refresh_summary
 from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 router = APIRouter()
 
@@ -30,6 +34,7 @@ async def get_profile(token: str, db: Session = Depends(get_db)):
         "email": user.email,
         "name": user.name,
         "picture": user.picture,
+        "timezone": user.timezone,
         "connected_sources": {
             "spotify": user.spotify_connected,
             "google_fit": user.google_fit_connected,
@@ -42,18 +47,30 @@ async def get_profile(token: str, db: Session = Depends(get_db)):
 async def update_profile(
     token: str,
     name: Optional[str] = None,
+    timezone: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     user = get_current_user(token, db)
     if name:
         user.name = name
+    timezone_changed = False
+    if timezone:
+        try:
+            ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail="Unknown timezone")
+        timezone_changed = timezone != user.timezone
+        user.timezone = timezone
     db.commit()
+    refresh_summary(db, user.id)
+    if timezone_changed:
+        # The cached listening analysis was computed in the old zone
+        await analysis_cache.invalidate("spotify", user.id)
     db.refresh(user)
     return {"message": "Profile updated successfully"}
 
 @router.delete("/account")
 async def delete_account(token: str, db: Session = Depends(get_db)):
     user = get_current_user(token, db)
-    db.delete(user)
-    db.commit()
+    await delete_user(db, user)
     return {"message": "Account deleted successfully"}
\ No newline at end of file
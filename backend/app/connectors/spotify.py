@@ -1,11 +1,12 @@
 import httpx
 import base64
 from datetime import datetime
+from typing import Optional
 from app.core.config import settings
 
 SPOTIFY_AUTH_URL = "https://accounts.spotify.com/authorize"
 SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
-SPOTIFY_API_URL = "https://api.spotify.com/v1"
+SPOTIFY_API_URL = settings.SPOTIFY_API_URL
 
 SPOTIFY_SCOPES = [
     "user-read-recently-played",
@@ -15,6 +16,20 @@ SPOTIFY_SCOPES = [
     "playlist-read-private",
 ]
 
+def emotional_tone(valence: float, energy: float) -> str:
+    if valence > 0.6 and energy > 0.6:
+        return "Happy & Energetic"
+    elif valence > 0.6 and energy <= 0.6:
+        return "Content & Calm"
+    elif valence <= 0.4 and energy > 0.6:
+        return "Angry & Agitated"
+    elif valence <= 0.4 and energy <= 0.4:
+        return "Sad & Low Energy"
+    elif valence <= 0.4 and energy <= 0.6:
+        return "Melancholic"
+    else:
+        return "Neutral"
+
 class SpotifyConnector:
     def __init__(self, access_token: str = None):
         self.access_token = access_token
@@ -35,7 +50,7 @@ class SpotifyConnector:
             f"{settings.SPOTIFY_CLIENT_ID}:{settings.SPOTIFY_CLIENT_SECRET}".encode()
         ).decode()
 
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
             response = await client.post(
                 SPOTIFY_TOKEN_URL,
                 headers={
@@ -51,7 +66,7 @@ class SpotifyConnector:
             return response.json()
 
     async def get_recently_played(self, limit: int = 50) -> list:
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
             response = await client.get(
                 f"{SPOTIFY_API_URL}/me/player/recently-played",
                 headers={"Authorization": f"Bearer {self.access_token}"},
@@ -60,8 +75,33 @@ class SpotifyConnector:
             data = response.json()
             return data.get("items", [])
 
+    async def get_plays_since(self, after: Optional[int], max_pages: int = 20) -> list:
+        # Without a cursor there is nothing to page from, so take the latest page
+        if after is None:
+            return await self.get_recently_played(50)
+
+        items = []
+        async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
+            for _ in range(max_pages):
+                response = await client.get(
+                    f"{SPOTIFY_API_URL}/me/player/recently-played",
+                    headers={"Authorization": f"Bearer {self.access_token}"},
+                    params={"limit": 50, "after": after}
+                )
+                data = response.json()
+                page = data.get("items", [])
+                if not page:
+                    break
+                # Each page is newest first and newer than the one before it
+                items = page + items
+                next_after = (data.get("cursors") or {}).get("after")
+                if not data.get("next") or not next_after:
+                    break
+                after = int(next_after)
+        return items
+
     async def get_top_tracks(self, time_range: str = "short_term") -> list:
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
             response = await client.get(
                 f"{SPOTIFY_API_URL}/me/top/tracks",
                 headers={"Authorization": f"Bearer {self.access_token}"},
@@ -73,7 +113,7 @@ class SpotifyConnector:
     async def get_audio_features(self, track_ids: list) -> list:
         if not track_ids:
             return []
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
             response = await client.get(
                 f"{SPOTIFY_API_URL}/audio-features",
                 headers={"Authorization": f"Bearer {self.access_token}"},
@@ -151,22 +191,8 @@ class SpotifyConnector:
             "avg_tempo": round(avg_tempo, 1),
             "avg_danceability": round(avg_danceability, 3),
             "late_night_listening_ratio": round(late_night_ratio, 3),
-            "emotional_tone": self._get_emotional_tone(avg_valence, avg_energy),
+            "emotional_tone": emotional_tone(avg_valence, avg_energy),
             "recently_played": recently_played[:10],
             "audio_features_count": audio_features_count,
             "debug_track_ids_count": len(track_ids),
-        }
-
-    def _get_emotional_tone(self, valence: float, energy: float) -> str:
-        if valence > 0.6 and energy > 0.6:
-            return "Happy & Energetic"
-        elif valence > 0.6 and energy <= 0.6:
-            return "Content & Calm"
-        elif valence <= 0.4 and energy > 0.6:
-            return "Angry & Agitated"
-        elif valence <= 0.4 and energy <= 0.4:
-            return "Sad & Low Energy"
-        elif valence <= 0.4 and energy <= 0.6:
-            return "Melancholic"
-        else:
-            return "Neutral"
\ No newline at end of file
+        }
\ No newline at end of file
@@ -0,0 +1,177 @@
+import re
+from functools import lru_cache
+from typing import Optional
+from app.core import metrics
+
+# Month abbreviations and names as they appear in Takeout exports per locale
+LOCALE_MONTHS = {
+    "en": ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+    "en_full": ["january", "february", "march", "april", "may", "june", "july",
+                "august", "september", "october", "november", "december"],
+    "de": ["jan", "feb", "märz", "apr", "mai", "juni", "juli", "aug", "sept", "okt", "nov", "dez"],
+    "fr": ["janv", "févr", "mars", "avr", "mai", "juin", "juil", "août", "sept", "oct", "nov", "déc"],
+    "es": ["ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sept", "oct", "nov", "dic"],
+    "pt": ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"],
+    "it": ["gen", "feb", "mar", "apr", "mag", "giu", "lug", "ago", "set", "ott", "nov", "dic"],
+    "nl": ["jan", "feb", "mrt", "apr", "mei", "jun", "jul", "aug", "sep", "okt", "nov", "dec"],
+}
+
+MONTHS = {}
+for _names in LOCALE_MONTHS.values():
+    for _number, _name in enumerate(_names, start=1):
+        MONTHS.setdefault(_name, _number)
+MONTHS.update({"sep": 9, "sept": 9, "mär": 3})
+
+# UTC offsets (seconds) for abbreviations Takeout prints after the time
+TZ_OFFSETS = {
+    "UTC": 0, "GMT": 0, "WET": 0, "WEST": 3600, "BST": 3600, "IST": 19800,
+    "CET": 3600, "CEST": 7200, "MEZ": 3600, "MESZ": 7200,
+    "EET": 7200, "EEST": 10800, "MSK": 10800,
+    "EST": -18000, "EDT": -14400, "CST": -21600, "CDT": -18000,
+    "MST": -25200, "MDT": -21600, "PST": -28800, "PDT": -25200,
+    "AKST": -32400, "AKDT": -28800, "HST": -36000,
+    "BRT": -10800, "ART": -10800,
+    "JST": 32400, "KST": 32400, "HKT": 28800, "SGT": 28800, "PHT": 28800,
+    "AEST": 36000, "AEDT": 39600, "ACST": 34200, "AWST": 28800,
+    "NZST": 43200, "NZDT": 46800,
+}
+
+# Date part formats, tried in order; the time of day is parsed separately
+DATE_FORMATS = [
+    # en-US: "Jan 5, 2024"
+    re.compile(r"(?P<month>[^\W\d_]+)\.? (?P<day>\d{1,2}), (?P<year>\d{4})"),
+    # en-GB, fr, es, it, nl, pt: "5 Jan 2024", "5 janv. 2024", "5 de jan. de 2024"
+    re.compile(r"(?P<day>\d{1,2})\.? (?:de )?(?P<month>[^\W\d_]+)\.?(?: de)? (?P<year>\d{4})"),
+    # de, ru, pl: "05.01.2024"
+    re.compile(r"(?P<day>\d{1,2})[./](?P<month>\d{1,2})[./](?P<year>\d{4})"),
+    # ja, zh, ko: "2024/01/05"
+    re.compile(r"(?P<year>\d{4})[/\-.](?P<month>\d{1,2})[/\-.](?P<day>\d{1,2})"),
+]
+
+_SUFFIX = re.compile(r"([ap])\.?\s?m\.?\s*(.*)", re.I)
+_NUMERIC_OFFSET = re.compile(r"(?:UTC|GMT)\s*([+\-])(\d{1,2})(?::?(\d{2}))?$", re.I)
+
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+@lru_cache(maxsize=256)
+def tz_offset(tz: str) -> Optional[int]:
+    # None for abbreviations we have no offset for
+    tz = tz.strip()
+    if not tz:
+        return 0
+    if tz.upper() in TZ_OFFSETS:
+        return TZ_OFFSETS[tz.upper()]
+    match = _NUMERIC_OFFSET.match(tz)
+    if match:
+        sign = -1 if match.group(1) == "-" else 1
+        return sign * (int(match.group(2)) * 3600 + int(match.group(3) or 0) * 60)
+    return None
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    # Days since 1970-01-01 for a proleptic Gregorian date (H. Hinnant)
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def _days_in_month(year: int, month: int) -> int:
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return DAYS_IN_MONTH[month - 1]
+
+@lru_cache(maxsize=4096)
+def _date_days(date_part: str) -> Optional[int]:
+    # Histories repeat the same dates many times, so each is parsed once
+    date_part = date_part.rstrip(", ")
+    for pattern in DATE_FORMATS:
+        match = pattern.fullmatch(date_part)
+        if match:
+            break
+    else:
+        return None
+
+    month = match.group("month")
+    if month.isdigit():
+        month = int(month)
+    else:
+        month = MONTHS.get(month.lower())
+    if not month or month > 12:
+        return None
+    year, day = int(match.group("year")), int(match.group("day"))
+    if not 1 <= day <= _days_in_month(year, month):
+        return None
+    return _days_from_civil(year, month, day)
+
+def _normalise(text: str) -> str:
+    # Newer exports put narrow or plain no-break spaces around the time
+    if "\u202f" in text or "\xa0" in text:
+        return text.replace("\u202f", " ").replace("\xa0", " ")
+    return text
+
+@lru_cache(maxsize=65536)
+def _head(head: str) -> Optional[tuple]:
+    # "Jan 5, 2024, 3" -> (epoch seconds of that day, 3); the text before the
+    # first colon only changes once an hour, so most stamps hit the cache
+    head = _normalise(head)
+    start = head.rfind(" ") + 1
+    hour = head[start:]
+    if not hour.isdigit() or int(hour) > 23:
+        return None
+    days = _date_days(head[:start])
+    if days is None:
+        return None
+    return days * 86400, int(hour)
+
+@lru_cache(maxsize=256)
+def _suffix(suffix: str) -> Optional[tuple]:
+    # "PM EST" -> (12, -18000); (None, offset) for 24-hour clocks
+    match = _SUFFIX.match(suffix)
+    if match:
+        pm_shift, tz = (12 if match.group(1) in "pP" else 0), match.group(2)
+    else:
+        pm_shift, tz = None, suffix
+    offset = tz_offset(tz)
+    if offset is None:
+        # Logged once per spelling thanks to the cache
+        print(f"Unknown Takeout time zone: {tz.strip()!r}")
+        return None
+    return pm_shift, offset
+
+@lru_cache(maxsize=65536)
+def _tail(tail: str) -> Optional[tuple]:
+    # "04:05 PM EST" -> (seconds past the hour in UTC, 12); the clock is
+    # None when only the zone is unknown
+    tail = _normalise(tail)
+    minute, second, rest = tail[:2], "00", tail[2:]
+    if rest[:1] == ":":
+        second, rest = rest[1:3], rest[3:]
+    if not (len(minute) == 2 and len(second) == 2 and minute.isdigit() and second.isdigit()):
+        return None
+    if int(minute) > 59 or int(second) > 59 or rest[:1] not in ("", " "):
+        return None
+    suffix = _suffix(rest[1:])
+    if suffix is None:
+        return None, None
+    pm_shift, offset = suffix
+    return int(minute) * 60 + int(second) - offset, pm_shift
+
+def parse_takeout_timestamp(stamp: str) -> Optional[int]:
+    # Takeout timestamp string -> UTC epoch seconds, or None if unrecognised
+    colon = stamp.find(":") if stamp else -1
+    if colon < 0:
+        return None
+    head = _head(stamp[:colon])
+    tail = _tail(stamp[colon + 1:])
+    if head is None or tail is None:
+        return None
+    (day_start, hour), (clock, pm_shift) = head, tail
+    if clock is None:
+        metrics.increment("takeout_unknown_timezones")
+        return None
+    if pm_shift is not None:
+        if hour > 12:
+            return None
+        hour = hour % 12 + pm_shift
+    return day_start + hour * 3600 + clock
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+from app.core import metrics
+from app.core.config import settings
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "taxonomy.json")
+UNCATEGORIZED = "uncategorized"
+
+
+class KeywordClassifier:
+    # Flat, immutable keyword tables. Under a preloaded gunicorn master they
+    # are shared by all workers copy-on-write
+
+    def __init__(self, category_keywords: dict):
+        self.categories = tuple(category_keywords)
+        self.keywords = tuple(
+            (keyword, index)
+            for index, keywords in enumerate(category_keywords.values())
+            for keyword in keywords
+        )
+
+    def classify(self, text: str) -> str:
+        # Category with the most matching keywords; ties go to the category
+        # listed first in the taxonomy
+        text = text.lower()
+        scores = [0] * len(self.categories)
+        matched = False
+        for keyword, index in self.keywords:
+            if keyword in text:
+                scores[index] += 1
+                matched = True
+        if not matched:
+            return UNCATEGORIZED
+        return self.categories[scores.index(max(scores))]
+
+
+class Taxonomy:
+    # One compiled, immutable taxonomy version; swapped as a whole on reload
+
+    def __init__(self, version: str, categories: dict):
+        self.version = version
+        self.keywords = {
+            name: tuple(k.lower() for k in c["keywords"])
+            for name, c in categories.items() if c["keywords"]
+        }
+        self.sentiment = {name: float(c["sentiment"]) for name, c in categories.items()}
+        # Small-int codes stored in user_events.category
+        self.codes = {name: int(c["code"]) for name, c in categories.items()}
+        self.names = {code: name for name, code in self.codes.items()}
+        self.classifier = KeywordClassifier(self.keywords)
+
+    def classify(self, text: str) -> str:
+        return self.classifier.classify(text)
+
+
+def _validate(data: dict, previous: Optional[Taxonomy]):
+    if not isinstance(data, dict) or not isinstance(data.get("version"), str) or not data["version"]:
+        raise ValueError("taxonomy needs a non-empty string version")
+    categories = data.get("categories")
+    if not isinstance(categories, dict) or UNCATEGORIZED not in categories:
+        raise ValueError(f"taxonomy needs a categories object including {UNCATEGORIZED!r}")
+
+    codes = {}
+    for name, category in categories.items():
+        if not isinstance(category, dict):
+            raise ValueError(f"category {name!r} must be an object")
+        if not isinstance(category.get("code"), int) or category["code"] < 0:
+            raise ValueError(f"category {name!r} needs a non-negative integer code")
+        sentiment = category.get("sentiment")
+        if not isinstance(sentiment, (int, float)) or not -1 <= sentiment <= 1:
+            raise ValueError(f"category {name!r} needs a sentiment between -1 and 1")
+        keywords = category.get("keywords")
+        if not isinstance(keywords, list) or not all(isinstance(k, str) and k for k in keywords):
+            raise ValueError(f"category {name!r} needs a list of keyword strings")
+        if category["code"] in codes:
+            raise ValueError(f"categories {codes[category['code']]!r} and {name!r} share a code")
+        codes[category["code"]] = name
+
+    # Stored events keep their codes, so codes are append-only across versions
+    if previous is not None:
+        for name, code in previous.codes.items():
+            if codes.get(code, name) != name:
+                raise ValueError(f"code {code} of {name!r} was reassigned to {codes[code]!r}")
+            if name in categories and categories[name]["code"] != code:
+                raise ValueError(f"category {name!r} changed code from {code}")
+
+
+_current = None
+_loaded_mtime = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def taxonomy_path() -> str:
+    return settings.TAXONOMY_PATH or DEFAULT_TAXONOMY_PATH
+
+
+def reload_taxonomy(force: bool = False) -> Taxonomy:
+    # Loads and compiles the file if it changed, then swaps the reference.
+    # A broken file keeps the running taxonomy in place
+    global _current, _loaded_mtime
+    path = taxonomy_path()
+    with _lock:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if not force and _current is not None and mtime == _loaded_mtime:
+                return _current
+
+            started = time.perf_counter()
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            _validate(data, _current)
+            taxonomy = Taxonomy(data["version"], data["categories"])
+            compiled = time.perf_counter()
+        except (OSError, ValueError) as e:
+            metrics.increment("taxonomy_reload_errors")
+            print(f"Taxonomy reload from {path} failed: {e}")
+            if _current is None:
+                raise
+            return _current
+
+        previous, _current, _loaded_mtime = _current, taxonomy, mtime
+        swapped = time.perf_counter()
+
+    metrics.observe("taxonomy_compile_seconds", compiled - started)
+    metrics.observe("taxonomy_swap_seconds", swapped - compiled)
+    metrics.increment("taxonomy_reloads")
+    metrics.set_gauge("taxonomy_version", taxonomy.version)
+    metrics.set_gauge("taxonomy_keywords", len(taxonomy.classifier.keywords))
+    if previous is not None and previous.version != taxonomy.version:
+        print(f"Taxonomy {previous.version} -> {taxonomy.version} ({(compiled - started) * 1000:.1f} ms to compile)")
+    return taxonomy
+
+
+def current_taxonomy() -> Taxonomy:
+    # The file is stat'ed at most every TAXONOMY_CHECK_SECONDS, so edits are
+    # picked up by every worker without a restart
+    global _checked_at
+    now = time.monotonic()
+    if _current is None or now - _checked_at >= settings.TAXONOMY_CHECK_SECONDS:
+        _checked_at = now
+        return reload_taxonomy()
+    return _current
@@ -1,77 +1,218 @@
 from bs4 import BeautifulSoup
+from lxml import etree
 from datetime import datetime
 from collections import Counter
-import re
-
-# Emotional categories for video classification
-CATEGORY_KEYWORDS = {
-    "dark_content": [
-        "suicide", "self harm", "depression", "anxiety", "hopeless",
-        "death", "kill", "murder", "horror", "scary", "disturbing",
-        "abuse", "trauma", "breakdown", "crisis", "suffer"
-    ],
-    "motivational": [
-        "motivation", "success", "hustle", "grind", "inspire",
-        "achieve", "goal", "growth", "mindset", "productivity",
-        "entrepreneur", "discipline", "focus", "winner"
-    ],
-    "entertainment": [
-        "funny", "comedy", "meme", "prank", "reaction", "vlog",
-        "challenge", "shorts", "trending", "viral", "roast"
-    ],
-    "educational": [
-        "tutorial", "learn", "course", "explain", "how to",
-        "study", "lecture", "science", "math", "history",
-        "coding", "programming", "technology", "ai", "ml"
-    ],
-    "music": [
-        "song", "music", "lyrics", "album", "artist", "concert",
-        "playlist", "beats", "remix", "cover", "acoustic"
-    ],
-    "romantic_sad": [
-        "breakup", "heartbreak", "sad song", "missing", "lonely",
-        "love story", "emotional", "crying", "tears", "hurt",
-        "relationship", "ex", "goodbye"
-    ],
-    "gaming": [
-        "gameplay", "gaming", "playthrough", "walkthrough", "esports",
-        "minecraft", "fortnite", "pubg", "valorant", "gta"
-    ],
-    "news": [
-        "news", "politics", "government", "election", "war",
-        "economy", "breaking", "update", "world", "crisis"
-    ],
-    "spiritual": [
-        "meditation", "yoga", "spiritual", "mindfulness", "peace",
-        "calm", "healing", "chakra", "manifest", "gratitude"
-    ],
-    "fitness": [
-        "workout", "fitness", "gym", "exercise", "diet",
-        "weight loss", "muscle", "training", "health", "nutrition"
-    ]
-}
-
-# Emotional weight of each category (-1 to +1)
-CATEGORY_SENTIMENT = {
-    "dark_content": -0.9,
-    "romantic_sad": -0.6,
-    "news": -0.3,
-    "gaming": 0.0,
-    "entertainment": 0.4,
-    "music": 0.2,
-    "educational": 0.3,
-    "motivational": 0.8,
-    "spiritual": 0.6,
-    "fitness": 0.5,
-    "uncategorized": 0.0
-}
+from typing import BinaryIO, Iterator, Optional
+import array
+import hashlib
+import numpy as np
+from app.connectors.takeout_time import parse_takeout_timestamp
+from app.connectors.taxonomy import Taxonomy, current_taxonomy
+from app.core.deadline import CancelToken, check_deadline
+
+TOP_SEARCHES = 20
+DEADLINE_CHECK_EVERY = 1000
+
+# One packed record per watched video (29 bytes): the entry digest, epoch
+# seconds, the 11-byte video id from the URL and the taxonomy code of the
+# category. Titles and URLs are not kept
+WATCH_RECORD = np.dtype([
+    ("digest", "<i8"),
+    ("watched_at", "<i8"),
+    ("video_id", "S11"),
+    ("category", "<i2"),
+])
+NO_TIMESTAMP = np.iinfo(np.int64).min
+_ARRAY_CODES = {"i8": "q", "i2": "h"}
+
+
+class RecordBuffer:
+    # Builds a structured array one entry at a time into typed column
+    # buffers, without a Python object per entry
+
+    __slots__ = ("dtype", "columns", "count")
+
+    def __init__(self, dtype: np.dtype):
+        self.dtype = dtype
+        self.columns = [
+            bytearray() if dtype[name].kind == "S"
+            else array.array(_ARRAY_CODES[dtype[name].str[1:]])
+            for name in dtype.names
+        ]
+        self.count = 0
+
+    def append(self, *values):
+        for column, value, name in zip(self.columns, values, self.dtype.names):
+            if isinstance(column, bytearray):
+                column += value[:self.dtype[name].itemsize].ljust(self.dtype[name].itemsize, b"\0")
+            else:
+                column.append(value)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_array(self) -> np.ndarray:
+        records = np.empty(self.count, dtype=self.dtype)
+        for column, name in zip(self.columns, self.dtype.names):
+            records[name] = np.frombuffer(column, dtype=self.dtype[name])
+        return records
+
+
+class SearchHistory:
+    # Parsed search history: a category code per search plus the first
+    # TOP_SEARCHES queries, which is all the analysis reads
+
+    __slots__ = ("categories", "top_queries")
+
+    def __init__(self, categories: np.ndarray, top_queries: list):
+        self.categories = categories
+        self.top_queries = top_queries
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+
+class AnalysisAccumulator:
+    # Running aggregates for YouTubeAnalyzer.analyze; memory is O(categories)
+
+    def __init__(self, taxonomy: Optional[Taxonomy] = None):
+        self.taxonomy = taxonomy or current_taxonomy()
+        self.total_videos = 0
+        self.total_searches = 0
+        self.sentiment_sum = 0
+        self.category_counts = Counter()
+        self.search_category_counts = Counter()
+        self.top_searches = []
+
+    def add_video(self, category: str):
+        self.total_videos += 1
+        self.category_counts[category] += 1
+        self.sentiment_sum += self.taxonomy.sentiment.get(category, 0)
+
+    def add_search(self, query: str, category: str):
+        self.total_searches += 1
+        self.search_category_counts[category] += 1
+        if len(self.top_searches) < TOP_SEARCHES:
+            self.top_searches.append(query)
+
+    def _code_counts(self, codes: np.ndarray) -> list:
+        # (category, count) in order of first appearance, so ties in
+        # most_common() break the same way as with add_video/add_search
+        unique, first, counts = np.unique(codes, return_index=True, return_counts=True)
+        return [(self.taxonomy.names[int(unique[i])], int(counts[i])) for i in np.argsort(first)]
+
+    def add_video_codes(self, codes: np.ndarray):
+        for category, count in self._code_counts(codes):
+            self.total_videos += count
+            self.category_counts[category] += count
+            self.sentiment_sum += self.taxonomy.sentiment.get(category, 0) * count
+
+    def add_search_codes(self, codes: np.ndarray, queries: list):
+        for category, count in self._code_counts(codes):
+            self.total_searches += count
+            self.search_category_counts[category] += count
+        self.top_searches = (self.top_searches + list(queries))[:TOP_SEARCHES]
+
+    def merge(self, older: "AnalysisAccumulator"):
+        # Takeout lists newest first, so our searches go ahead of the older ones
+        self.total_videos += older.total_videos
+        self.total_searches += older.total_searches
+        self.sentiment_sum += older.sentiment_sum
+        self.category_counts.update(older.category_counts)
+        self.search_category_counts.update(older.search_category_counts)
+        self.top_searches = (self.top_searches + older.top_searches)[:TOP_SEARCHES]
+
+    def to_state(self) -> dict:
+        return {
+            "taxonomy_version": self.taxonomy.version,
+            "total_videos": self.total_videos,
+            "total_searches": self.total_searches,
+            "sentiment_sum": self.sentiment_sum,
+            "category_counts": dict(self.category_counts),
+            "search_category_counts": dict(self.search_category_counts),
+            "top_searches": self.top_searches,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, taxonomy: Optional[Taxonomy] = None) -> "AnalysisAccumulator":
+        acc = cls(taxonomy)
+        acc.total_videos = state["total_videos"]
+        acc.total_searches = state["total_searches"]
+        acc.sentiment_sum = state["sentiment_sum"]
+        acc.category_counts = Counter(state["category_counts"])
+        acc.search_category_counts = Counter(state["search_category_counts"])
+        acc.top_searches = list(state["top_searches"])
+        if state.get("taxonomy_version") != acc.taxonomy.version:
+            # Sums from another version are re-weighted with the current sentiments
+            acc.sentiment_sum = sum(
+                acc.taxonomy.sentiment.get(category, 0) * count
+                for category, count in acc.category_counts.items()
+            )
+        return acc
+
+
+def entry_digest(url: str, stamp: str) -> int:
+    # 64-bit fingerprint of one history entry, used to skip entries seen before
+    digest = hashlib.blake2b(f"{url}\x1f{stamp}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _has_class(element, name: str) -> bool:
+    return name in (element.get("class") or "").split()
+
+
+def _cell_timestamp(cell) -> str:
+    # Takeout cells end with "...<br>Jan 5, 2024, 10:15:32 PM EST<br>", so the
+    # timestamp is the last non-empty tail among the cell's children
+    for child in reversed(cell):
+        if child.tail and child.tail.strip():
+            return child.tail.strip()
+    return (cell.text or "").strip()
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    _, sep, query = url.partition("v=")
+    if not sep:
+        return None
+    return query[:11] or None
+
+
+def iter_cell_links(source: BinaryIO) -> Iterator[tuple]:
+    # Streams (link text, href, last text line) for the first link of every
+    # Takeout content-cell; the last line is the entry's timestamp. Records are
+    # freed once parsed so memory stays flat for large exports
+    context = etree.iterparse(
+        source, events=("end",), tag="div", html=True, encoding="utf-8"
+    )
+    try:
+        for _, element in context:
+            if _has_class(element, "content-cell"):
+                link = next(element.iter("a"), None)
+                if link is not None:
+                    text = "".join(t.strip() for t in link.itertext() if t.strip())
+                    yield text, link.get("href", ""), _cell_timestamp(element)
+            elif _has_class(element, "outer-cell"):
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+    except etree.XMLSyntaxError:
+        # Empty or non-HTML upload: nothing to analyze
+        return
+    finally:
+        del context
 
 
 class YouTubeAnalyzer:
 
-    def parse_watch_history(self, html_content: str) -> list:
+    def __init__(self, taxonomy: Optional[Taxonomy] = None):
+        self.taxonomy = taxonomy or current_taxonomy()
+
+    def parse_watch_history(self, html_content: str) -> np.ndarray:
+        # WATCH_RECORD array, one record per watched video
         soup = BeautifulSoup(html_content, "lxml")
-        videos = []
+        videos = RecordBuffer(WATCH_RECORD)
 
         # Google Takeout HTML structure
         content_cells = soup.find_all("div", class_="content-cell")
@@ -86,34 +227,21 @@ class YouTubeAnalyzer:
                 title = link.get_text(strip=True)
                 url = link.get("href", "")
 
-                # Get timestamp
-                text = cell.get_text(separator="\n")
-                lines = [l.strip() for l in text.split("\n") if l.strip()]
-
-                timestamp = None
-                for line in lines:
-                    if any(month in line for month in [
-                        "Jan", "Feb", "Mar", "Apr", "May", "Jun",
-                        "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"
-                    ]):
-                        timestamp = line
-                        break
+                # The timestamp is the cell's last text node
+                strings = [t.strip() for t in cell.find_all(string=True) if t.strip()]
+                timestamp = strings[-1] if strings else ""
 
                 if title and "youtube.com/watch" in url:
-                    videos.append({
-                        "title": title,
-                        "url": url,
-                        "timestamp": timestamp,
-                        "category": self._classify_video(title),
-                    })
+                    videos.append(*self._watch_record(url, timestamp, self._classify_video(title)))
             except Exception:
                 continue
 
-        return videos
+        return videos.to_array()
 
-    def parse_search_history(self, html_content: str) -> list:
+    def parse_search_history(self, html_content: str) -> SearchHistory:
         soup = BeautifulSoup(html_content, "lxml")
-        searches = []
+        categories = array.array("h")
+        top_queries = []
 
         content_cells = soup.find_all("div", class_="content-cell")
 
@@ -125,52 +253,112 @@ class YouTubeAnalyzer:
 
                 query = link.get_text(strip=True)
                 if query:
-                    searches.append({
-                        "query": query,
-                        "category": self._classify_video(query),
-                    })
+                    categories.append(self.taxonomy.codes[self._classify_video(query)])
+                    if len(top_queries) < TOP_SEARCHES:
+                        top_queries.append(query)
             except Exception:
                 continue
 
-        return searches
+        return SearchHistory(np.frombuffer(categories, dtype=np.int16), top_queries)
+
+    def _watch_record(self, url: str, stamp: str, category: str, digest: Optional[int] = None) -> tuple:
+        # Field values for WATCH_RECORD
+        watched_at = parse_takeout_timestamp(stamp)
+        video_id = video_id_from_url(url)
+        return (
+            entry_digest(url, stamp) if digest is None else digest,
+            NO_TIMESTAMP if watched_at is None else watched_at,
+            video_id.encode("ascii", "ignore") if video_id else b"",
+            self.taxonomy.codes[category],
+        )
 
     def _classify_video(self, title: str) -> str:
-        title_lower = title.lower()
-        scores = {}
+        return self.taxonomy.classify(title)
 
-        for category, keywords in CATEGORY_KEYWORDS.items():
-            score = sum(1 for kw in keywords if kw in title_lower)
-            if score > 0:
-                scores[category] = score
+    def analyze(self, videos: np.ndarray, searches: SearchHistory) -> dict:
+        acc = AnalysisAccumulator(self.taxonomy)
+        acc.add_video_codes(videos["category"])
+        acc.add_search_codes(searches.categories, searches.top_queries)
+        return self.summarize(acc)
 
-        if not scores:
-            return "uncategorized"
-
-        return max(scores, key=scores.get)
-
-    def analyze(self, videos: list, searches: list) -> dict:
-        if not videos and not searches:
+    def analyze_stream(
+        self,
+        watch_source: BinaryIO,
+        search_source: Optional[BinaryIO] = None
+    ) -> dict:
+        # Same result as parse_* + analyze without building the entry lists
+        acc, _, _ = self.accumulate(watch_source, search_source)
+        return self.summarize(acc)
+
+    def accumulate(
+        self,
+        watch_source: Optional[BinaryIO],
+        search_source: Optional[BinaryIO] = None,
+        seen_watch: Optional[set] = None,
+        seen_search: Optional[set] = None,
+        deadline: Optional[float] = None,
+        count_seen: bool = False,
+        cancel: Optional[CancelToken] = None
+    ) -> tuple:
+        # With seen_* digest sets, entries already processed are skipped and
+        # the new ones are returned alongside the aggregates: watch entries as
+        # a WATCH_RECORD array, searches as an array of digests.
+        # count_seen still aggregates seen entries (re-classification)
+        acc = AnalysisAccumulator(self.taxonomy)
+        new_watch, new_search = RecordBuffer(WATCH_RECORD), array.array("q")
+
+        if watch_source is not None:
+            for n, (title, url, stamp) in enumerate(iter_cell_links(watch_source)):
+                if n % DEADLINE_CHECK_EVERY == 0:
+                    check_deadline(deadline, cancel)
+                if not (title and "youtube.com/watch" in url):
+                    continue
+                if seen_watch is not None:
+                    digest = entry_digest(url, stamp)
+                    if digest in seen_watch:
+                        if count_seen:
+                            acc.add_video(self._classify_video(title))
+                        continue
+                    category = self._classify_video(title)
+                    new_watch.append(*self._watch_record(url, stamp, category, digest))
+                else:
+                    category = self._classify_video(title)
+                acc.add_video(category)
+
+        if search_source is not None:
+            for n, (query, url, stamp) in enumerate(iter_cell_links(search_source)):
+                if n % DEADLINE_CHECK_EVERY == 0:
+                    check_deadline(deadline, cancel)
+                if not query:
+                    continue
+                if seen_search is not None:
+                    digest = entry_digest(url, stamp)
+                    if digest in seen_search:
+                        if count_seen:
+                            acc.add_search(query, self._classify_video(query))
+                        continue
+                    new_search.append(digest)
+                acc.add_search(query, self._classify_video(query))
+
+        return acc, new_watch.to_array(), np.frombuffer(new_search, dtype=np.int64)
+
+    def summarize(self, acc: AnalysisAccumulator) -> dict:
+        if not acc.total_videos and not acc.total_searches:
             return {"error": "No data to analyze"}
 
-        total_videos = len(videos)
+        total_videos = acc.total_videos
 
         # Category breakdown
-        categories = [v["category"] for v in videos]
-        category_counts = Counter(categories)
+        category_counts = acc.category_counts
         category_percentages = {
             cat: round((count / total_videos) * 100, 1)
             for cat, count in category_counts.most_common()
         } if total_videos > 0 else {}
 
         # Calculate emotional diet score
-        sentiment_scores = []
-        for video in videos:
-            cat = video["category"]
-            sentiment_scores.append(CATEGORY_SENTIMENT.get(cat, 0))
-
         avg_sentiment = (
-            sum(sentiment_scores) / len(sentiment_scores)
-            if sentiment_scores else 0
+            acc.sentiment_sum / total_videos
+            if total_videos else 0
         )
 
         # Normalize to 0-100
@@ -187,11 +375,10 @@ class YouTubeAnalyzer:
         ) if total_videos > 0 else 0
 
         # Top searches
-        top_searches = [s["query"] for s in searches[:20]]
+        top_searches = list(acc.top_searches)
 
         # Search category breakdown
-        search_categories = [s["category"] for s in searches]
-        search_category_counts = Counter(search_categories)
+        search_category_counts = acc.search_category_counts
 
         # Determine overall content mood
         if dark_percentage > 20:
@@ -215,8 +402,9 @@ class YouTubeAnalyzer:
         )
 
         return {
+            "taxonomy_version": acc.taxonomy.version,
             "total_videos_analyzed": total_videos,
-            "total_searches_analyzed": len(searches),
+            "total_searches_analyzed": acc.total_searches,
             "emotional_diet_score": emotional_diet_score,
             "content_mood": content_mood,
             "avg_sentiment": round(avg_sentiment, 3),
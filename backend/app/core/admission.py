@@ -0,0 +1,192 @@
+import asyncio
+import math
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.security import verify_token
+
+# Sorted-set semaphores: members are request tokens scored by start time, so
+# leases of crashed workers expire instead of leaking slots
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local lease_ms = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - lease_ms)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - lease_ms)
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[4]) then
+    return -1
+end
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[5])
+redis.call('ZADD', KEYS[2], now, ARGV[5])
+redis.call('PEXPIRE', KEYS[1], lease_ms)
+redis.call('PEXPIRE', KEYS[2], lease_ms)
+return 1
+"""
+
+# Token bucket; returns 0 when allowed, otherwise milliseconds until it would be
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) / 1000 * rate)
+local wait = 0
+if tokens < 1 then
+    wait = math.ceil((1 - tokens) / rate * 1000)
+else
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return wait
+"""
+
+# Waiting room for a route's global limit, shared by all workers. Members are
+# scored by the time their wait ends, so waiters of a killed worker drop out
+# on their own instead of filling the queue for good
+ENQUEUE_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+POLL_SECONDS = 0.05
+
+@dataclass(frozen=True)
+class RouteLimits:
+    max_concurrency: int
+    max_per_user: int
+    lease_seconds: float
+
+ROUTE_LIMITS = {
+    "youtube_analyze": RouteLimits(
+        settings.YOUTUBE_ANALYZE_MAX_CONCURRENCY,
+        settings.YOUTUBE_ANALYZE_MAX_PER_USER,
+        settings.YOUTUBE_ANALYZE_DEADLINE_SECONDS + 30,
+    ),
+    "spotify_analysis": RouteLimits(
+        settings.SPOTIFY_ANALYSIS_MAX_CONCURRENCY,
+        settings.SPOTIFY_ANALYSIS_MAX_PER_USER,
+        settings.SPOTIFY_ANALYSIS_DEADLINE_SECONDS + 30,
+    ),
+    "chat_message": RouteLimits(
+        settings.CHAT_MAX_CONCURRENCY,
+        settings.CHAT_MAX_PER_USER,
+        settings.CHAT_DEADLINE_SECONDS + 30,
+    ),
+}
+
+def _too_many(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+def _user_id(token: str) -> str:
+    payload = verify_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload["sub"]
+
+async def _acquire(route: str, user_id: str, member: str, limits: RouteLimits) -> bool:
+    redis = get_redis()
+    keys = [f"admission:{route}:active", f"admission:{route}:user:{user_id}"]
+    queue_key = f"admission:{route}:queue"
+    args = [limits.lease_seconds * 1000, limits.max_concurrency, limits.max_per_user, member]
+
+    result = await redis.eval(ACQUIRE_SCRIPT, 2, *keys, int(time.time() * 1000), *args)
+    if result == 1:
+        return True
+    if result == -1:
+        raise _too_many("Too many concurrent requests for this user", POLL_SECONDS)
+
+    # Global limit reached: wait in a bounded queue shared by all workers
+    wait_ms = int(settings.ADMISSION_MAX_WAIT_SECONDS * 1000)
+    queued = await redis.eval(
+        ENQUEUE_SCRIPT, 1, queue_key,
+        int(time.time() * 1000), wait_ms, settings.ADMISSION_QUEUE_SIZE, member
+    )
+    if not queued:
+        raise _too_many("Server busy, please retry", settings.ADMISSION_MAX_WAIT_SECONDS)
+    try:
+        give_up = time.monotonic() + settings.ADMISSION_MAX_WAIT_SECONDS
+        while time.monotonic() < give_up:
+            await asyncio.sleep(POLL_SECONDS)
+            result = await redis.eval(ACQUIRE_SCRIPT, 2, *keys, int(time.time() * 1000), *args)
+            if result == 1:
+                return True
+        raise _too_many("Server busy, please retry", settings.ADMISSION_MAX_WAIT_SECONDS)
+    finally:
+        await redis.zrem(queue_key, member)
+
+async def _release(route: str, user_id: str, member: str):
+    redis = get_redis()
+    try:
+        await redis.zrem(f"admission:{route}:active", member)
+        await redis.zrem(f"admission:{route}:user:{user_id}", member)
+    except RedisError as e:
+        print(f"Admission release error: {e}")
+
+async def forget_user(user_id: str):
+    # Drops a deleted user's per-user slots and Gemini quota
+    keys = [f"admission:{route}:user:{user_id}" for route in ROUTE_LIMITS]
+    try:
+        await get_redis().delete(*keys, f"quota:gemini:{user_id}")
+    except RedisError as e:
+        print(f"Admission cleanup error: {e}")
+
+@asynccontextmanager
+async def admitted(route: str, user_id: str):
+    # Holds a global and a per-user slot of `route` for the block
+    limits = ROUTE_LIMITS[route]
+    member = uuid.uuid4().hex
+    try:
+        acquired = await _acquire(route, user_id, member, limits)
+    except RedisError as e:
+        # Fail open: losing Redis should not take the API down with it
+        print(f"Admission control unavailable: {e}")
+        acquired = False
+    try:
+        yield
+    finally:
+        if acquired:
+            await _release(route, user_id, member)
+
+def admit(route: str):
+    # FastAPI dependency holding the route's slots for the whole request
+    async def dependency(token: str):
+        async with admitted(route, _user_id(token)):
+            yield
+
+    return dependency
+
+async def gemini_quota(token: str):
+    # Per-user token bucket for model calls, shared across workers
+    user_id = _user_id(token)
+    try:
+        wait_ms = await get_redis().eval(
+            TOKEN_BUCKET_SCRIPT, 1, f"quota:gemini:{user_id}",
+            int(time.time() * 1000),
+            settings.GEMINI_RATE_PER_MINUTE / 60,
+            settings.GEMINI_BURST,
+        )
+    except RedisError as e:
+        print(f"Gemini quota unavailable: {e}")
+        return
+    if wait_ms:
+        raise _too_many("Chat quota exceeded, please slow down", wait_ms / 1000)
@@ -20,13 +20,93 @@ class Settings(BaseSettings):
     SPOTIFY_CLIENT_ID: str = ""
     SPOTIFY_CLIENT_SECRET: str = ""
     SPOTIFY_REDIRECT_URI: str = "http://127.0.0.1:8000/api/connectors/spotify/callback"
+    SPOTIFY_API_URL: str = "https://api.spotify.com/v1"  # scripts/fake_spotify.py for load tests
 
     # Gemini AI
     GEMINI_API_KEY: str = ""
+    GEMINI_BASE_URL: str = ""  # empty uses Google's endpoint; point at scripts/fake_gemini.py to test
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_MAX_CONCURRENCY: int = 8  # upstream calls per worker; the rest queue
 
     # Frontend
     FRONTEND_URL: str = "http://localhost:5173"
 
+    # Analysis cache
+    ANALYSIS_FRESHNESS_SECONDS: int = 300  # serve cached result without refreshing
+    ANALYSIS_CACHE_TTL_SECONDS: int = 86400  # keep stale result for conditional GETs
+
+    # Retention
+    PARTITION_MONTHS_AHEAD: int = 3
+    ANALYSES_RETENTION_MONTHS: int = 24
+    RAW_DATA_RETENTION_MONTHS: int = 6
+    DELETE_BATCH_SIZE: int = 5000
+
+    # Deadlines and timeouts (seconds)
+    YOUTUBE_ANALYZE_DEADLINE_SECONDS: float = 120.0
+    SPOTIFY_ANALYSIS_DEADLINE_SECONDS: float = 20.0
+    CHAT_DEADLINE_SECONDS: float = 45.0
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    GEMINI_TIMEOUT_SECONDS: float = 30.0
+    DISCONNECT_POLL_SECONDS: float = 0.5
+    WORKER_PROCESSES: int = 2  # process pool for CPU-bound parsing
+
+    # Admission control (limits are shared by all workers through Redis)
+    YOUTUBE_ANALYZE_MAX_CONCURRENCY: int = 4
+    YOUTUBE_ANALYZE_MAX_PER_USER: int = 1
+    SPOTIFY_ANALYSIS_MAX_CONCURRENCY: int = 32
+    SPOTIFY_ANALYSIS_MAX_PER_USER: int = 2
+    CHAT_MAX_CONCURRENCY: int = 16
+    CHAT_MAX_PER_USER: int = 2
+    ADMISSION_QUEUE_SIZE: int = 64  # requests waiting per route before 429
+    ADMISSION_MAX_WAIT_SECONDS: float = 10.0
+    GEMINI_RATE_PER_MINUTE: float = 6.0
+    GEMINI_BURST: int = 5
+
+    # Admin and batch jobs
+    ADMIN_TOKEN: str = ""  # X-Admin-Token for /api/admin; empty disables the admin API
+    BATCH_CHUNK_SIZE: int = 500  # users per scoring chunk
+    BATCH_WORKERS: int = 4  # scoring processes for the batch CLI
+    BATCH_API_MAX_IN_FLIGHT: int = 1  # chunks an admin-API batch keeps in the shared pool; the rest serves uploads
+    BATCH_STALE_SECONDS: int = 900  # a running job without a checkpoint this long may be resumed
+
+    # Dashboard
+    DASHBOARD_TREND_DAYS: int = 30
+
+    # Forecasting
+    FORECAST_HISTORY_DAYS: int = 90  # daily wellness series the fit looks at
+    FORECAST_HORIZON_DAYS: int = 14
+    FORECAST_MIN_POINTS: int = 7  # days with data before a user gets a forecast
+    FORECAST_REFIT_MIN_POINTS: int = 3  # new days with data that trigger a refit
+    FORECAST_MAX_AGE_DAYS: int = 7  # refit at least this often while data arrives
+    FORECAST_CHUNK_SIZE: int = 2000  # users per fitting chunk
+
+    # Keyword taxonomy
+    TAXONOMY_PATH: str = ""  # JSON taxonomy file; empty uses app/connectors/taxonomy.json
+    TAXONOMY_CHECK_SECONDS: float = 5.0  # how often workers stat the file for changes
+
+    # Responses
+    GZIP_MINIMUM_SIZE: int = 1024  # bytes
+
+    # Profiling (X-Profile: <ADMIN_TOKEN> on a request; off means no middleware at all)
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = ""  # empty uses <tmp>/mindwatch-profiles
+    PROFILE_INTERVAL_SECONDS: float = 0.001  # sampling interval
+    PROFILE_KEEP: int = 50  # newest profiles kept on disk (HTML reports run to ~2 MB)
+    PROFILE_ALLOCATION_TOP: int = 25  # source lines reported by tracemalloc
+
+    # Shared read-only state
+    MODEL_DIR: str = ""  # directory of .npy model weights, memory-mapped at startup
+
+    # Crisis alerts
+    ALERT_BASELINE_WINDOW: int = 14  # previous analyses forming the baseline
+    ALERT_MIN_BASELINE: int = 3
+    ALERT_SCORE_FLOOR: float = 35.0
+    ALERT_DROP_POINTS: float = 15.0
+    ALERT_DROP_SIGMA: float = 2.0
+    ALERT_QUEUE_SIZE: int = 32  # per WebSocket connection
+    ALERT_STREAM_MAXLEN: int = 100000
+    ALERT_PING_SECONDS: int = 30
+
     class Config:
         env_file = ".env"
 
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -13,6 +14,20 @@ SessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+# JSONB on PostgreSQL, plain JSON elsewhere (e.g. SQLite in local tooling)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+def dialect_insert(bind):
+    # INSERT construct with ON CONFLICT support for the bound dialect
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import tempfile
+import time
+from typing import Awaitable, Optional
+from fastapi import HTTPException, Request
+from app.core.config import settings
+
+class DeadlineExceeded(Exception):
+    pass
+
+class JobCancelled(Exception):
+    pass
+
+class CancelToken:
+    # Cancellation that crosses into the process pool: a file that exists
+    # while the work is wanted, so removing it cancels. Pickles as a path
+    # and costs a stat to poll
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix="mindwatch-job-")
+        os.close(fd)
+
+    def cancel(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def cancelled(self) -> bool:
+        return not os.path.exists(self.path)
+
+    # Finished work releases the file the same way
+    close = cancel
+
+def check_deadline(deadline: Optional[float], cancel: Optional[CancelToken] = None):
+    # Cooperative check for CPU-bound loops, including process-pool work
+    if deadline is not None and time.time() > deadline:
+        raise DeadlineExceeded()
+    if cancel is not None and cancel.cancelled():
+        raise JobCancelled()
+
+async def run_with_deadline(request: Request, awaitable: Awaitable, timeout: float):
+    # Runs the handler's work as a task and cancels it as soon as the client
+    # goes away or the deadline passes, so nobody pays for abandoned requests
+    task = asyncio.ensure_future(awaitable)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HTTPException(status_code=504, detail="Request deadline exceeded")
+            done, _ = await asyncio.wait({task}, timeout=min(remaining, settings.DISCONNECT_POLL_SECONDS))
+            if done:
+                try:
+                    return task.result()
+                except DeadlineExceeded:
+                    raise HTTPException(status_code=504, detail="Request deadline exceeded")
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
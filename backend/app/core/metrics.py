@@ -0,0 +1,35 @@
+import os
+import threading
+import time
+
+# In-process metrics, one registry per worker process
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_timings = {}
+
+def increment(name: str, value: int = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def set_gauge(name: str, value):
+    with _lock:
+        _gauges[name] = value
+
+def observe(name: str, seconds: float):
+    with _lock:
+        timing = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+        timing["last"] = seconds
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "taken_at": time.time(),
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "timings": {name: dict(t) for name, t in _timings.items()},
+        }
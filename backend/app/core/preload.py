@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+import numpy as np
+from app.core.config import settings
+
+# Read-only model weights by file stem, memory-mapped from MODEL_DIR
+_weights = {}
+
+def load_model_weights(model_dir: Optional[str] = None) -> dict:
+    # .npy files are mapped rather than read, so every worker (and the process
+    # pool) shares one copy through the page cache
+    model_dir = model_dir if model_dir is not None else settings.MODEL_DIR
+    if not model_dir or not os.path.isdir(model_dir):
+        return _weights
+    for name in sorted(os.listdir(model_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext == ".npy" and stem not in _weights:
+            _weights[stem] = np.load(os.path.join(model_dir, name), mmap_mode="r")
+    return _weights
+
+def get_weights(name: str) -> Optional[np.ndarray]:
+    return _weights.get(name)
+
+def preload_shared_state():
+    # Build everything immutable up front; in a preloaded gunicorn master this
+    # runs once before fork instead of once per worker
+    from app.connectors import youtube, takeout_time  # noqa: F401
+    from app.connectors.taxonomy import current_taxonomy
+    current_taxonomy()
+    load_model_weights()
@@ -0,0 +1,259 @@
+import asyncio
+import contextvars
+import hmac
+import json
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+from app.core import metrics
+from app.core.config import settings
+
+# On-demand profiling of single requests. ProfilingMiddleware is only added
+# when PROFILING_ENABLED; then a request carrying X-Profile: <ADMIN_TOKEN>
+# runs under pyinstrument (plus tracemalloc for multipart uploads), and the
+# report lands in PROFILE_DIR for the admin API. Process-pool jobs started by
+# the request profile themselves and send their report back. tracemalloc
+# slows allocation-heavy code, so upload timings compare only with each other.
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_SKIPPED_HEADER = b"x-profile-skipped"
+PROFILE_ID = re.compile(r"[0-9A-Za-z-]+")
+
+@dataclass
+class ProfileSession:
+    allocations: bool
+    pool_reports: list = field(default_factory=list)
+
+_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+def active_session() -> Optional[ProfileSession]:
+    return _session.get()
+
+def profile_dir() -> str:
+    return settings.PROFILE_DIR or os.path.join(tempfile.gettempdir(), "mindwatch-profiles")
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+def _requested(scope) -> bool:
+    value = _header(scope, PROFILE_HEADER)
+    if value is None or not settings.ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(value.decode("latin-1"), settings.ADMIN_TOKEN)
+
+def _is_upload(scope) -> bool:
+    content_type = _header(scope, b"content-type") or b""
+    return scope["method"] == "POST" and content_type.startswith(b"multipart/form-data")
+
+def _with_header(send, name: bytes, value: bytes):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": [*message.get("headers", []), (name, value)]}
+        await send(message)
+    return wrapped
+
+async def _in_context(context: contextvars.Context, coro):
+    # Cancelling the caller cancels the task too
+    return await asyncio.create_task(coro, context=context.copy())
+
+def _start_allocations():
+    # Returns (snapshot to diff against, whether we started tracing)
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    return tracemalloc.take_snapshot(), started
+
+def _stop_allocations(before, started: bool) -> dict:
+    # The sampler's own records are traced too; they only grow while it
+    # runs, so sampler_bytes bounds their share of the peak
+    import pyinstrument
+
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    if started:
+        tracemalloc.stop()
+    sampler = tracemalloc.Filter(True, os.path.join(os.path.dirname(pyinstrument.__file__), "*"))
+    own = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, sampler.filename_pattern)]
+    stats = after.filter_traces(own).compare_to(before.filter_traces(own), "lineno")
+    return {
+        "peak_bytes": peak,
+        "retained_bytes": current,
+        "sampler_bytes": sum(t.size for t in after.filter_traces([sampler]).traces),
+        "top": [
+            {"line": str(s.traceback[0]), "size_diff": s.size_diff, "count_diff": s.count_diff}
+            for s in stats[:settings.PROFILE_ALLOCATION_TOP]
+        ],
+    }
+
+def profiled_call(fn, args: tuple, allocations: bool) -> tuple:
+    # Runs in the process pool in place of fn(*args); returns (result, report)
+    from pyinstrument import Profiler
+
+    tracking = _start_allocations() if allocations else None
+    profiler = Profiler(interval=settings.PROFILE_INTERVAL_SECONDS)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        result = fn(*args)
+    finally:
+        profiler.stop()
+    report = {
+        "function": f"{fn.__module__}.{fn.__qualname__}",
+        "pid": os.getpid(),
+        "seconds": round(time.perf_counter() - started, 4),
+        "allocations": _stop_allocations(*tracking) if tracking else None,
+        "text": profiler.output_text(unicode=True),
+    }
+    return result, report
+
+def _write_profile(report: dict, profiler):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    report["text"] = profiler.output_text(unicode=True)
+    with open(os.path.join(directory, f"{report['id']}.html"), "w") as f:
+        f.write(profiler.output_html())
+    with open(os.path.join(directory, f"{report['id']}.json"), "w") as f:
+        json.dump(report, f)
+
+    # Ids sort by capture time; keep the newest PROFILE_KEEP
+    ids = sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+    for old in ids[:-settings.PROFILE_KEEP]:
+        for ext in (".json", ".html"):
+            try:
+                os.unlink(os.path.join(directory, old + ext))
+            except FileNotFoundError:
+                pass
+
+def list_profiles(limit: int) -> list:
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    ids = sorted((name[:-5] for name in os.listdir(directory) if name.endswith(".json")), reverse=True)
+    summaries = []
+    for profile_id in ids[:limit]:
+        report = load_profile(profile_id)
+        if report is not None:
+            summaries.append({
+                k: report.get(k) for k in ("id", "method", "path", "status", "seconds", "pid", "captured_at")
+            })
+    return summaries
+
+def _profile_path(profile_id: str, ext: str) -> Optional[str]:
+    if not PROFILE_ID.fullmatch(profile_id):
+        return None
+    path = os.path.join(profile_dir(), profile_id + ext)
+    return path if os.path.exists(path) else None
+
+def load_profile(profile_id: str) -> Optional[dict]:
+    path = _profile_path(profile_id, ".json")
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def load_profile_html(profile_id: str) -> Optional[str]:
+    path = _profile_path(profile_id, ".html")
+    if path is None:
+        return None
+    with open(path) as f:
+        return f.read()
+
+class ProfilingMiddleware:
+    # Plain ASGI middleware around the whole app; unmarked requests cost one
+    # header scan. One profiled request at a time per worker, since
+    # tracemalloc is process-wide (and so counts concurrent requests too)
+    def __init__(self, app):
+        from pyinstrument import Profiler
+        from app.core.workers import start_process_pool
+
+        self.app = app
+        self.profiler_class = Profiler
+        self.start_process_pool = start_process_pool
+        self.busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if self.busy:
+            metrics.increment("profiles_skipped")
+            await self.app(scope, receive, _with_header(send, PROFILE_SKIPPED_HEADER, b"busy"))
+            return
+        # The flag is released before the report is written out
+        captured = {}
+        self.busy = True
+        try:
+            await self.profile(scope, receive, send, captured)
+        finally:
+            self.busy = False
+            if captured:
+                await self.save(**captured)
+
+    async def profile(self, scope, receive, send, captured: dict):
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        status = {}
+
+        send_with_id = _with_header(send, PROFILE_ID_HEADER, profile_id.encode())
+
+        # The server registers transport callbacks from inside receive/send,
+        # and they keep the context they were registered in: later requests
+        # on the same connection would inherit the profiler. Those calls run
+        # in the context from before profiling started
+        outer = contextvars.copy_context()
+
+        async def receive_outside():
+            return await _in_context(outer, receive())
+
+        async def send_outside(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await _in_context(outer, send_with_id(message))
+
+        # Pool processes forked under the profiler or tracemalloc would keep
+        # them on for every later job
+        await self.start_process_pool()
+
+        session = ProfileSession(allocations=_is_upload(scope))
+        token = _session.set(session)
+        tracking = _start_allocations() if session.allocations else None
+        profiler = self.profiler_class(interval=settings.PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+        captured_at = time.time()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive_outside, send_outside)
+        finally:
+            profiler.stop()
+            seconds = time.perf_counter() - started
+            allocations = _stop_allocations(*tracking) if tracking else None
+            _session.reset(token)
+            # Query strings are left out; they carry user tokens
+            captured["profiler"] = profiler
+            captured["report"] = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status.get("code"),
+                "pid": os.getpid(),
+                "captured_at": captured_at,
+                "seconds": round(seconds, 4),
+                "allocations": allocations,
+                "process_pool": session.pool_reports,
+            }
+
+    async def save(self, report: dict, profiler):
+        try:
+            await asyncio.to_thread(_write_profile, report, profiler)
+            metrics.increment("profiles_captured")
+        except OSError as e:
+            print(f"Profile write error: {e}")
@@ -0,0 +1,11 @@
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+_client = None
+
+def get_redis() -> aioredis.Redis:
+    # Created lazily so every worker process opens its own connection pool
+    global _client
+    if _client is None:
+        _client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
@@ -0,0 +1,47 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.core import profiling
+from app.core.config import settings
+from app.core.deadline import CancelToken
+
+_pool = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    # Created on first use so it is never inherited across a fork
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.WORKER_PROCESSES)
+    return _pool
+
+async def run_in_process(fn, *args, cancel: Optional[CancelToken] = None):
+    # Cancelling the returned awaitable drops the job if it is still queued.
+    # A running job stops at its next check_deadline(): at its deadline, or
+    # right away when it was also handed `cancel`, which is set here
+    loop = asyncio.get_running_loop()
+    session = profiling.active_session()
+    try:
+        if session is not None:
+            # Profiled request: the job profiles itself and sends the report back
+            result, report = await loop.run_in_executor(
+                get_process_pool(), profiling.profiled_call, fn, args, session.allocations
+            )
+            session.pool_reports.append(report)
+            return result
+        return await loop.run_in_executor(get_process_pool(), fn, *args)
+    except asyncio.CancelledError:
+        if cancel is not None:
+            cancel.cancel()
+        raise
+
+async def start_process_pool():
+    # Forks the pool's processes now if they are not running yet
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(get_process_pool(), os.getpid)
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
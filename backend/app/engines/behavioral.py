@@ -0,0 +1,196 @@
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
+
+# Listening sessions and circadian features from a user's Spotify plays, in
+# the user's local time, with the last week compared against their own
+# baseline. Works on the sorted columns EventStore.load returns, so months of
+# plays cost a handful of array passes.
+SESSION_GAP_SECONDS = 30 * 60  # silence that ends a session
+SKIP_LIKE_SECONDS = 60  # next play started this soon: previous track was cut short
+LATE_NIGHT_HOURS = (0, 5)  # local [start, end)
+RECENT_DAYS = 7
+BASELINE_DAYS = 56
+HISTORY_DAYS = RECENT_DAYS + BASELINE_DAYS
+MIN_BASELINE_DAYS = 5  # baseline days with plays before deviations count
+
+# Compared features: smallest baseline spread used, and the direction that
+# is adverse for wellness (0: reported but not scored)
+FEATURES = {
+    "plays_per_day": (2.0, 0),
+    "sessions_per_day": (0.5, 0),
+    "session_minutes": (10.0, 0),
+    "late_night_ratio": (0.05, 1),
+    "skip_like_ratio": (0.05, 1),
+    "valence": (0.05, -1),
+}
+MAX_SIGMA = 2.0  # adverse sigmas counted per feature
+DEVIATION_PENALTY = 3.0  # score points per adverse sigma
+LATE_NIGHT_ALLOWANCE = 0.1  # late-night share that costs nothing
+LATE_NIGHT_PENALTY = 15.0  # score points at 100% late-night listening
+
+DAY = 86400
+
+
+def utc_offsets(ts: np.ndarray, tz_name: Optional[str]) -> np.ndarray:
+    # Offset in seconds for every timestamp. Looked up at UTC day boundaries,
+    # and per hour only on days where the offset changes (DST)
+    if not tz_name or not len(ts):
+        return np.zeros(len(ts), dtype=np.int64)
+    try:
+        zone = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return np.zeros(len(ts), dtype=np.int64)
+
+    def lookup(seconds: np.ndarray) -> np.ndarray:
+        return np.array(
+            [int(datetime.fromtimestamp(s, zone).utcoffset().total_seconds()) for s in seconds.tolist()],
+            dtype=np.int64,
+        )
+
+    days = ts // DAY
+    edges = np.union1d(days, days + 1)
+    at_edge = lookup(edges * DAY)
+    offsets = at_edge[np.searchsorted(edges, days)]
+    changing = np.flatnonzero(offsets != at_edge[np.searchsorted(edges, days + 1)])
+    if len(changing):
+        hours, inverse = np.unique(ts[changing] // 3600, return_inverse=True)
+        offsets[changing] = lookup(hours * 3600)[inverse]
+    return offsets
+
+
+def local_day(now: int, tz_name: Optional[str]) -> int:
+    # Days since the epoch in the user's zone; the feature window ends on it
+    return (now + int(utc_offsets(np.array([now]), tz_name)[0])) // DAY
+
+
+def sessionize(ts: np.ndarray) -> tuple:
+    # Sorted timestamps -> (session index per play, session-start flags,
+    # skip-like flags). A play is skip-like when the next play of its
+    # session started within SKIP_LIKE_SECONDS
+    gaps = np.diff(ts)
+    starts = np.concatenate(([True], gaps > SESSION_GAP_SECONDS))
+    sessions = np.cumsum(starts) - 1
+    skip_like = np.concatenate((~starts[1:] & (gaps < SKIP_LIKE_SECONDS), [False]))
+    return sessions, starts, skip_like
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan)
+
+
+def _features(sums: dict, days) -> dict:
+    # Feature values from per-day sums, over one day (arrays) or pooled
+    return {
+        "plays_per_day": sums["plays"] / days,
+        "sessions_per_day": sums["sessions"] / days,
+        "session_minutes": _ratio(sums["minutes"], sums["sessions"]),
+        "late_night_ratio": _ratio(sums["late"], sums["plays"]),
+        "skip_like_ratio": _ratio(sums["skips"], sums["transitions"]),
+        "valence": _ratio(sums["valence"], sums["rated"]),
+    }
+
+
+def _rounded(value, digits: int = 3):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def extract(
+    ts: np.ndarray,
+    valence: np.ndarray,
+    tz_name: Optional[str],
+    now: int,
+    average_valence: float
+) -> Optional[dict]:
+    # ts: sorted epoch seconds of plays, valence: per play (NaN without audio
+    # features), now: epoch seconds. average_valence stands in when no play in
+    # the window has features. None without plays in the window
+    local = ts + utc_offsets(ts, tz_name)
+    today = local_day(now, tz_name)
+    index = local // DAY - (today - HISTORY_DAYS + 1)
+    window = (index >= 0) & (index < HISTORY_DAYS)
+    if not window.any():
+        return None
+    ts, valence, local, index = ts[window], valence[window], local[window], index[window]
+
+    sessions, starts, skip_like = sessionize(ts)
+    hours = (local % DAY) // 3600
+    late = (hours >= LATE_NIGHT_HOURS[0]) & (hours < LATE_NIGHT_HOURS[1])
+    rated = ~np.isnan(valence)
+    # Session length (first to last play start) counts on the day it starts
+    session_plays = np.bincount(sessions)
+    session_minutes = (ts[np.cumsum(session_plays) - 1] - ts[starts]) / 60.0
+    minutes = np.zeros(len(ts))
+    minutes[starts] = session_minutes
+
+    def per_day(weights):
+        return np.bincount(index, weights=weights, minlength=HISTORY_DAYS)
+
+    daily = {
+        "plays": per_day(None).astype(float),
+        "sessions": per_day(starts.astype(float)),
+        "minutes": per_day(minutes),
+        "late": per_day(late.astype(float)),
+        "skips": per_day(skip_like.astype(float)),
+        "transitions": per_day(np.concatenate((~starts[1:], [False])).astype(float)),
+        "valence": per_day(np.where(rated, valence, 0.0)),
+        "rated": per_day(rated.astype(float)),
+    }
+    recent_sums = {k: v[BASELINE_DAYS:].sum() for k, v in daily.items()}
+    recent = _features(recent_sums, RECENT_DAYS)
+
+    # Baseline: one value per day from the first baseline day with plays on
+    baseline, deviations = None, {}
+    active = np.flatnonzero(daily["plays"][:BASELINE_DAYS])
+    if len(active) >= MIN_BASELINE_DAYS:
+        per_day_values = _features({k: v[active[0]:BASELINE_DAYS] for k, v in daily.items()}, 1)
+        baseline = {}
+        for name, (min_std, _) in FEATURES.items():
+            values = per_day_values[name][~np.isnan(per_day_values[name])]
+            if len(values) < MIN_BASELINE_DAYS:
+                continue
+            mean, std = float(values.mean()), float(values.std())
+            baseline[name] = {"mean": round(mean, 3), "std": round(std, 3)}
+            if not np.isnan(recent[name]):
+                deviations[name] = round((float(recent[name]) - mean) / max(std, min_std), 2)
+
+    # Valence from the last week, else the window, else the caller's average
+    window_valence = _ratio(daily["valence"].sum(), daily["rated"].sum())
+    mood = next(
+        (float(v) for v in (recent["valence"], window_valence) if not np.isnan(v)),
+        average_valence
+    )
+    late_share = recent["late_night_ratio"]
+    if np.isnan(late_share):
+        late_share = _ratio(daily["late"].sum(), daily["plays"].sum())
+    adverse = sum(
+        min(max(FEATURES[name][1] * z, 0.0), MAX_SIGMA) for name, z in deviations.items()
+    )
+    score = (
+        100 * mood
+        - LATE_NIGHT_PENALTY * max(float(late_share) - LATE_NIGHT_ALLOWANCE, 0.0) / (1 - LATE_NIGHT_ALLOWANCE)
+        - DEVIATION_PENALTY * adverse
+    )
+
+    hourly = np.bincount(hours, minlength=24) / len(ts)
+    return {
+        "timezone": tz_name or "UTC",
+        "plays": int(len(ts)),
+        "history_days": HISTORY_DAYS,
+        "hourly_distribution": [round(float(h), 3) for h in hourly],
+        "peak_hour": int(hourly.argmax()),
+        "late_night_ratio": _rounded(_ratio(daily["late"].sum(), daily["plays"].sum())),
+        "sessions": {
+            "count": int(len(session_plays)),
+            "median_plays": float(np.median(session_plays)),
+            "median_minutes": round(float(np.median(session_minutes)), 1),
+            "skip_like_ratio": _rounded(_ratio(daily["skips"].sum(), daily["transitions"].sum())),
+        },
+        "recent": {name: _rounded(value) for name, value in recent.items()},
+        "baseline": baseline,
+        "deviations": deviations,
+        "score": round(min(max(score, 0.0), 100.0), 1),
+    }
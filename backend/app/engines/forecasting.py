@@ -0,0 +1,71 @@
+import math
+import numpy as np
+from app.engines.risk import HIGH_RISK_BELOW
+
+# Per-user ridge regression on a linear trend plus weekly seasonality, fitted
+# for a whole chunk of users with one batched solve. Daily series are short
+# and gappy (a score only exists on days with new data), which this handles
+# through per-user masks instead of imputation.
+MODEL_NAME = "ridge_trend_weekly"
+MODEL_VERSION = 1
+WEEKLY_HARMONICS = 2
+TREND_PENALTY = 5.0
+SEASONAL_PENALTY = 20.0
+MIN_RESIDUAL_STD = 3.0  # score points; keeps sparse fits from looking certain
+
+_erf = np.vectorize(math.erf, otypes=[float])
+
+
+def design_matrix(days: np.ndarray, origin_day) -> np.ndarray:
+    # Epoch day numbers and fit origins (broadcastable) -> features on a new
+    # last axis: intercept, weeks since origin, weekly harmonics
+    t = (days - origin_day).astype(float)
+    days = np.broadcast_to(days, t.shape)
+    columns = [np.ones_like(t), t / 7.0]
+    for k in range(1, WEEKLY_HARMONICS + 1):
+        angle = 2 * np.pi * k * days / 7.0
+        columns += [np.sin(angle), np.cos(angle)]
+    return np.stack(columns, axis=-1)
+
+
+def _penalty(n_params: int) -> np.ndarray:
+    # The intercept is not shrunk; trend and seasonality are
+    return np.diag([0.0, TREND_PENALTY] + [SEASONAL_PENALTY] * (n_params - 2))
+
+
+def fit_batch(series: np.ndarray, days: np.ndarray, origin_day: int) -> tuple:
+    # series: (users, len(days)) scores with NaN for days without data.
+    # Returns (coef (users, p), residual std (users,), observations (users,))
+    observed = ~np.isnan(series)
+    weights = observed.astype(float)
+    values = np.where(observed, series, 0.0)
+    X = design_matrix(days, origin_day)
+    n_params = X.shape[1]
+
+    A = np.einsum("ud,dp,dq->upq", weights, X, X) + _penalty(n_params)
+    b = np.einsum("ud,dp,ud->up", weights, X, values)
+    n = observed.sum(axis=1)
+    # Users without data get an identity system and a zero fit; callers
+    # filter them out by observation count
+    A[n == 0] = np.eye(n_params)
+    coef = np.linalg.solve(A, b[..., None])[..., 0]
+
+    residuals = np.where(observed, values - coef @ X.T, 0.0)
+    dof = np.maximum(n - n_params, 1)
+    std = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+    return coef, np.maximum(std, MIN_RESIDUAL_STD), n
+
+
+def predict(coef: np.ndarray, std: np.ndarray, origin_day: np.ndarray, days: np.ndarray) -> tuple:
+    # coef (users, p), std (users,), origin_day (users,), days (horizon,)
+    # -> (mean, std) each (users, horizon); uncertainty widens with distance
+    X = design_matrix(days[None, :], origin_day[:, None])
+    mean = np.clip(np.einsum("uhp,up->uh", X, coef), 0, 100)
+    steps = np.arange(1, len(days) + 1)
+    spread = std[:, None] * np.sqrt(1 + steps[None, :] / 7.0)
+    return mean, spread
+
+
+def high_risk_probability(mean: np.ndarray, spread: np.ndarray) -> np.ndarray:
+    # P(score < HIGH_RISK_BELOW) under a normal predictive distribution
+    return 0.5 * (1 + _erf((HIGH_RISK_BELOW - mean) / (spread * math.sqrt(2))))
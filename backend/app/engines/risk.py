@@ -0,0 +1,14 @@
+from typing import Optional
+
+# Wellness score thresholds shared by analyses, alerts and forecasts
+HIGH_RISK_BELOW = 35.0
+MODERATE_RISK_BELOW = 50.0
+
+def risk_level(score: Optional[float]) -> Optional[str]:
+    if score is None:
+        return None
+    if score < HIGH_RISK_BELOW:
+        return "high"
+    if score < MODERATE_RISK_BELOW:
+        return "moderate"
+    return "low"
@@ -0,0 +1,57 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.batch import BatchJob
+from app.services.batch_analysis import SOURCES, claim_job, create_job, run_batch_job
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored data for many users and write analyses")
+    parser.add_argument("--users", nargs="+", help="user ids to re-score")
+    parser.add_argument("--users-file", help="file with one user id per line")
+    parser.add_argument("--connected", nargs="+", choices=SOURCES, help="every user with stored data for these sources")
+    parser.add_argument("--created-after", help="ISO date filter on user sign-up")
+    parser.add_argument("--created-before", help="ISO date filter on user sign-up")
+    parser.add_argument("--sources", nargs="+", choices=SOURCES, default=list(SOURCES))
+    parser.add_argument("--resume", metavar="JOB_ID", help="continue a failed or interrupted job from its checkpoint")
+    parser.add_argument("--workers", type=int, default=settings.BATCH_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=settings.BATCH_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.resume:
+            job = db.get(BatchJob, args.resume)
+            if job is None:
+                parser.error(f"no batch job {args.resume}")
+            if not claim_job(db, job.id):
+                parser.error(f"batch job {job.id} is {job.status}; running jobs resume once stale")
+            db.refresh(job)
+            print(f"Resuming batch {job.id} after user {job.cursor} ({job.processed}/{job.total} done)")
+        else:
+            user_ids = list(args.users or [])
+            if args.users_file:
+                with open(args.users_file) as f:
+                    user_ids += [line.strip() for line in f if line.strip()]
+            filters = {
+                key: value for key, value in (
+                    ("connected", args.connected),
+                    ("created_after", args.created_after),
+                    ("created_before", args.created_before),
+                ) if value
+            }
+            try:
+                job = create_job(db, user_ids or None, filters or None, args.sources)
+            except ValueError as e:
+                parser.error(str(e))
+            claim_job(db, job.id)
+            print(f"Started batch {job.id}; resume with --resume {job.id}")
+
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            job = run_batch_job(db, job, executor, args.chunk_size, max_in_flight=args.workers + 1)
+        print(f"Batch {job.id} {job.status}: {job.written} analyses for {job.processed} users")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
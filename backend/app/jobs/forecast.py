@@ -0,0 +1,27 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.forecast_service import run_forecasts
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit wellness forecasts and write predictions for all users")
+    parser.add_argument("--workers", type=int, default=settings.BATCH_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=settings.FORECAST_CHUNK_SIZE)
+    parser.add_argument("--today", type=date.fromisoformat, help="run as of this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            stats = run_forecasts(db, executor, args.workers, args.chunk_size, args.today)
+        print(
+            f"Done in {stats['seconds']}s: {stats['forecasts']} forecasts for "
+            f"{stats['users']} users, {stats['refits']} models refitted"
+        )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import argparse
+from app.core.database import engine
+from app.services.retention import ensure_partitions, drop_expired_partitions
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions and drop expired ones")
+    parser.add_argument("--dry-run", action="store_true", help="list expired partitions without dropping them")
+    args = parser.parse_args()
+
+    created = ensure_partitions(engine)
+    print(f"Partitions present: {', '.join(created) or 'none (not PostgreSQL)'}")
+
+    dropped = drop_expired_partitions(engine, dry_run=args.dry_run)
+    action = "Would drop" if args.dry_run else "Dropped"
+    print(f"{action} {len(dropped)} expired partitions: {', '.join(dropped) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,38 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
 from app.core.database import engine, Base
 
 # Import all models so relationships are properly set up
 from app.models.user import User
 from app.models.analysis import Analysis, ChatMessage, RawData
+from app.models.listening import SpotifySyncState
+from app.models.events import MediaItem, UserEvent
+from app.models.youtube import YouTubeHistoryState
+from app.models.batch import BatchJob
+from app.models.forecast import ForecastModel
+from app.models.dashboard import DashboardSummary
 
 from app.api import auth, users, connectors, analysis
-from app.api import chat
+from app.api import chat, alerts, admin, dashboard
+from app.services.retention import ensure_partitions
+from app.services.alerts import hub as alert_hub
+from app.core.workers import shutdown_process_pool
+from app.core.preload import preload_shared_state
+from app.core.profiling import ProfilingMiddleware
 
 # Create all database tables
 Base.metadata.create_all(bind=engine)
+ensure_partitions(engine)
+preload_shared_state()
 
-app = FastAPI(title="MindWatch API", version="1.0.0")
+app = FastAPI(
+    title="MindWatch API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
 
 # CORS
 app.add_middleware(
@@ -24,12 +43,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger bodies only; small ones are not worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
+# Opt-in request profiling, outermost so it sees the whole stack
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(connectors.router, prefix="/api/connectors", tags=["Connectors"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["Analysis"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chatbot"])
+app.include_router(alerts.router, prefix="/api/alerts", tags=["Alerts"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+
+@app.on_event("shutdown")
+async def shutdown():
+    await alert_hub.close()
+    shutdown_process_pool()
 
 @app.get("/")
 def root():
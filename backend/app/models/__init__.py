@@ -1,2 +1,8 @@
 from app.models.user import User
-from app.models.analysis import Analysis, ChatMessage, RawData
\ No newline at end of file
+from app.models.analysis import Analysis, ChatMessage, RawData
+from app.models.listening import SpotifySyncState
+from app.models.events import MediaItem, UserEvent
+from app.models.youtube import YouTubeHistoryState
+from app.models.batch import BatchJob
+from app.models.forecast import ForecastModel
+from app.models.dashboard import DashboardSummary
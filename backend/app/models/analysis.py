@@ -1,15 +1,23 @@
-from sqlalchemy import Column, String, Float, DateTime, JSON, ForeignKey, Text, Integer
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, Integer, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
-from app.core.database import Base
+from datetime import datetime, timezone
+from app.core.database import Base, JSONType
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+# analyses and raw_data are RANGE partitioned by month on created_at, which
+# therefore has to be part of the primary key (see alembic revision 0003)
+PARTITION_BY_MONTH = {"postgresql_partition_by": "RANGE (created_at)"}
 
 class Analysis(Base):
     __tablename__ = "analyses"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=_utcnow, server_default=func.now())
     analysis_date = Column(DateTime(timezone=True), nullable=False)
 
     # Scores
@@ -20,16 +28,27 @@ class Analysis(Base):
     risk_level = Column(String, nullable=True)
 
     # Detailed Results
-    linguistic_details = Column(JSON, nullable=True)
-    consumption_details = Column(JSON, nullable=True)
-    behavioral_details = Column(JSON, nullable=True)
-    predictions = Column(JSON, nullable=True)
-    insights = Column(JSON, nullable=True)
-    warnings = Column(JSON, nullable=True)
+    linguistic_details = Column(JSONType, nullable=True)
+    consumption_details = Column(JSONType, nullable=True)
+    behavioral_details = Column(JSONType, nullable=True)
+    predictions = Column(JSONType, nullable=True)
+    insights = Column(JSONType, nullable=True)
+    warnings = Column(JSONType, nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="analyses")
 
+    __table_args__ = (
+        Index("ix_analyses_user_id_analysis_date", user_id, analysis_date.desc()),
+        Index("ix_analyses_user_id_created_at", user_id, created_at.desc()),
+        Index(
+            "ix_analyses_warnings", warnings,
+            postgresql_using="gin",
+            postgresql_ops={"warnings": "jsonb_path_ops"},
+        ),
+        PARTITION_BY_MONTH,
+    )
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
@@ -41,6 +60,10 @@ class ChatMessage(Base):
 
     user = relationship("User", back_populates="chat_messages")
 
+    __table_args__ = (
+        Index("ix_chat_messages_user_id_created_at", user_id, created_at.desc()),
+    )
+
 class RawData(Base):
     __tablename__ = "raw_data"
 
@@ -48,6 +71,16 @@ class RawData(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     source = Column(String, nullable=False)
     data_type = Column(String, nullable=False)
-    raw_content = Column(JSON, nullable=True)
+    raw_content = Column(JSONType, nullable=True)
     processed = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=_utcnow, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_raw_data_user_id_source_created_at", user_id, source, created_at.desc()),
+        Index(
+            "ix_raw_data_unprocessed", created_at,
+            postgresql_where=text("processed = 0"),
+            sqlite_where=text("processed = 0"),
+        ),
+        PARTITION_BY_MONTH,
+    )
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base, JSONType
+
+class BatchJob(Base):
+    # Admin batch re-scoring run; cursor is the last user id written, so a
+    # crashed run resumes with the next one
+    __tablename__ = "batch_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = Column(String, nullable=False, default="analysis")
+    status = Column(String, nullable=False, default="pending")  # pending, running, completed, failed
+
+    # Selection: explicit user ids or a filter, plus the sources to re-score
+    user_ids = Column(JSONType, nullable=True)
+    filters = Column(JSONType, nullable=True)
+    sources = Column(JSONType, nullable=False)
+
+    cursor = Column(String, nullable=True)
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, default=0, nullable=False)
+    written = Column(Integer, default=0, nullable=False)
+    users_per_second = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
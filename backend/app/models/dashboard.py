@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base, JSONType
+
+class DashboardSummary(Base):
+    # Everything the dashboard shows, materialized per user and rebuilt on
+    # writes, so a dashboard load is one primary-key read
+    __tablename__ = "dashboard_summaries"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)  # bumped on every rebuild
+    payload = Column(JSONType, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, String, ForeignKey, Integer, BigInteger, SmallInteger, REAL, Index, UniqueConstraint, text
+from app.core.database import Base
+
+# Event sources, stored as small ints in user_events.source
+SOURCE_SPOTIFY = 1
+SOURCE_YOUTUBE = 2
+
+class MediaItem(Base):
+    # Interned track / video IDs so events carry a 4-byte int instead of a string
+    __tablename__ = "media_items"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(SmallInteger, nullable=False)
+    external_id = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("source", "external_id", name="uq_media_items_source_external_id"),
+    )
+
+class UserEvent(Base):
+    # One narrow row per play / view, read back as NumPy columns by EventStore
+    __tablename__ = "user_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    source = Column(SmallInteger, nullable=False)
+    ts = Column(BigInteger, nullable=False)  # epoch seconds, UTC
+    item_id = Column(Integer, ForeignKey("media_items.id"), nullable=True)
+    category = Column(SmallInteger, nullable=True)
+
+    # float32 feature columns
+    valence = Column(REAL, nullable=True)
+    energy = Column(REAL, nullable=True)
+
+    __table_args__ = (
+        Index("ix_user_events_user_source_ts", "user_id", "source", "ts"),
+        # A Spotify track plays at most once per user and second (ts is
+        # truncated, so different tracks may share one); guards the running
+        # aggregates against double-applied syncs
+        Index(
+            "uq_user_events_spotify_play", "user_id", "ts", "item_id",
+            unique=True,
+            postgresql_where=text(f"source = {SOURCE_SPOTIFY}"),
+            sqlite_where=text(f"source = {SOURCE_SPOTIFY}"),
+        ),
+    )
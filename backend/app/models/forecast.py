@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base, JSONType
+
+class ForecastModel(Base):
+    # Cached per-user forecast fit; predictions are regenerated from it until
+    # enough new data arrives to refit
+    __tablename__ = "forecast_models"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    model = Column(String, nullable=False)
+    model_version = Column(Integer, nullable=False)
+
+    coef = Column(JSONType, nullable=False)
+    residual_std = Column(Float, nullable=False)
+    origin_day = Column(Integer, nullable=False)  # epoch day of t = 0
+    observations = Column(Integer, nullable=False)
+    last_observed_day = Column(Integer, nullable=False)
+
+    fitted_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
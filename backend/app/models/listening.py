@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Float, DateTime, JSON, ForeignKey, Integer, BigInteger
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class SpotifySyncState(Base):
+    __tablename__ = "spotify_sync_state"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    cursor = Column(BigInteger, nullable=True)  # newest played_at, epoch ms
+
+    # Running aggregates over the whole listening log
+    total_plays = Column(Integer, default=0, nullable=False)
+    late_night_plays = Column(Integer, default=0, nullable=False)
+    features_count = Column(Integer, default=0, nullable=False)
+    valence_sum = Column(Float, default=0.0, nullable=False)
+    energy_sum = Column(Float, default=0.0, nullable=False)
+    tempo_sum = Column(Float, default=0.0, nullable=False)
+    danceability_sum = Column(Float, default=0.0, nullable=False)
+
+    # {"YYYY-MM-DD": [plays, late_night_plays, valence_sum, features_count]}
+    daily_series = Column(JSON, nullable=True)
+    recent_items = Column(JSON, nullable=True)
+    recorded_version = Column(String, nullable=True)  # analysis_version of the last Analysis row
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -13,6 +13,7 @@ class User(Base):
     picture = Column(String, nullable=True)
     google_id = Column(String, unique=True, nullable=False)
     is_active = Column(Boolean, default=True)
+    timezone = Column(String, nullable=True)  # IANA name for local-time features; NULL means UTC
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.core.database import Base, JSONType
+
+class YouTubeHistoryState(Base):
+    # Merged Takeout aggregates per user, plus fingerprints of what was processed
+    __tablename__ = "youtube_history_state"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    upload_hash = Column(String, nullable=True)  # sha256 of the last upload pair
+
+    # Sorted int64 entry digests, stored as raw bytes
+    watch_digests = Column(LargeBinary, nullable=True)
+    search_digests = Column(LargeBinary, nullable=True)
+
+    taxonomy_version = Column(String, nullable=True)  # taxonomy the aggregates were classified with
+    aggregates = Column(JSONType, nullable=True)
+    result = Column(JSONType, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
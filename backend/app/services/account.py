@@ -0,0 +1,52 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import admission
+from app.core.config import settings
+from app.models.user import User
+from app.services import analysis_cache
+
+# Tables holding per-user rows and the key used to batch their deletes,
+# emptied before the user row itself
+USER_OWNED_TABLES = {
+    "user_events": "id",
+    "analyses": "id",
+    "chat_messages": "id",
+    "raw_data": "id",
+    "spotify_sync_state": "user_id",
+    "youtube_history_state": "user_id",
+    "forecast_models": "user_id",
+    "dashboard_summaries": "user_id",
+}
+
+def _delete_in_batches(db: Session, table: str, user_id: str, batch_size: int) -> int:
+    # Short transactions keep lock time and WAL bursts bounded on large tables
+    key = USER_OWNED_TABLES[table]
+    statement = text(f"""
+        DELETE FROM {table}
+        WHERE {key} IN (
+            SELECT {key} FROM {table} WHERE user_id = :user_id LIMIT :batch_size
+        )
+    """)
+    total = 0
+    while True:
+        deleted = db.execute(statement, {"user_id": user_id, "batch_size": batch_size}).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+async def delete_user(db: Session, user: User, batch_size: int = None) -> dict:
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    user_id = user.id
+    deleted = {
+        table: _delete_in_batches(db, table, user_id, batch_size)
+        for table in USER_OWNED_TABLES
+    }
+    db.delete(user)
+    db.commit()
+
+    # Redis copies go once the rows are gone, so nothing can refill them
+    await analysis_cache.invalidate("spotify", user_id)
+    await analysis_cache.release_refresh_lock("spotify", user_id)
+    await admission.forget_user(user_id)
+    return deleted
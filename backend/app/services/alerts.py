@@ -0,0 +1,141 @@
+import asyncio
+import json
+import statistics
+from typing import Optional
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.analysis import Analysis
+
+ALERT_STREAM = "alerts:stream"
+ALERT_CHANNEL_PREFIX = "alerts:user:"
+RISK_ORDER = {"low": 0, "moderate": 1, "high": 2}
+
+def _baseline_scores(db: Session, analysis: Analysis) -> list:
+    rows = (
+        db.query(Analysis.overall_wellness_score)
+        .filter(
+            Analysis.user_id == analysis.user_id,
+            Analysis.id != analysis.id,
+            Analysis.overall_wellness_score.isnot(None),
+        )
+        .order_by(Analysis.analysis_date.desc())
+        .limit(settings.ALERT_BASELINE_WINDOW)
+        .all()
+    )
+    return [score for (score,) in rows]
+
+def evaluate(db: Session, analysis: Analysis, previous: Optional[Analysis]) -> list:
+    alerts = []
+    score = analysis.overall_wellness_score
+
+    if score is not None and score < settings.ALERT_SCORE_FLOOR:
+        alerts.append({
+            "kind": "low_wellness",
+            "message": f"Wellness score dropped to {score}/100.",
+        })
+
+    baseline = _baseline_scores(db, analysis)
+    if score is not None and len(baseline) >= settings.ALERT_MIN_BASELINE:
+        mean = statistics.fmean(baseline)
+        spread = statistics.pstdev(baseline)
+        drop = mean - score
+        # A drop must be large in absolute terms and unusual for this user
+        if drop >= max(settings.ALERT_DROP_POINTS, settings.ALERT_DROP_SIGMA * spread):
+            alerts.append({
+                "kind": "wellness_drop",
+                "message": f"Wellness score {score} is {round(drop, 1)} points below the recent average of {round(mean, 1)}.",
+                "baseline_mean": round(mean, 1),
+                "baseline_std": round(spread, 1),
+            })
+
+    previous_risk = RISK_ORDER.get(previous.risk_level if previous else None, 0)
+    if RISK_ORDER.get(analysis.risk_level, 0) > previous_risk:
+        alerts.append({
+            "kind": "risk_escalation",
+            "message": f"Risk level rose to {analysis.risk_level}.",
+        })
+
+    seen = {w.get("message") for w in (previous.warnings or [])} if previous else set()
+    for warning in analysis.warnings or []:
+        if warning.get("message") not in seen:
+            alerts.append({"kind": "new_warning", "message": warning.get("message")})
+
+    return alerts
+
+async def publish(user_id: str, analysis_id: str, alerts: list):
+    redis = get_redis()
+    for alert in alerts:
+        payload = json.dumps({
+            "type": "alert",
+            "user_id": user_id,
+            "analysis_id": analysis_id,
+            **alert,
+        })
+        try:
+            await redis.xadd(
+                ALERT_STREAM, {"payload": payload},
+                maxlen=settings.ALERT_STREAM_MAXLEN, approximate=True
+            )
+            await redis.publish(f"{ALERT_CHANNEL_PREFIX}{user_id}", payload)
+        except RedisError as e:
+            print(f"Alert publish error: {e}")
+
+async def check_and_publish(db: Session, analysis: Analysis, previous: Optional[Analysis]) -> list:
+    alerts = evaluate(db, analysis, previous)
+    if alerts:
+        await publish(analysis.user_id, analysis.id, alerts)
+    return alerts
+
+class AlertHub:
+    # One Redis subscription per process fans alerts out to local WebSockets
+
+    def __init__(self):
+        self.connections = {}
+        self._listener = None
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.ALERT_QUEUE_SIZE)
+        self.connections.setdefault(user_id, set()).add(queue)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self.connections.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.connections[user_id]
+
+    def dispatch(self, user_id: str, payload: str):
+        for queue in self.connections.get(user_id, ()):
+            # Slow clients lose their oldest alerts instead of growing memory
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def _listen(self):
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.psubscribe(f"{ALERT_CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    user_id = message["channel"][len(ALERT_CHANNEL_PREFIX):]
+                    self.dispatch(user_id, message["data"])
+            except RedisError as e:
+                print(f"Alert listener error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+hub = AlertHub()
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional
+import orjson
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis import get_redis
+
+REFRESH_LOCK_SECONDS = 60
+REFRESH_POLL_SECONDS = 0.2
+
+def _key(source: str, user_id: str) -> str:
+    return f"analysis:{source}:{user_id}"
+
+def _lock_key(source: str, user_id: str) -> str:
+    return f"{_key(source, user_id)}:refreshing"
+
+def make_etag(user_id: str, version: str) -> str:
+    digest = hashlib.sha1(f"{user_id}:{version}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak and strong validators compare equal for GET requests
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+def is_fresh(entry: dict) -> bool:
+    return time.time() - entry["fetched_at"] < settings.ANALYSIS_FRESHNESS_SECONDS
+
+async def get_cached(source: str, user_id: str) -> Optional[dict]:
+    try:
+        raw = await get_redis().get(_key(source, user_id))
+    except RedisError as e:
+        print(f"Analysis cache read error: {e}")
+        return None
+    return orjson.loads(raw) if raw else None
+
+async def store(source: str, user_id: str, version: str, result: dict) -> dict:
+    entry = {
+        "version": version,
+        "etag": make_etag(user_id, version),
+        "fetched_at": time.time(),
+        "result": result,
+    }
+    try:
+        await get_redis().set(
+            _key(source, user_id),
+            orjson.dumps(entry),
+            ex=settings.ANALYSIS_CACHE_TTL_SECONDS
+        )
+    except RedisError as e:
+        print(f"Analysis cache write error: {e}")
+    return entry
+
+async def invalidate(source: str, user_id: str):
+    try:
+        await get_redis().delete(_key(source, user_id))
+    except RedisError as e:
+        print(f"Analysis cache invalidate error: {e}")
+
+async def acquire_refresh_lock(source: str, user_id: str) -> bool:
+    # Only one request per user refreshes at a time
+    try:
+        return bool(await get_redis().set(
+            _lock_key(source, user_id), "1",
+            nx=True, ex=REFRESH_LOCK_SECONDS
+        ))
+    except RedisError as e:
+        print(f"Analysis cache lock error: {e}")
+        return False
+
+async def wait_for_refresh(source: str, user_id: str) -> Optional[dict]:
+    # Polls while another request holds the refresh lock. Returns the entry
+    # it stored, or None once the lock is gone without one (or Redis is)
+    while True:
+        entry = await get_cached(source, user_id)
+        if entry:
+            return entry
+        try:
+            if not await get_redis().exists(_lock_key(source, user_id)):
+                return None
+        except RedisError as e:
+            print(f"Analysis cache lock error: {e}")
+            return None
+        await asyncio.sleep(REFRESH_POLL_SECONDS)
+
+async def release_refresh_lock(source: str, user_id: str):
+    try:
+        await get_redis().delete(_lock_key(source, user_id))
+    except RedisError:
+        pass
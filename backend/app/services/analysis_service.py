@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.engines.risk import risk_level
+from app.models.analysis import Analysis
+from app.services import alerts
+from app.services.dashboard import rebuild_summaries
+from app.services.forecast_service import cached_predictions
+
+LATE_NIGHT_WARNING_RATIO = 0.3
+SKIP_WARNING_SIGMA = 2.0
+
+def latest_analysis(db: Session, user_id: str) -> Optional[Analysis]:
+    return (
+        db.query(Analysis)
+        .filter(Analysis.user_id == user_id)
+        .order_by(Analysis.analysis_date.desc())
+        .first()
+    )
+
+def _spotify_columns(result: dict) -> dict:
+    details = {k: v for k, v in result.items() if k != "recently_played"}
+    # The behavioral engine works in the user's local time; results without
+    # stored plays fall back to valence and UTC hours
+    behavior = result.get("behavior")
+    late_night_ratio = behavior["late_night_ratio"] if behavior else result.get("late_night_listening_ratio", 0)
+    warnings = []
+    if late_night_ratio > LATE_NIGHT_WARNING_RATIO:
+        warnings.append({
+            "type": "warning",
+            "message": f"🌙 {round(late_night_ratio * 100)}% of your listening happens between midnight and 5am."
+        })
+    if behavior and behavior["deviations"].get("skip_like_ratio", 0) >= SKIP_WARNING_SIGMA:
+        warnings.append({
+            "type": "warning",
+            "message": "⏭️ You've been skipping through tracks much more than usual this week."
+        })
+    return {
+        "behavioral_score": behavior["score"] if behavior else round(result.get("avg_valence", 0) * 100, 1),
+        "behavioral_details": details,
+        "insights": warnings,
+    }
+
+def _youtube_columns(result: dict) -> dict:
+    return {
+        "consumption_score": result.get("emotional_diet_score"),
+        "consumption_details": result,
+        "insights": result.get("insights", []),
+    }
+
+SOURCE_COLUMNS = {"spotify": _spotify_columns, "youtube": _youtube_columns}
+
+# Columns carried forward from the previous analysis so each row is a full snapshot
+CARRIED_COLUMNS = (
+    "linguistic_score", "consumption_score", "behavioral_score",
+    "linguistic_details", "consumption_details", "behavioral_details",
+    "insights",
+)
+
+def carried_columns(previous: Optional[Analysis]) -> dict:
+    return {c: getattr(previous, c) for c in CARRIED_COLUMNS} if previous else {}
+
+def snapshot_columns(carried: dict, results: dict) -> dict:
+    # carried: CARRIED_COLUMNS of the previous analysis; results: {source: result}
+    columns = {c: carried.get(c) for c in CARRIED_COLUMNS}
+    # Insights are tagged with their source; sources not in results keep
+    # theirs. Untagged ones predate tagging and are dropped
+    by_source = {source: [] for source in SOURCE_COLUMNS}
+    for insight in carried.get("insights") or []:
+        if insight.get("source") in by_source:
+            by_source[insight["source"]].append(insight)
+    for source, result in results.items():
+        source_columns = SOURCE_COLUMNS[source](result)
+        by_source[source] = [{**i, "source": source} for i in source_columns.pop("insights") or []]
+        columns.update(source_columns)
+    insights = [i for source_insights in by_source.values() for i in source_insights]
+
+    scores = [
+        columns[c] for c in ("linguistic_score", "consumption_score", "behavioral_score")
+        if columns[c] is not None
+    ]
+    columns["overall_wellness_score"] = round(sum(scores) / len(scores), 1) if scores else None
+    columns["risk_level"] = risk_level(columns["overall_wellness_score"])
+    columns["insights"] = insights
+    columns["warnings"] = [i for i in insights if i.get("type") == "warning"]
+    return columns
+
+async def record_analysis(db: Session, user_id: str, source: str, result: dict) -> Analysis:
+    previous = latest_analysis(db, user_id)
+    analysis = Analysis(
+        user_id=user_id,
+        analysis_date=datetime.now(timezone.utc),
+        predictions=cached_predictions(db, user_id),
+        **snapshot_columns(carried_columns(previous), {source: result})
+    )
+
+    db.add(analysis)
+    db.flush()
+    rebuild_summaries(db, [user_id])
+    db.commit()
+    db.refresh(analysis)
+
+    await alerts.check_and_publish(db, analysis, previous)
+    return analysis
@@ -0,0 +1,302 @@
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Executor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.orm import Session, load_only
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.connectors.taxonomy import current_taxonomy
+from app.connectors.youtube import AnalysisAccumulator, YouTubeAnalyzer
+from app.models.analysis import Analysis
+from app.models.batch import BatchJob
+from app.models.events import SOURCE_SPOTIFY
+from app.models.listening import SpotifySyncState
+from app.models.user import User
+from app.models.youtube import YouTubeHistoryState
+from app.services.analysis_service import CARRIED_COLUMNS, snapshot_columns
+from app.services.dashboard import rebuild_summaries
+from app.services.event_store import EventStore
+from app.services.spotify_sync import add_behavior, behavior_window_start, build_analysis
+
+SOURCES = ("spotify", "youtube")
+SOURCE_STATE = {"spotify": SpotifySyncState, "youtube": YouTubeHistoryState}
+FILTERS = ("connected", "created_after", "created_before")
+
+# Analysis ids are uuid5(job, user), so re-running a chunk rewrites its rows
+BATCH_NAMESPACE = uuid.UUID("2a40c2d4-5aa0-485c-afec-b350fcf76ce6")
+
+# recent_items only feeds the response, not the scores
+SPOTIFY_STATE_COLUMNS = [
+    c.name for c in SpotifySyncState.__table__.columns
+    if c.name not in ("recent_items", "updated_at")
+]
+
+def validate_selection(user_ids: Optional[list], filters: Optional[dict], sources: list):
+    filters = filters or {}
+    unknown_sources = (set(sources) | set(filters.get("connected") or [])) - set(SOURCES)
+    if unknown_sources:
+        raise ValueError(f"Unknown sources: {', '.join(sorted(unknown_sources))}")
+    unknown_filters = set(filters) - set(FILTERS)
+    if unknown_filters:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown_filters))}")
+    if not sources:
+        raise ValueError("At least one source is required")
+    if "connected" in filters and not filters["connected"]:
+        raise ValueError("connected needs at least one source")
+    for name in ("created_after", "created_before"):
+        if name in filters:
+            try:
+                datetime.fromisoformat(filters[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be an ISO date, got {filters[name]!r}")
+    if not user_ids and not filters:
+        raise ValueError("Give user ids or a filter (use {\"connected\": [...]} for everyone with data)")
+
+def _selection(job: BatchJob):
+    query = select(User.id)
+    if job.user_ids:
+        query = query.where(User.id.in_(job.user_ids))
+    filters = job.filters or {}
+    for source in filters.get("connected") or []:
+        state = SOURCE_STATE[source]
+        query = query.where(exists().where(state.user_id == User.id))
+    if filters.get("created_after"):
+        query = query.where(User.created_at >= datetime.fromisoformat(filters["created_after"]))
+    if filters.get("created_before"):
+        query = query.where(User.created_at < datetime.fromisoformat(filters["created_before"]))
+    return query
+
+def count_users(db: Session, job: BatchJob) -> int:
+    return db.scalar(select(func.count()).select_from(_selection(job).subquery()))
+
+def next_user_ids(db: Session, job: BatchJob, after: Optional[str], limit: int) -> list:
+    # Users are walked in id order, which makes the last id a resumable cursor
+    query = _selection(job).order_by(User.id).limit(limit)
+    if after is not None:
+        query = query.where(User.id > after)
+    return list(db.scalars(query))
+
+def load_chunk(db: Session, user_ids: list, sources: list, now: int) -> list:
+    # Stored per-user aggregates, Spotify plays for the behavioral features
+    # and the columns carried from each user's latest analysis, as plain data
+    # for the worker pool
+    spotify, youtube, plays, timezones = {}, {}, {}, {}
+    if "spotify" in sources:
+        rows = db.execute(
+            select(*[SpotifySyncState.__table__.c[c] for c in SPOTIFY_STATE_COLUMNS])
+            .where(SpotifySyncState.user_id.in_(user_ids))
+        )
+        spotify = {row.user_id: dict(row._mapping) for row in rows}
+        if spotify:
+            events = EventStore(db).load_many(list(spotify), SOURCE_SPOTIFY, start=behavior_window_start(now))
+            plays = {user_id: {"ts": e["ts"], "valence": e["valence"]} for user_id, e in events.items()}
+            timezones = dict(db.execute(select(User.id, User.timezone).where(User.id.in_(list(spotify)))).all())
+    if "youtube" in sources:
+        rows = db.execute(
+            select(YouTubeHistoryState.user_id, YouTubeHistoryState.aggregates)
+            .where(YouTubeHistoryState.user_id.in_(user_ids))
+        )
+        youtube = {user_id: aggregates for user_id, aggregates in rows if aggregates}
+
+    latest = (
+        select(Analysis.user_id, func.max(Analysis.analysis_date).label("analysis_date"))
+        .where(Analysis.user_id.in_(user_ids))
+        .group_by(Analysis.user_id)
+        .subquery()
+    )
+    previous = (
+        db.query(Analysis)
+        .options(load_only(Analysis.user_id, *[getattr(Analysis, c) for c in CARRIED_COLUMNS]))
+        .join(latest, and_(
+            Analysis.user_id == latest.c.user_id,
+            Analysis.analysis_date == latest.c.analysis_date,
+        ))
+    )
+    carried = {a.user_id: {c: getattr(a, c) for c in CARRIED_COLUMNS} for a in previous}
+
+    return [
+        {
+            "user_id": user_id,
+            "carried": carried.get(user_id, {}),
+            "spotify": spotify.get(user_id),
+            "plays": plays.get(user_id),
+            "timezone": timezones.get(user_id),
+            "youtube": youtube.get(user_id),
+        }
+        for user_id in user_ids
+    ]
+
+def rescore_youtube(aggregates: dict, analyzer: YouTubeAnalyzer) -> Optional[dict]:
+    # Aggregates from an older taxonomy are re-weighted with the current
+    # sentiments; re-classifying titles needs a new upload
+    acc = AnalysisAccumulator.from_state(aggregates, analyzer.taxonomy)
+    result = analyzer.summarize(acc)
+    return None if "error" in result else result
+
+def score_chunk(payloads: list, now: int) -> list:
+    # Runs in the worker pool; pure computation on plain data
+    analyzer = YouTubeAnalyzer(current_taxonomy())
+    rows = []
+    for payload in payloads:
+        results = {}
+        if payload["spotify"]:
+            state = SpotifySyncState(**payload["spotify"])
+            results["spotify"] = add_behavior(build_analysis(state), payload["plays"], payload["timezone"], now)
+        if payload["youtube"]:
+            youtube = rescore_youtube(payload["youtube"], analyzer)
+            if youtube:
+                results["youtube"] = youtube
+        if results:
+            rows.append({"user_id": payload["user_id"], **snapshot_columns(payload["carried"], results)})
+    return rows
+
+def write_rows(db: Session, job: BatchJob, rows: list):
+    if not rows:
+        return
+    table = Analysis.__table__
+    insert = dialect_insert(db.get_bind())(table)
+    updated = [c.name for c in table.columns if c.name not in ("id", "created_at", "user_id")]
+    statement = insert.on_conflict_do_update(
+        index_elements=["id", "created_at"],
+        set_={name: insert.excluded[name] for name in updated},
+    )
+    db.execute(statement, [
+        {
+            "id": str(uuid.uuid5(BATCH_NAMESPACE, f"{job.id}:{row['user_id']}")),
+            "created_at": job.started_at,
+            "analysis_date": job.started_at,
+            "predictions": None,
+            **row,
+        }
+        for row in rows
+    ])
+
+def _report(job: BatchJob, rate: float):
+    remaining = (job.total or 0) - job.processed
+    eta = f"{remaining / rate:.0f}s" if rate else "-"
+    print(
+        f"Batch {job.id}: {job.processed}/{job.total} users, "
+        f"{job.written} analyses written, {rate:.1f} users/s, ETA {eta}"
+    )
+
+def claim_job(db: Session, job_id: str) -> bool:
+    # Marks the job running unless another runner has it. A running job whose
+    # last checkpoint is older than BATCH_STALE_SECONDS is taken over (its
+    # process crashed); one UPDATE, so two claims cannot both win
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.BATCH_STALE_SECONDS)
+    claimed = db.execute(
+        update(BatchJob)
+        .where(
+            BatchJob.id == job_id,
+            or_(
+                BatchJob.status.in_(("pending", "failed")),
+                and_(BatchJob.status == "running", BatchJob.updated_at < stale),
+            ),
+        )
+        .values(status="running", error=None, updated_at=func.now())
+        .returning(BatchJob.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    return claimed is not None
+
+def run_batch_job(
+    db: Session,
+    job: BatchJob,
+    executor: Executor,
+    chunk_size: int = None,
+    max_in_flight: int = None
+) -> BatchJob:
+    # Scores chunks in the pool while the next ones load; results are written
+    # in order, each together with its checkpoint, so a crash loses at most
+    # the chunks in flight. The caller claims the job first
+    chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+    # By default one chunk queued per worker, plus one
+    max_in_flight = max_in_flight or settings.BATCH_WORKERS + 1
+    in_flight = deque()
+    try:
+        job.status = "running"
+        job.error = None
+        job.started_at = job.started_at or datetime.now(timezone.utc)
+        if job.total is None:
+            job.total = count_users(db, job)
+        db.commit()
+
+        # Behavioral windows end at the job start, so resumed chunks match
+        now = int(job.started_at.replace(tzinfo=job.started_at.tzinfo or timezone.utc).timestamp())
+        started = time.monotonic()
+        processed_at_start = job.processed
+        read_cursor = job.cursor
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight:
+                user_ids = next_user_ids(db, job, read_cursor, chunk_size)
+                if not user_ids:
+                    exhausted = True
+                    break
+                payloads = load_chunk(db, user_ids, job.sources, now)
+                in_flight.append((user_ids, executor.submit(score_chunk, payloads, now)))
+                read_cursor = user_ids[-1]
+            if not in_flight:
+                break
+
+            user_ids, future = in_flight.popleft()
+            rows = future.result()
+            write_rows(db, job, rows)
+            rebuild_summaries(db, [row["user_id"] for row in rows])
+            job.cursor = user_ids[-1]
+            job.processed += len(user_ids)
+            job.written += len(rows)
+            elapsed = time.monotonic() - started
+            job.users_per_second = round((job.processed - processed_at_start) / elapsed, 1) if elapsed else None
+            db.commit()
+            _report(job, job.users_per_second or 0)
+
+        job.status = "completed"
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        for _, future in in_flight:
+            future.cancel()
+        job.status = "failed"
+        job.error = str(e)
+        db.commit()
+        raise
+    return job
+
+def mark_failed(db: Session, job_id: str, error: str):
+    # For failures the run itself could not record, e.g. a lost connection
+    db.execute(
+        update(BatchJob)
+        .where(BatchJob.id == job_id, BatchJob.status == "running")
+        .values(status="failed", error=error)
+    )
+    db.commit()
+
+def create_job(db: Session, user_ids: Optional[list], filters: Optional[dict], sources: list) -> BatchJob:
+    validate_selection(user_ids, filters, sources)
+    job = BatchJob(kind="analysis", user_ids=user_ids, filters=filters, sources=sources)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def job_summary(job: BatchJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "sources": job.sources,
+        "total": job.total,
+        "processed": job.processed,
+        "written": job.written,
+        "users_per_second": job.users_per_second,
+        "cursor": job.cursor,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+import time
+import orjson
 from google import genai
 from google.genai import types
+from app.core import metrics
 from app.core.config import settings
 
 SYSTEM_PROMPT = """You are MindWatch AI, a compassionate and insightful mental wellness assistant.
@@ -22,10 +27,93 @@ Keep responses concise (2-4 paragraphs max), warm, and actionable.
 Always reference their actual data when giving insights.
 """
 
+def request_key(contents: list) -> str:
+    # Identical prompts (same history, data and message) share one upstream call
+    body = orjson.dumps(
+        [c.model_dump(mode="json", exclude_none=True) for c in contents],
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha256(settings.GEMINI_MODEL.encode() + b"\0" + body).hexdigest()
+
 class MindWatchChatbot:
     def __init__(self):
-        api_key = (getattr(settings, "GEMINI_API_KEY", None) or "").strip()
-        self.client = genai.Client(api_key=api_key) if api_key else None
+        self.api_key = (getattr(settings, "GEMINI_API_KEY", None) or "").strip()
+        self._client = None
+        self._in_flight = {}  # request key -> task of the shared upstream call
+        self._slots = None
+        self._queued = 0
+        self._running = 0
+
+    @property
+    def client(self):
+        # Built on first use so every worker gets its own HTTP connection pool
+        # instead of one inherited from a preloaded master
+        if self._client is None and self.api_key:
+            self._client = genai.Client(
+                api_key=self.api_key,
+                http_options=types.HttpOptions(
+                    base_url=settings.GEMINI_BASE_URL or None,
+                    timeout=int(settings.GEMINI_TIMEOUT_SECONDS * 1000)
+                )
+            )
+        return self._client
+
+    def _pool(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the worker's event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        return self._slots
+
+    async def _call(self, contents: list) -> str:
+        queued_at = time.perf_counter()
+        self._queued += 1
+        metrics.set_gauge("gemini_queued", self._queued)
+        try:
+            await self._pool().acquire()
+        finally:
+            # Also runs when cancelled while still waiting for a slot
+            self._queued -= 1
+            metrics.set_gauge("gemini_queued", self._queued)
+
+        started = time.perf_counter()
+        metrics.observe("gemini_queue_wait_seconds", started - queued_at)
+        self._running += 1
+        metrics.set_gauge("gemini_running", self._running)
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=settings.GEMINI_MODEL,
+                contents=contents,
+            )
+            metrics.increment("gemini_calls")
+            return response.text
+        except Exception:
+            metrics.increment("gemini_errors")
+            raise
+        finally:
+            self._running -= 1
+            metrics.set_gauge("gemini_running", self._running)
+            metrics.observe("gemini_call_seconds", time.perf_counter() - started)
+            self._pool().release()
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here when every caller gave up
+
+    async def generate(self, contents: list) -> str:
+        key = request_key(contents)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                asyncio.wait_for(self._call(contents), timeout=settings.GEMINI_TIMEOUT_SECONDS)
+            )
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            metrics.increment("gemini_coalesced")
+        # Shielded so one caller's deadline doesn't cancel the call for the others
+        return await asyncio.shield(task)
 
     def build_context(
         self,
@@ -118,12 +206,7 @@ class MindWatchChatbot:
                 )
             )
 
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=gemini_history,
-            )
-
-            return response.text
+            return await self.generate(gemini_history)
 
         except Exception as e:
             print(f"Chatbot error: {e}")
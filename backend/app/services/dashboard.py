@@ -0,0 +1,147 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.analysis import Analysis
+from app.models.dashboard import DashboardSummary
+from app.models.listening import SpotifySyncState
+from app.models.user import User
+from app.services.projections import project_youtube_analysis, slim_play
+
+SCORE_COLUMNS = (
+    "overall_wellness_score", "linguistic_score", "consumption_score",
+    "behavioral_score", "risk_level",
+)
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def _latest_analyses(db: Session, user_ids: list) -> dict:
+    latest = (
+        select(Analysis.user_id, func.max(Analysis.analysis_date).label("analysis_date"))
+        .where(Analysis.user_id.in_(user_ids))
+        .group_by(Analysis.user_id)
+        .subquery()
+    )
+    rows = (
+        db.query(Analysis)
+        .join(latest, and_(
+            Analysis.user_id == latest.c.user_id,
+            Analysis.analysis_date == latest.c.analysis_date,
+        ))
+    )
+    return {a.user_id: a for a in rows}
+
+def _trends(db: Session, user_ids: list) -> dict:
+    # Daily mean overall score for the trend chart
+    since = datetime.now(timezone.utc) - timedelta(days=settings.DASHBOARD_TREND_DAYS)
+    day = func.date(Analysis.analysis_date)
+    rows = db.execute(
+        select(Analysis.user_id, day, func.avg(Analysis.overall_wellness_score))
+        .where(
+            Analysis.user_id.in_(user_ids),
+            Analysis.analysis_date >= since,
+            Analysis.overall_wellness_score.isnot(None),
+        )
+        .group_by(Analysis.user_id, day)
+        .order_by(Analysis.user_id, day)
+    )
+    trends = {}
+    for user_id, observed_on, score in rows:
+        # date() comes back as a date on PostgreSQL and a string on SQLite
+        trends.setdefault(user_id, []).append({
+            "date": date.fromisoformat(str(observed_on)[:10]).isoformat(),
+            "overall_wellness_score": round(score, 1),
+        })
+    return trends
+
+def build_payload(
+    user: User,
+    analysis: Optional[Analysis],
+    trend: list,
+    recent_items: Optional[list]
+) -> dict:
+    spotify = None
+    if analysis is not None and analysis.behavioral_details:
+        spotify = {**analysis.behavioral_details, "recently_played": [slim_play(i) for i in recent_items or []]}
+    youtube = None
+    if analysis is not None and analysis.consumption_details:
+        youtube = project_youtube_analysis(analysis.consumption_details)
+
+    return {
+        "profile": {
+            "id": user.id,
+            "email": user.email,
+            "name": user.name,
+            "picture": user.picture,
+            "timezone": user.timezone,
+            "created_at": _iso(user.created_at),
+        },
+        "connected_sources": {
+            "spotify": bool(user.spotify_connected),
+            "google_fit": bool(user.google_fit_connected),
+            "notion": bool(user.notion_connected),
+        },
+        "scores": {
+            **{c: getattr(analysis, c) for c in SCORE_COLUMNS},
+            "analysis_date": _iso(analysis.analysis_date),
+        } if analysis is not None else None,
+        "trend": trend,
+        "spotify": spotify,
+        "youtube": youtube,
+        "insights": analysis.insights if analysis is not None else [],
+        "warnings": analysis.warnings if analysis is not None else [],
+        "predictions": analysis.predictions if analysis is not None else None,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def rebuild_summaries(db: Session, user_ids: list) -> int:
+    # Set-based, so bulk writers (batch re-scoring, forecasts) rebuild whole
+    # chunks in a handful of queries. The caller commits
+    if not user_ids:
+        return 0
+    users = db.query(User).filter(User.id.in_(user_ids)).all()
+    analyses = _latest_analyses(db, user_ids)
+    trends = _trends(db, user_ids)
+    recent = dict(
+        db.query(SpotifySyncState.user_id, SpotifySyncState.recent_items)
+        .filter(SpotifySyncState.user_id.in_(user_ids))
+    )
+
+    rows = [
+        {
+            "user_id": user.id,
+            "version": 1,
+            "payload": build_payload(user, analyses.get(user.id), trends.get(user.id, []), recent.get(user.id)),
+        }
+        for user in users
+    ]
+    if rows:
+        table = DashboardSummary.__table__
+        insert = dialect_insert(db.get_bind())(table)
+        db.execute(
+            insert.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={
+                    "payload": insert.excluded.payload,
+                    "version": table.c.version + 1,
+                    "updated_at": func.now(),
+                },
+            ),
+            rows,
+        )
+    return len(rows)
+
+def refresh_summary(db: Session, user_id: str):
+    rebuild_summaries(db, [user_id])
+    db.commit()
+
+def get_summary(db: Session, user_id: str) -> Optional[DashboardSummary]:
+    summary = db.get(DashboardSummary, user_id)
+    if summary is None:
+        # First load for users from before summaries existed
+        refresh_summary(db, user_id)
+        summary = db.get(DashboardSummary, user_id)
+    return summary
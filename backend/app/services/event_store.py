@@ -0,0 +1,162 @@
+from typing import Optional, Sequence
+import numpy as np
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.models.events import MediaItem, UserEvent
+
+INTERN_CHUNK = 1000
+
+# Null category codes are returned as -1, null features as NaN
+LOAD_SQL = text("""
+    SELECT ts,
+           COALESCE(item_id, -1),
+           COALESCE(category, -1),
+           valence,
+           energy
+    FROM user_events
+    WHERE user_id = :user_id
+      AND source = :source
+      AND ts >= :start
+      AND ts < :end
+    ORDER BY ts
+""")
+
+LOAD_MANY_SQL = text("""
+    SELECT user_id,
+           ts,
+           COALESCE(item_id, -1),
+           COALESCE(category, -1),
+           valence,
+           energy
+    FROM user_events
+    WHERE user_id IN :user_ids
+      AND source = :source
+      AND ts >= :start
+      AND ts < :end
+    ORDER BY user_id, ts
+""").bindparams(bindparam("user_ids", expanding=True))
+
+def _columns(rows: list) -> dict:
+    if not rows:
+        return {
+            "ts": np.empty(0, dtype=np.int64),
+            "item_id": np.empty(0, dtype=np.int32),
+            "category": np.empty(0, dtype=np.int16),
+            "valence": np.empty(0, dtype=np.float32),
+            "energy": np.empty(0, dtype=np.float32),
+        }
+
+    ts, item_id, category, valence, energy = zip(*rows)
+    # None becomes NaN when building float arrays
+    return {
+        "ts": np.array(ts, dtype=np.int64),
+        "item_id": np.array(item_id, dtype=np.int32),
+        "category": np.array(category, dtype=np.int16),
+        "valence": np.array(valence, dtype=np.float32),
+        "energy": np.array(energy, dtype=np.float32),
+    }
+
+class EventStore:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def intern(self, source: int, external_ids: Sequence[str]) -> dict:
+        unique_ids = list(dict.fromkeys(i for i in external_ids if i))
+        if not unique_ids:
+            return {}
+
+        upsert = dialect_insert(self.db.get_bind())
+        mapping = {}
+        for i in range(0, len(unique_ids), INTERN_CHUNK):
+            chunk = unique_ids[i:i + INTERN_CHUNK]
+            self.db.execute(
+                upsert(MediaItem)
+                .values([{"source": source, "external_id": e} for e in chunk])
+                .on_conflict_do_nothing(index_elements=["source", "external_id"])
+            )
+            rows = self.db.execute(
+                select(MediaItem.external_id, MediaItem.id).where(
+                    MediaItem.source == source,
+                    MediaItem.external_id.in_(chunk)
+                )
+            )
+            mapping.update(rows.all())
+        return mapping
+
+    def append(
+        self,
+        user_id: str,
+        source: int,
+        ts: Sequence[int],
+        external_ids: Optional[Sequence[Optional[str]]] = None,
+        category: Optional[Sequence[Optional[int]]] = None,
+        valence: Optional[Sequence[Optional[float]]] = None,
+        energy: Optional[Sequence[Optional[float]]] = None,
+    ) -> int:
+        n = len(ts)
+        if not n:
+            return 0
+
+        item_ids = [None] * n
+        if external_ids is not None:
+            interned = self.intern(source, external_ids)
+            item_ids = [interned.get(e) for e in external_ids]
+
+        category = category if category is not None else [None] * n
+        valence = valence if valence is not None else [None] * n
+        energy = energy if energy is not None else [None] * n
+
+        rows = [
+            {
+                "user_id": user_id,
+                "source": source,
+                "ts": int(ts[i]),
+                "item_id": item_ids[i],
+                "category": category[i],
+                "valence": valence[i],
+                "energy": energy[i],
+            }
+            for i in range(n)
+        ]
+        # Rows already stored (see uq_user_events_spotify_play) are skipped
+        # rather than failing the whole append
+        upsert = dialect_insert(self.db.get_bind())
+        self.db.execute(upsert(UserEvent).on_conflict_do_nothing(), rows)
+        return n
+
+    def load(
+        self,
+        user_id: str,
+        source: int,
+        start: int = 0,
+        end: int = 2 ** 62
+    ) -> dict:
+        rows = self.db.execute(LOAD_SQL, {
+            "user_id": user_id,
+            "source": source,
+            "start": start,
+            "end": end,
+        }).fetchall()
+        return _columns(rows)
+
+    def load_many(
+        self,
+        user_ids: Sequence[str],
+        source: int,
+        start: int = 0,
+        end: int = 2 ** 62
+    ) -> dict:
+        # load() for a chunk of users in one query: {user_id: columns}, with
+        # empty columns for users without events
+        rows = self.db.execute(LOAD_MANY_SQL, {
+            "user_ids": list(user_ids),
+            "source": source,
+            "start": start,
+            "end": end,
+        }).fetchall()
+
+        by_user = {user_id: [] for user_id in user_ids}
+        for row in rows:
+            by_user[row[0]].append(row[1:])
+        return {user_id: _columns(user_rows) for user_id, user_rows in by_user.items()}
@@ -0,0 +1,256 @@
+import time
+from collections import deque
+from concurrent.futures import Executor
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import numpy as np
+from sqlalchemy import and_, bindparam, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.engines import forecasting
+from app.engines.risk import risk_level
+from app.models.analysis import Analysis
+from app.models.forecast import ForecastModel
+from app.models.user import User
+from app.services.dashboard import rebuild_summaries
+
+EPOCH = date(1970, 1, 1)
+
+def epoch_day(day: date) -> int:
+    return (day - EPOCH).days
+
+def day_date(day: int) -> date:
+    return EPOCH + timedelta(days=int(day))
+
+def next_user_ids(db: Session, after: Optional[str], limit: int) -> list:
+    query = select(User.id).order_by(User.id).limit(limit)
+    if after is not None:
+        query = query.where(User.id > after)
+    return list(db.scalars(query))
+
+def load_series(db: Session, user_ids: list, days: np.ndarray) -> np.ndarray:
+    # Daily mean wellness score per user over `days`; NaN where no analysis
+    start = datetime.combine(day_date(days[0]), datetime.min.time(), tzinfo=timezone.utc)
+    day = func.date(Analysis.analysis_date)
+    rows = db.execute(
+        select(Analysis.user_id, day, func.avg(Analysis.overall_wellness_score))
+        .where(
+            Analysis.user_id.in_(user_ids),
+            Analysis.analysis_date >= start,
+            Analysis.overall_wellness_score.isnot(None),
+        )
+        .group_by(Analysis.user_id, day)
+    )
+    series = np.full((len(user_ids), len(days)), np.nan)
+    row_of = {user_id: i for i, user_id in enumerate(user_ids)}
+    for user_id, observed_on, score in rows:
+        # date() comes back as a date on PostgreSQL and a string on SQLite
+        column = epoch_day(date.fromisoformat(str(observed_on)[:10])) - int(days[0])
+        if 0 <= column < len(days):
+            series[row_of[user_id], column] = score
+    return series
+
+def load_models(db: Session, user_ids: list) -> dict:
+    rows = db.query(ForecastModel).filter(ForecastModel.user_id.in_(user_ids))
+    return {
+        m.user_id: {
+            "model_version": m.model_version,
+            "coef": m.coef,
+            "residual_std": m.residual_std,
+            "origin_day": m.origin_day,
+            "observations": m.observations,
+            "last_observed_day": m.last_observed_day,
+            "fitted_day": epoch_day(m.fitted_at.date()),
+        }
+        for m in rows
+    }
+
+def _needs_refit(cached: Optional[dict], observed_days: np.ndarray, today: int) -> bool:
+    if cached is None or cached["model_version"] != forecasting.MODEL_VERSION:
+        return True
+    new_points = int((observed_days > cached["last_observed_day"]).sum())
+    if new_points >= settings.FORECAST_REFIT_MIN_POINTS:
+        return True
+    return new_points > 0 and today - cached["fitted_day"] >= settings.FORECAST_MAX_AGE_DAYS
+
+def predictions_payload(
+    start_day: int,
+    mean: np.ndarray,
+    spread: np.ndarray,
+    probability: np.ndarray,
+    coef: list,
+    observations: int
+) -> dict:
+    daily = [
+        {
+            "date": day_date(start_day + i).isoformat(),
+            "wellness_score": round(float(mean[i]), 1),
+            "lower": round(float(max(mean[i] - 1.96 * spread[i], 0)), 1),
+            "upper": round(float(min(mean[i] + 1.96 * spread[i], 100)), 1),
+            "risk_level": risk_level(float(mean[i])),
+            "high_risk_probability": round(float(probability[i]), 3),
+        }
+        for i in range(len(mean))
+    ]
+    peak = max(daily, key=lambda d: d["high_risk_probability"])
+    return {
+        "model": forecasting.MODEL_NAME,
+        "generated_for": day_date(start_day - 1).isoformat(),
+        "horizon_days": len(daily),
+        "observations": observations,
+        "trend_per_week": round(float(coef[1]), 2),
+        "risk_level": risk_level(min(d["wellness_score"] for d in daily)),
+        "peak_risk": {"date": peak["date"], "high_risk_probability": peak["high_risk_probability"]},
+        "daily": daily,
+    }
+
+def forecast_chunk(user_ids: list, series: np.ndarray, days: np.ndarray, cached: dict, today: int) -> list:
+    # Runs in the worker pool. Returns (user_id, refit params or None,
+    # predictions) for every user with enough data
+    observed = ~np.isnan(series)
+    counts = observed.sum(axis=1)
+    eligible = np.flatnonzero(counts >= settings.FORECAST_MIN_POINTS)
+    if not len(eligible):
+        return []
+
+    refit = [i for i in eligible if _needs_refit(cached.get(user_ids[i]), days[observed[i]], today)]
+    params = {}
+    if refit:
+        coef, std, n = forecasting.fit_batch(series[refit], days, int(days[0]))
+        for row, i in enumerate(refit):
+            params[user_ids[i]] = {
+                "model_version": forecasting.MODEL_VERSION,
+                "coef": [round(float(c), 6) for c in coef[row]],
+                "residual_std": float(std[row]),
+                "origin_day": int(days[0]),
+                "observations": int(n[row]),
+                "last_observed_day": int(days[observed[i]].max()),
+            }
+
+    users = [user_ids[i] for i in eligible]
+    models = [params.get(u) or cached[u] for u in users]
+    horizon = np.arange(today + 1, today + 1 + settings.FORECAST_HORIZON_DAYS)
+    mean, spread = forecasting.predict(
+        np.array([m["coef"] for m in models]),
+        np.array([m["residual_std"] for m in models]),
+        np.array([m["origin_day"] for m in models]),
+        horizon,
+    )
+    probability = forecasting.high_risk_probability(mean, spread)
+    return [
+        (
+            user_id,
+            params.get(user_id),
+            predictions_payload(int(horizon[0]), mean[k], spread[k], probability[k], model["coef"], model["observations"]),
+        )
+        for k, (user_id, model) in enumerate(zip(users, models))
+    ]
+
+def _latest_analysis_keys(db: Session, user_ids: list) -> dict:
+    latest = (
+        select(Analysis.user_id, func.max(Analysis.analysis_date).label("analysis_date"))
+        .where(Analysis.user_id.in_(user_ids))
+        .group_by(Analysis.user_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(Analysis.user_id, Analysis.id, Analysis.created_at)
+        .join(latest, and_(
+            Analysis.user_id == latest.c.user_id,
+            Analysis.analysis_date == latest.c.analysis_date,
+        ))
+    )
+    return {user_id: (analysis_id, created_at) for user_id, analysis_id, created_at in rows}
+
+def write_results(db: Session, results: list, fitted_at: datetime) -> int:
+    refits = [
+        {"user_id": user_id, "model": forecasting.MODEL_NAME, "fitted_at": fitted_at, **params}
+        for user_id, params, _ in results if params
+    ]
+    if refits:
+        insert = dialect_insert(db.get_bind())(ForecastModel.__table__)
+        db.execute(
+            insert.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={c: insert.excluded[c] for c in refits[0] if c != "user_id"},
+            ),
+            refits,
+        )
+
+    # Predictions go on each user's latest analysis, which is what the
+    # dashboard reads
+    latest = _latest_analysis_keys(db, [user_id for user_id, _, _ in results])
+    updates = [
+        {"b_id": latest[user_id][0], "b_created_at": latest[user_id][1], "b_predictions": predictions}
+        for user_id, _, predictions in results if user_id in latest
+    ]
+    if updates:
+        table = Analysis.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.created_at == bindparam("b_created_at"))
+            .values(predictions=bindparam("b_predictions")),
+            updates,
+        )
+        rebuild_summaries(db, [user_id for user_id, _, _ in results if user_id in latest])
+    db.commit()
+    return len(refits)
+
+def run_forecasts(
+    db: Session,
+    executor: Executor,
+    workers: int,
+    chunk_size: int = None,
+    today: Optional[date] = None
+) -> dict:
+    # Nightly pass over all users: chunks load while earlier ones are fitted
+    # in the pool; results are written in order
+    chunk_size = chunk_size or settings.FORECAST_CHUNK_SIZE
+    today = epoch_day(today or datetime.now(timezone.utc).date())
+    days = np.arange(today - settings.FORECAST_HISTORY_DAYS + 1, today + 1)
+    fitted_at = datetime.now(timezone.utc)
+
+    stats = {"users": 0, "forecasts": 0, "refits": 0}
+    started = time.monotonic()
+    cursor = None
+    exhausted = False
+    in_flight = deque()
+    while True:
+        while not exhausted and len(in_flight) <= workers:
+            user_ids = next_user_ids(db, cursor, chunk_size)
+            if not user_ids:
+                exhausted = True
+                break
+            cursor = user_ids[-1]
+            series = load_series(db, user_ids, days)
+            cached = load_models(db, user_ids)
+            in_flight.append((len(user_ids), executor.submit(forecast_chunk, user_ids, series, days, cached, today)))
+        if not in_flight:
+            break
+
+        users, future = in_flight.popleft()
+        results = future.result()
+        stats["refits"] += write_results(db, results, fitted_at)
+        stats["users"] += users
+        stats["forecasts"] += len(results)
+        rate = stats["users"] / (time.monotonic() - started)
+        print(
+            f"Forecasts: {stats['users']} users, {stats['forecasts']} forecasts, "
+            f"{stats['refits']} refits, {rate:.0f} users/s"
+        )
+    stats["seconds"] = round(time.monotonic() - started, 1)
+    return stats
+
+def cached_predictions(db: Session, user_id: str) -> Optional[dict]:
+    # Predictions for a newly written analysis from the user's cached fit
+    model = db.get(ForecastModel, user_id)
+    if model is None or model.model_version != forecasting.MODEL_VERSION:
+        return None
+    today = epoch_day(datetime.now(timezone.utc).date())
+    horizon = np.arange(today + 1, today + 1 + settings.FORECAST_HORIZON_DAYS)
+    mean, spread = forecasting.predict(
+        np.array([model.coef]), np.array([model.residual_std]), np.array([model.origin_day]), horizon
+    )
+    probability = forecasting.high_risk_probability(mean, spread)
+    return predictions_payload(int(horizon[0]), mean[0], spread[0], probability[0], model.coef, model.observations)
@@ -0,0 +1,45 @@
+# Slim response shapes. Spotify track objects carry markets, external ids and
+# URLs we never show; the slim forms keep what the dashboard and chatbot read
+# (track name, first artist, album images) in the same nesting.
+
+# YouTube result fields returned only with ?verbose=true. top_searches is
+# part of the response contract and capped at 20 queries, so it stays
+YOUTUBE_VERBOSE_ONLY = ()
+
+def slim_artist(artist: dict) -> dict:
+    return {"id": artist.get("id"), "name": artist.get("name")}
+
+def slim_track(track: dict) -> dict:
+    if not track:
+        return track
+    album = track.get("album") or {}
+    return {
+        "id": track.get("id"),
+        "name": track.get("name"),
+        "duration_ms": track.get("duration_ms"),
+        "artists": [slim_artist(a) for a in track.get("artists") or []],
+        "album": {
+            "id": album.get("id"),
+            "name": album.get("name"),
+            "images": [
+                {"url": i.get("url"), "width": i.get("width"), "height": i.get("height")}
+                for i in album.get("images") or []
+            ],
+        },
+    }
+
+def slim_play(item: dict) -> dict:
+    return {"played_at": item.get("played_at"), "track": slim_track(item.get("track"))}
+
+def project_spotify_analysis(result: dict, verbose: bool = False) -> dict:
+    if verbose:
+        return result
+    return {
+        **result,
+        "recently_played": [slim_play(item) for item in result.get("recently_played") or []],
+    }
+
+def project_youtube_analysis(result: dict, verbose: bool = False) -> dict:
+    if verbose or not YOUTUBE_VERBOSE_ONLY:
+        return result
+    return {k: v for k, v in result.items() if k not in YOUTUBE_VERBOSE_ONLY}
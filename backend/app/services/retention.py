@@ -0,0 +1,84 @@
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+PARTITIONED_TABLES = ("analyses", "raw_data")
+
+CHILD_PARTITIONS_SQL = text("""
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+    JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+    WHERE parent.relname = :table
+""")
+
+RELKIND_SQL = text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)")
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _partition_month(table: str, partition: str):
+    # Partitions are named <table>_YYYY_MM; anything else (e.g. _default) is kept
+    suffix = partition[len(table) + 1:]
+    try:
+        year, month = suffix.split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+def _retention_months(table: str) -> int:
+    return {
+        "analyses": settings.ANALYSES_RETENTION_MONTHS,
+        "raw_data": settings.RAW_DATA_RETENTION_MONTHS,
+    }[table]
+
+def ensure_partitions(engine: Engine, months_ahead: int = None) -> list:
+    if engine.dialect.name != "postgresql":
+        return []
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+    current = date.today().replace(day=1)
+    created = []
+    with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            # Databases from before revision 0003 keep plain tables until it runs
+            if conn.execute(RELKIND_SQL, {"table": table}).scalar() != "p":
+                print(f"Skipping partitions for {table}: not partitioned yet (run alembic upgrade)")
+                continue
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+            ))
+            for offset in range(months_ahead + 1):
+                month = _add_months(current, offset)
+                name = f"{table}_{month:%Y_%m}"
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+                ))
+                created.append(name)
+    return created
+
+def drop_expired_partitions(engine: Engine, dry_run: bool = False) -> list:
+    if engine.dialect.name != "postgresql":
+        return []
+
+    current = date.today().replace(day=1)
+    dropped = []
+    for table in PARTITIONED_TABLES:
+        cutoff = _add_months(current, -_retention_months(table))
+        with engine.connect() as conn:
+            partitions = conn.execute(CHILD_PARTITIONS_SQL, {"table": table}).scalars().all()
+
+        for partition in sorted(partitions):
+            month = _partition_month(table, partition)
+            # Drop only months that ended before the retention cutoff
+            if month is None or _add_months(month, 1) > cutoff:
+                continue
+            if not dry_run:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+                    conn.execute(text(f"DROP TABLE {partition}"))
+            dropped.append(partition)
+    return dropped
@@ -0,0 +1,204 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.connectors.spotify import SpotifyConnector, emotional_tone
+from app.core.database import dialect_insert
+from app.engines import behavioral
+from app.models.events import SOURCE_SPOTIFY
+from app.models.listening import SpotifySyncState
+from app.models.user import User
+from app.services.event_store import EventStore
+
+LATE_NIGHT_HOURS = range(0, 5)
+RECENT_ITEMS_KEPT = 10
+SERIES_DAYS_RETURNED = 30
+
+# Fallback estimates if audio features are unavailable
+FALLBACK_FEATURES = {
+    "valence": 0.45,
+    "energy": 0.55,
+    "tempo": 120.0,
+    "danceability": 0.50,
+}
+
+def played_at_ms(item: dict) -> Optional[int]:
+    played_at = item.get("played_at", "")
+    if not played_at:
+        return None
+    try:
+        dt = datetime.fromisoformat(played_at.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return int(dt.timestamp() * 1000)
+
+async def _fetch_features(connector: SpotifyConnector, track_ids: list) -> dict:
+    by_id = {}
+    try:
+        for i in range(0, len(track_ids), 100):
+            for f in await connector.get_audio_features(track_ids[i:i + 100]):
+                if f and isinstance(f, dict) and "valence" in f:
+                    by_id[f["id"]] = f
+    except Exception as e:
+        print(f"Audio features error: {e}")
+    return by_id
+
+def lock_sync_state(db: Session, user_id: str) -> SpotifySyncState:
+    # Creates the user's row if missing, then locks it until the caller commits
+    insert = dialect_insert(db.get_bind())
+    db.execute(
+        insert(SpotifySyncState)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    return db.execute(
+        select(SpotifySyncState)
+        .where(SpotifySyncState.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+
+async def sync_listening_history(
+    db: Session,
+    user_id: str,
+    connector: SpotifyConnector
+) -> tuple:
+    # Plays and features are fetched without holding anything. The state row
+    # is then locked and only plays past its cursor at that point are
+    # applied, so concurrent syncs for one user never count a play twice.
+    # Nothing is awaited while the lock is held
+    known = db.get(SpotifySyncState, user_id)
+    cursor = known.cursor if known else None
+    items = await connector.get_plays_since(cursor)
+    fetched = []
+    for item in items:
+        ms = played_at_ms(item)
+        if ms is not None and (cursor is None or ms > cursor):
+            fetched.append((ms, item))
+
+    track_ids = list({
+        item["track"]["id"]
+        for _, item in fetched
+        if item.get("track") and item["track"].get("id")
+    })
+    features = await _fetch_features(connector, track_ids) if track_ids else {}
+
+    state = lock_sync_state(db, user_id)
+    new_plays = [(ms, item) for ms, item in fetched if state.cursor is None or ms > state.cursor]
+
+    if new_plays:
+        daily = {day: list(v) for day, v in (state.daily_series or {}).items()}
+        events = {"ts": [], "external_ids": [], "valence": [], "energy": []}
+        for ms, item in new_plays:
+            track_id = (item.get("track") or {}).get("id")
+            f = features.get(track_id)
+            played = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+            late_night = played.hour in LATE_NIGHT_HOURS
+
+            state.total_plays += 1
+            state.late_night_plays += int(late_night)
+            if f:
+                state.features_count += 1
+                state.valence_sum += f["valence"]
+                state.energy_sum += f["energy"]
+                state.tempo_sum += f["tempo"]
+                state.danceability_sum += f["danceability"]
+
+            day = daily.setdefault(played.date().isoformat(), [0, 0, 0.0, 0])
+            day[0] += 1
+            day[1] += int(late_night)
+            if f:
+                day[2] += f["valence"]
+                day[3] += 1
+
+            events["ts"].append(ms // 1000)
+            events["external_ids"].append(track_id)
+            events["valence"].append(f["valence"] if f else None)
+            events["energy"].append(f["energy"] if f else None)
+
+        EventStore(db).append(user_id, SOURCE_SPOTIFY, **events)
+        state.daily_series = daily
+        state.cursor = max(ms for ms, _ in new_plays)
+        newest_first = [item for _, item in sorted(new_plays, key=lambda p: p[0], reverse=True)]
+        state.recent_items = (newest_first + (state.recent_items or []))[:RECENT_ITEMS_KEPT]
+
+    db.commit()
+    return state, len(new_plays)
+
+def build_analysis(state: SpotifySyncState) -> dict:
+    if state.features_count:
+        avg = {
+            "valence": state.valence_sum / state.features_count,
+            "energy": state.energy_sum / state.features_count,
+            "tempo": state.tempo_sum / state.features_count,
+            "danceability": state.danceability_sum / state.features_count,
+        }
+    elif state.total_plays:
+        avg = FALLBACK_FEATURES
+    else:
+        avg = {"valence": 0, "energy": 0, "tempo": 0, "danceability": 0}
+
+    late_night_ratio = (
+        state.late_night_plays / state.total_plays if state.total_plays else 0
+    )
+
+    daily = state.daily_series or {}
+    valence_series = [
+        {
+            "date": day,
+            "plays": plays,
+            "late_night_ratio": round(late / plays, 3) if plays else 0,
+            "avg_valence": round(valence / n, 3) if n else None,
+        }
+        for day, (plays, late, valence, n) in sorted(daily.items())[-SERIES_DAYS_RETURNED:]
+    ]
+
+    return {
+        "total_tracks_analyzed": state.total_plays,
+        "avg_valence": round(avg["valence"], 3),
+        "avg_energy": round(avg["energy"], 3),
+        "avg_tempo": round(avg["tempo"], 1),
+        "avg_danceability": round(avg["danceability"], 3),
+        "late_night_listening_ratio": round(late_night_ratio, 3),
+        "emotional_tone": emotional_tone(avg["valence"], avg["energy"]),
+        "recently_played": state.recent_items or [],
+        "audio_features_count": state.features_count,
+        "history_days": len(daily),
+        "valence_series": valence_series,
+    }
+
+def behavior_window_start(now: int) -> int:
+    # Events loaded for the behavioral features; a day of slack covers any
+    # UTC offset
+    return now - (behavioral.HISTORY_DAYS + 1) * behavioral.DAY
+
+def add_behavior(analysis: dict, events: dict, tz_name: Optional[str], now: int) -> dict:
+    # Sessions, local-time circadian features and baseline deviations from
+    # the stored plays; they drive the behavioral score
+    analysis["behavior"] = behavioral.extract(
+        events["ts"], events["valence"].astype(np.float64), tz_name, now, analysis["avg_valence"]
+    )
+    return analysis
+
+def analysis_version(db: Session, state: SpotifySyncState, now: int) -> str:
+    # Cache version of an analysis. The behavior features change with new
+    # plays, the user's zone and their local day
+    tz_name = db.scalar(select(User.timezone).where(User.id == state.user_id))
+    return f"{state.cursor or 'empty'}:{tz_name or 'UTC'}:{behavioral.local_day(now, tz_name)}"
+
+def claim_analysis_version(db: Session, user_id: str, version: str) -> bool:
+    # True for the one refresh that first sees `version`; it records the
+    # Analysis row, so history follows every score users are shown
+    state = lock_sync_state(db, user_id)
+    claimed = state.recorded_version != version
+    state.recorded_version = version
+    db.commit()
+    return claimed
+
+def listening_behavior(db: Session, user_id: str, analysis: dict, now: Optional[int] = None) -> dict:
+    now = now or int(time.time())
+    events = EventStore(db).load(user_id, SOURCE_SPOTIFY, start=behavior_window_start(now))
+    tz_name = db.scalar(select(User.timezone).where(User.id == user_id))
+    return add_behavior(analysis, events, tz_name, now)
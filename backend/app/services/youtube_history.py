@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack
+from typing import BinaryIO, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.core.deadline import CancelToken
+from app.core.workers import run_in_process
+from app.connectors.taxonomy import Taxonomy, current_taxonomy
+from app.connectors.youtube import NO_TIMESTAMP, YouTubeAnalyzer, AnalysisAccumulator
+from app.models.events import SOURCE_YOUTUBE
+from app.models.youtube import YouTubeHistoryState
+from app.services.event_store import EventStore
+
+HASH_CHUNK = 1024 * 1024
+
+def hash_uploads(watch_file: BinaryIO, search_file: Optional[BinaryIO]) -> str:
+    combined = hashlib.sha256()
+    for f in (watch_file, search_file):
+        file_hash = hashlib.sha256()
+        if f is not None:
+            while chunk := f.read(HASH_CHUNK):
+                file_hash.update(chunk)
+            f.seek(0)
+        combined.update(file_hash.digest())
+    return combined.hexdigest()
+
+def _load_digests(blob: Optional[bytes]) -> np.ndarray:
+    if not blob:
+        return np.empty(0, dtype=np.int64)
+    return np.frombuffer(blob, dtype=np.int64)
+
+def _merge_digests(existing: np.ndarray, new: np.ndarray) -> bytes:
+    return np.union1d(existing, new.astype(np.int64)).tobytes()
+
+def _spool_to_path(upload: Optional[BinaryIO]) -> Optional[str]:
+    # Worker processes read the upload from disk instead of a pickled copy
+    if upload is None:
+        return None
+    with tempfile.NamedTemporaryFile(prefix="takeout-", suffix=".html", delete=False) as f:
+        shutil.copyfileobj(upload, f, HASH_CHUNK)
+    upload.seek(0)
+    return f.name
+
+def accumulate_files(
+    watch_path: Optional[str],
+    search_path: Optional[str],
+    seen_watch: np.ndarray,
+    seen_search: np.ndarray,
+    deadline: Optional[float],
+    taxonomy: Taxonomy,
+    count_seen: bool = False,
+    cancel: Optional[CancelToken] = None
+) -> tuple:
+    # Runs in the process pool; returns plain, picklable results. The caller's
+    # taxonomy is passed along so both sides agree on the version
+    with ExitStack() as stack:
+        watch = stack.enter_context(open(watch_path, "rb")) if watch_path else None
+        search = stack.enter_context(open(search_path, "rb")) if search_path else None
+        acc, new_watch, new_search = YouTubeAnalyzer(taxonomy).accumulate(
+            watch,
+            search,
+            seen_watch=set(seen_watch.tolist()),
+            seen_search=set(seen_search.tolist()),
+            deadline=deadline,
+            count_seen=count_seen,
+            cancel=cancel,
+        )
+    return acc.to_state(), new_watch, new_search
+
+def _snapshot(state: Optional[YouTubeHistoryState]) -> tuple:
+    # What an upload was parsed against; a missing row equals a fresh one
+    if state is None:
+        return None, None, None
+    return state.watch_digests, state.search_digests, state.taxonomy_version
+
+def lock_history_state(db: Session, user_id: str) -> YouTubeHistoryState:
+    # Creates the user's row if missing, then locks it until the caller commits
+    insert = dialect_insert(db.get_bind())
+    db.execute(
+        insert(YouTubeHistoryState)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    return db.execute(
+        select(YouTubeHistoryState)
+        .where(YouTubeHistoryState.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+
+async def analyze_upload(
+    db: Session,
+    user_id: str,
+    watch_file: BinaryIO,
+    search_file: Optional[BinaryIO] = None,
+    deadline: Optional[float] = None
+) -> tuple:
+    # Returns (result, whether the stored aggregates changed): true when the
+    # upload had unseen entries or was re-classified under a new taxonomy
+    upload_hash = await asyncio.to_thread(hash_uploads, watch_file, search_file)
+    taxonomy = current_taxonomy()
+
+    watch_path = await asyncio.to_thread(_spool_to_path, watch_file)
+    search_path = await asyncio.to_thread(_spool_to_path, search_file)
+    # Cancelling this request (client gone) stops the pool job through it
+    cancel = CancelToken()
+    try:
+        # The upload is parsed against the stored digests without holding a
+        # lock, then merged under the row lock. If another upload merged in
+        # between, it is parsed again against the new digests
+        while True:
+            state = db.get(YouTubeHistoryState, user_id)
+
+            # Aggregates from another taxonomy version are stale: this upload is
+            # classified in full and replaces them (Takeout exports are cumulative)
+            reclassify = state is not None and state.taxonomy_version != taxonomy.version
+
+            # Exact repeat of the last upload
+            if state is not None and state.upload_hash == upload_hash and state.result and not reclassify:
+                return state.result, False
+
+            snapshot = _snapshot(state)
+            watch_digests = _load_digests(state.watch_digests if state else None)
+            search_digests = _load_digests(state.search_digests if state else None)
+            acc_state, new_watch, new_search = await run_in_process(
+                accumulate_files,
+                watch_path, search_path, watch_digests, search_digests, deadline,
+                taxonomy, reclassify, cancel,
+                cancel=cancel
+            )
+
+            state = lock_history_state(db, user_id)
+            if _snapshot(state) == snapshot:
+                break
+            db.rollback()
+    finally:
+        for path in (watch_path, search_path):
+            if path:
+                os.unlink(path)
+        cancel.close()
+    acc = AnalysisAccumulator.from_state(acc_state, taxonomy)
+    added = len(new_watch) + len(new_search)
+
+    # Views with a parseable timestamp go to the event store for trend features
+    views = new_watch[new_watch["watched_at"] != NO_TIMESTAMP]
+    EventStore(db).append(
+        user_id,
+        SOURCE_YOUTUBE,
+        ts=views["watched_at"],
+        external_ids=[v.decode() or None for v in views["video_id"].tolist()],
+        category=views["category"].tolist(),
+    )
+
+    if state.aggregates and not reclassify:
+        acc.merge(AnalysisAccumulator.from_state(state.aggregates, taxonomy))
+
+    state.upload_hash = upload_hash
+    state.taxonomy_version = taxonomy.version
+    if len(new_watch) or state.watch_digests is None:
+        state.watch_digests = _merge_digests(watch_digests, new_watch["digest"])
+    if len(new_search) or state.search_digests is None:
+        state.search_digests = _merge_digests(search_digests, new_search)
+    state.aggregates = acc.to_state()
+    state.result = YouTubeAnalyzer(taxonomy).summarize(acc)
+    db.commit()
+
+    return state.result, bool(added) or reclassify
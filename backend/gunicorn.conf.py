@@ -0,0 +1,33 @@
+# Multi-worker entry point:  gunicorn app.main:app -c gunicorn.conf.py
+#
+# The app is imported once in the master (preload_app), so keyword tables,
+# compiled regexes and memory-mapped model weights are built before fork and
+# shared by the workers copy-on-write.
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Longer than the slowest request deadline (YouTube uploads)
+timeout = int(os.getenv("WORKER_TIMEOUT", "150"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = 500
+
+def when_ready(server):
+    # Move everything built during preload out of the collector's view, so
+    # collections in workers do not write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Connections opened by the master (create_all, partitions) must not be
+    # shared; drop them from the worker's pool without closing the sockets
+    from app.core.database import engine
+    engine.dispose(close=False)
@@ -0,0 +1,70 @@
+# Local stand-in for the Gemini generateContent API, for exercising the
+# chatbot without a key or quota.
+#
+#   python scripts/fake_gemini.py --port 8090 --latency 1.5
+#   GEMINI_BASE_URL=http://127.0.0.1:8090 GEMINI_API_KEY=fake uvicorn app.main:app
+#
+# Each call sleeps --latency seconds (plus up to --jitter) and echoes the
+# last user message. GET /stats returns the number of calls served and the
+# peak number running at once, which is what coalescing and the concurrency
+# pool should keep down.
+import argparse
+import asyncio
+import random
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+
+app = FastAPI()
+stats = {"calls": 0, "running": 0, "peak_running": 0}
+options = argparse.Namespace(latency=1.0, jitter=0.0, fail_rate=0.0)
+
+@app.post("/{version}/models/{model_action}")
+async def generate_content(version: str, model_action: str, request: Request):
+    model, _, action = model_action.partition(":")
+    if action != "generateContent":
+        raise HTTPException(status_code=404, detail=f"Unsupported action {action!r}")
+    body = await request.json()
+
+    stats["calls"] += 1
+    stats["running"] += 1
+    stats["peak_running"] = max(stats["peak_running"], stats["running"])
+    try:
+        await asyncio.sleep(options.latency + random.uniform(0, options.jitter))
+    finally:
+        stats["running"] -= 1
+    if random.random() < options.fail_rate:
+        raise HTTPException(status_code=503, detail="Fake overload")
+
+    last = body["contents"][-1]["parts"][-1].get("text", "")
+    question = last.rsplit("User: ", 1)[-1]
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": f"[{model}] You asked: {question}"}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {"promptTokenCount": len(last) // 4, "candidatesTokenCount": 12},
+        "modelVersion": model,
+    }
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+@app.post("/stats/reset")
+async def reset_stats():
+    stats.update(calls=0, peak_running=0)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini generateContent server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per call")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    parser.parse_args(namespace=options)
+    uvicorn.run(app, host=options.host, port=options.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
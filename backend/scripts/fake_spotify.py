@@ -0,0 +1,87 @@
+# Local stand-in for the Spotify Web API endpoints the sync uses, for load
+# tests without accounts or rate limits.
+#
+#   python scripts/fake_spotify.py --port 8091 --latency 0.15
+#   SPOTIFY_API_URL=http://127.0.0.1:8091 uvicorn app.main:app
+#
+# Every access token gets its own endless history with a play every
+# --play-interval seconds, so each sync finds the plays made since its
+# cursor. Audio features are derived from the track id.
+import argparse
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Optional
+import uvicorn
+from fastapi import FastAPI, Request
+
+app = FastAPI()
+stats = {"calls": 0}
+options = argparse.Namespace(latency=0.1, play_interval=240, catalog=500)
+
+def _unit(*parts) -> float:
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big") / 2 ** 32
+
+def _play(token: str, slot: int) -> dict:
+    track = int(_unit(token, slot) * options.catalog)
+    played_at = datetime.fromtimestamp(slot * options.play_interval, tz=timezone.utc)
+    return {
+        "track": {
+            "id": f"track{track:06d}",
+            "name": f"Track {track}",
+            "duration_ms": 150000 + int(_unit("duration", track) * 120000),
+            "artists": [{"id": f"artist{track % 97:03d}", "name": f"Artist {track % 97}"}],
+            "album": {"id": f"album{track % 211:03d}", "name": f"Album {track % 211}", "images": []},
+        },
+        "played_at": played_at.isoformat().replace("+00:00", "Z"),
+        "context": None,
+    }
+
+async def _respond():
+    stats["calls"] += 1
+    await asyncio.sleep(options.latency)
+
+@app.get("/me/player/recently-played")
+async def recently_played(request: Request, limit: int = 50, after: Optional[int] = None):
+    await _respond()
+    token = request.headers.get("authorization", "")
+    newest = int(time.time()) // options.play_interval
+    oldest = newest - limit + 1
+    if after is not None:
+        oldest = max(oldest, after // 1000 // options.play_interval + 1)
+    items = [_play(token, slot) for slot in range(newest, oldest - 1, -1)]
+    cursor = str(newest * options.play_interval * 1000) if items else None
+    return {"items": items, "next": None, "cursors": {"after": cursor, "before": None}, "limit": limit}
+
+@app.get("/audio-features")
+async def audio_features(ids: str = ""):
+    await _respond()
+    return {"audio_features": [
+        {
+            "id": track_id,
+            "valence": round(_unit("valence", track_id), 3),
+            "energy": round(_unit("energy", track_id), 3),
+            "danceability": round(_unit("danceability", track_id), 3),
+            "tempo": round(70 + _unit("tempo", track_id) * 110, 1),
+        }
+        for track_id in ids.split(",") if track_id
+    ]}
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Spotify Web API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per call")
+    parser.add_argument("--play-interval", type=int, default=240, help="seconds between plays in every history")
+    parser.add_argument("--catalog", type=int, default=500, help="distinct tracks")
+    parser.parse_args(namespace=options)
+    uvicorn.run(app, host=options.host, port=options.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# End-to-end load generation against the gunicorn deployment, with Spotify
+# and Gemini replaced by local stubs.
+#
+#   python scripts/loadgen.py --database-url sqlite:////tmp/loadgen.db \
+#       --workers 1 2 4 --concurrency 32 --duration 30 \
+#       --mix dashboard=40,spotify=25,chat=20,youtube=10,profile=5 \
+#       --youtube-entries 1000 10000
+#
+# Seeds --users users (Spotify connected) into the database and signs a JWT
+# for each with create_access_token. Then it starts scripts/fake_spotify.py
+# and scripts/fake_gemini.py, and for every worker count runs gunicorn
+# against them. --concurrency virtual users replay the mix for --duration
+# seconds; each request goes to a random seeded user without one in flight.
+#
+# YouTube uploads use synthetic Takeout exports of the given sizes, each with
+# one unique entry on top, as a repeat export would have. Reported per
+# route: requests, 429s, errors, throughput and p50/p95/p99 latency.
+#
+# Requests in flight per worker are bounded by the SQLAlchemy pool (5 + 10
+# overflow by default; a Spotify refresh holds two connections). Past that a
+# checkout blocks the worker's event loop for up to the 30s pool timeout,
+# which shows up here as timeouts on every route of that worker.
+#
+# SQLite serializes writes across workers; use Postgres (and Redis, via
+# REDIS_URL) for numbers that mean anything beyond a smoke test. Seeded rows
+# use the "loadgen-" id prefix; point --database-url at a scratch database.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES = ("dashboard", "spotify", "chat", "youtube", "profile")
+CHAT_MESSAGES = [
+    "How is my mental wellness looking today?",
+    "What does my music taste say about my mood?",
+    "Am I consuming too much negative content?",
+    "Give me a wellness summary based on my data",
+]
+TITLE_WORDS = (
+    "lofi study mix breakup song workout motivation news today funny fails "
+    "meditation guided sad piano tutorial python speedrun gameplay crisis"
+).split()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_healthy(url: str, timeout: float):
+    give_up = time.time() + timeout
+    while time.time() < give_up:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        if route not in ROUTES:
+            raise SystemExit(f"Unknown route {route!r}; choose from {', '.join(ROUTES)}")
+        mix[route] = float(weight or 1)
+    return mix
+
+def seed_users(database_url: str, count: int) -> list:
+    # Imported here so DATABASE_URL is set before the app's engine is built
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, BACKEND_DIR)
+    import app.models  # noqa: F401  (registers every table)
+    from app.core.database import Base, dialect_insert, engine
+    from app.core.security import create_access_token
+    from app.models.user import User
+
+    Base.metadata.create_all(bind=engine)
+    rows = [
+        {
+            "id": f"loadgen-{i:05d}",
+            "email": f"loadgen-{i:05d}@example.com",
+            "name": f"Load {i}",
+            "google_id": f"loadgen-{i:05d}",
+            "spotify_connected": True,
+            "spotify_token": json.dumps({"access_token": f"loadgen-token-{i:05d}"}),
+        }
+        for i in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(dialect_insert(engine)(User.__table__).on_conflict_do_nothing(index_elements=["id"]), rows)
+    engine.dispose()
+    return [create_access_token({"sub": row["id"]}) for row in rows]
+
+def takeout_cell(n: int, rng: random.Random) -> str:
+    title = " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(2, 6)))
+    day = n % 28 + 1
+    return (
+        '<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"><div class="mdl-grid">'
+        '<div class="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1">'
+        f'Watched <a href="https://www.youtube.com/watch?v=lg{n:09d}">{title}</a><br>'
+        f'<a href="https://www.youtube.com/channel/UC{n % 500}">Channel {n % 500}</a><br>'
+        f'Jan {day}, 2026, 10:{n % 60:02d}:00 PM EST<br></div></div></div>'
+    )
+
+def takeout_export(entries: int) -> tuple:
+    # (head, body, tail) so a unique entry can be spliced in per upload
+    rng = random.Random(entries)
+    body = "".join(takeout_cell(n, rng) for n in range(entries))
+    return (
+        b'<html><head><meta charset="UTF-8"></head><body><div class="mdl-grid">',
+        body.encode(),
+        b"</div></body></html>",
+    )
+
+class Replay:
+    def __init__(self, base_url: str, tokens: list, mix: dict, exports: dict, seed: int):
+        self.base_url = base_url
+        self.tokens = tokens
+        self.routes = list(mix)
+        self.weights = list(mix.values())
+        self.exports = exports
+        self.rng = random.Random(seed)
+        self.uploads = 0
+        self.busy = set()  # users with a request in flight
+        self.samples = []  # (label, status, seconds)
+
+    async def request(self, client: httpx.AsyncClient, route: str, user: int) -> tuple:
+        params = {"token": self.tokens[user]}
+        if route == "dashboard":
+            return route, await client.get("/api/dashboard/summary", params=params)
+        if route == "profile":
+            return route, await client.get("/api/users/profile", params=params)
+        if route == "spotify":
+            return route, await client.get("/api/connectors/spotify/analysis", params=params)
+        if route == "chat":
+            # Per-user data keeps prompts distinct, as real users' would be
+            body = {
+                "message": self.rng.choice(CHAT_MESSAGES),
+                "history": [],
+                "spotify_data": {"avg_valence": round(user % 100 / 100, 2), "avg_energy": 0.5},
+            }
+            return route, await client.post("/api/chat/message", params=params, json=body)
+
+        entries = self.rng.choice(list(self.exports))
+        head, body, tail = self.exports[entries]
+        self.uploads += 1
+        extra = takeout_cell(10 ** 8 + self.uploads, self.rng).encode()
+        files = {"watch_history": ("watch-history.html", head + extra + body + tail, "text/html")}
+        return f"youtube:{entries}", await client.post("/api/connectors/youtube/analyze", params=params, files=files)
+
+    async def virtual_user(self, client: httpx.AsyncClient, until: float):
+        while time.monotonic() < until:
+            route = self.rng.choices(self.routes, self.weights)[0]
+            # One request per user at a time, as from a single browser tab
+            user = self.rng.randrange(len(self.tokens))
+            while user in self.busy:
+                user = self.rng.randrange(len(self.tokens))
+            self.busy.add(user)
+            started = time.monotonic()
+            try:
+                label, response = await self.request(client, route, user)
+                status = response.status_code
+            except httpx.HTTPError:
+                label, status = route, 0
+            finally:
+                self.busy.discard(user)
+            self.samples.append((label, status, time.monotonic() - started))
+
+    async def run(self, concurrency: int, duration: float, timeout: float) -> float:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=timeout, limits=limits) as client:
+            started = time.monotonic()
+            until = started + duration
+            await asyncio.gather(*[self.virtual_user(client, until) for _ in range(concurrency)])
+            return time.monotonic() - started
+
+def summarize(samples: list, elapsed: float) -> dict:
+    by_route = {}
+    for label, status, seconds in samples:
+        by_route.setdefault(label, []).append((status, seconds))
+    report = {}
+    for label, rows in sorted(by_route.items()):
+        status = np.array([s for s, _ in rows])
+        latency = np.array([t for _, t in rows]) * 1000
+        ok = (status >= 200) & (status < 400)
+        report[label] = {
+            "requests": len(rows),
+            "ok": int(ok.sum()),
+            "rejected": int((status == 429).sum()),
+            "errors": int((~ok & (status != 429)).sum()),
+            "throughput": round(ok.sum() / elapsed, 2),
+            "p50_ms": round(float(np.percentile(latency, 50)), 1),
+            "p95_ms": round(float(np.percentile(latency, 95)), 1),
+            "p99_ms": round(float(np.percentile(latency, 99)), 1),
+        }
+    return report
+
+def start(command: list, env: dict, log=subprocess.DEVNULL) -> subprocess.Popen:
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=log)
+
+def run_workers(args, workers: int, env: dict, tokens: list, exports: dict) -> dict:
+    port = free_port()
+    log = open(args.server_log, "ab") if args.server_log else subprocess.DEVNULL
+    server = start(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+        dict(env, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}"),
+        log,
+    )
+    try:
+        wait_healthy(f"http://127.0.0.1:{port}/health", 60)
+        replay = Replay(f"http://127.0.0.1:{port}", tokens, args.mix, exports, args.seed)
+        elapsed = asyncio.run(replay.run(args.concurrency, args.duration, args.timeout))
+        return {"workers": workers, "seconds": round(elapsed, 1), "routes": summarize(replay.samples, elapsed)}
+    finally:
+        server.terminate()
+        server.wait(30)
+        if args.server_log:
+            log.close()
+
+def print_report(result: dict):
+    print(f"\nworkers={result['workers']}  ({result['seconds']}s)")
+    print(f"{'route':<16} {'requests':>8} {'429':>5} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, r in result["routes"].items():
+        print(
+            f"{label:<16} {r['requests']:>8} {r['rejected']:>5} {r['errors']:>6} {r['throughput']:>7.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a traffic mix against local gunicorn deployments")
+    parser.add_argument("--database-url", required=True, help="scratch Postgres or SQLite database")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per worker count")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("dashboard=40,spotify=25,chat=20,youtube=10,profile=5"))
+    parser.add_argument("--youtube-entries", type=int, nargs="+", default=[1000], help="upload sizes, in watch entries")
+    parser.add_argument("--spotify-latency", type=float, default=0.15, help="seconds per stubbed Spotify call")
+    parser.add_argument("--gemini-latency", type=float, default=1.5, help="seconds per stubbed Gemini call")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request; timeouts count as errors")
+    parser.add_argument("--server-log", help="append gunicorn output to this file")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    if args.users < args.concurrency:
+        parser.error("--users must be at least --concurrency (one request per user at a time)")
+
+    tokens = seed_users(args.database_url, args.users)
+    exports = {n: takeout_export(n) for n in args.youtube_entries} if "youtube" in args.mix else {}
+
+    spotify_port, gemini_port = free_port(), free_port()
+    stubs = [
+        start([sys.executable, "scripts/fake_spotify.py", "--port", str(spotify_port),
+               "--latency", str(args.spotify_latency)], dict(os.environ)),
+        start([sys.executable, "scripts/fake_gemini.py", "--port", str(gemini_port),
+               "--latency", str(args.gemini_latency)], dict(os.environ)),
+    ]
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url,
+        SPOTIFY_API_URL=f"http://127.0.0.1:{spotify_port}",
+        GEMINI_BASE_URL=f"http://127.0.0.1:{gemini_port}",
+        GEMINI_API_KEY="loadgen",
+    )
+    results = []
+    try:
+        wait_healthy(f"http://127.0.0.1:{spotify_port}/stats", 30)
+        wait_healthy(f"http://127.0.0.1:{gemini_port}/stats", 30)
+        for workers in args.workers:
+            result = run_workers(args, workers, env, tokens, exports)
+            print_report(result)
+            results.append(result)
+    finally:
+        for stub in stubs:
+            stub.terminate()
+            stub.wait(30)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"mix": args.mix, "concurrency": args.concurrency, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
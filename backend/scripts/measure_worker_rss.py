@@ -0,0 +1,89 @@
+# Per-worker memory of the gunicorn deployment at several worker counts.
+#
+#   python scripts/measure_worker_rss.py --workers 1 4 16
+#
+# Starts gunicorn with gunicorn.conf.py, waits for /health, then reads
+# /proc/<pid>/smaps_rollup (Linux) for the master and every worker. RSS counts
+# shared pages in every process; PSS splits them between the sharers, so the
+# PSS total is the real cost of the deployment.
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Private_Dirty")
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def memory(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in FIELDS:
+                values[key] = int(rest.split()[0]) / 1024  # MiB
+    return values
+
+def children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+def wait_healthy(port: int, timeout: float):
+    give_up = time.time() + timeout
+    while time.time() < give_up:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not become healthy")
+
+def measure(workers: int, warmup: int) -> dict:
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+        cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_healthy(port, 60)
+        while len(children(master.pid)) < workers:
+            time.sleep(0.2)
+        # Let every worker serve a few requests so lazy state is touched
+        for _ in range(warmup * workers):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5).read()
+        time.sleep(1)
+
+        worker_stats = [memory(pid) for pid in children(master.pid)]
+        return {
+            "workers": workers,
+            "master": memory(master.pid),
+            "per_worker": {k: sum(w[k] for w in worker_stats) / len(worker_stats) for k in FIELDS},
+            "total_pss": memory(master.pid)["Pss"] + sum(w["Pss"] for w in worker_stats),
+        }
+    finally:
+        master.terminate()
+        master.wait(30)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-worker memory of the gunicorn deployment")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--warmup", type=int, default=20, help="requests per worker before measuring")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'rss/worker':>11} {'pss/worker':>11} {'shared/worker':>14} {'private/worker':>15} {'total pss':>10}  (MiB)")
+    for n in args.workers:
+        result = measure(n, args.warmup)
+        w = result["per_worker"]
+        print(f"{n:>7} {w['Rss']:>11.1f} {w['Pss']:>11.1f} {w['Shared_Clean']:>14.1f} {w['Private_Dirty']:>15.1f} {result['total_pss']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
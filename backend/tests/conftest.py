@@ -0,0 +1,33 @@
+import os
+
+# The app reads settings at import time; tests run on in-memory SQLite
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["REDIS_URL"] = "redis://localhost:6399"
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.core.database import Base
+from app.models import analysis, batch, dashboard, events, forecast, listening, user, youtube  # noqa: F401
+from app.models.user import User
+
+@pytest.fixture
+def engine(tmp_path):
+    # A file, so separate sessions see each other's commits
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = Session(engine)
+    yield session
+    session.close()
+
+@pytest.fixture
+def user(db):
+    user = User(id="user-1", email="user@example.com", name="User", google_id="google-1")
+    db.add(user)
+    db.commit()
+    return user
@@ -0,0 +1,20 @@
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from app.core import redis
+from app.models.analysis import Analysis
+from app.models.user import User
+from app.services.account import delete_user
+
+def test_delete_user_removes_rows_without_redis(db, user, monkeypatch):
+    # A client bound to no earlier test's event loop
+    monkeypatch.setattr(redis, "_client", None)
+    now = datetime.now(timezone.utc)
+    db.add(Analysis(user_id=user.id, analysis_date=now, overall_wellness_score=50.0))
+    db.commit()
+
+    # REDIS_URL points at nothing in tests; cache cleanup must not block deletion
+    deleted = asyncio.run(delete_user(db, user))
+
+    assert deleted["analyses"] == 1
+    assert db.scalar(select(func.count()).select_from(User)) == 0
@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import connectors as connectors_api
+from app.core import admission
+from app.core.database import get_db
+from app.core.security import create_access_token
+from app.services import analysis_cache
+
+def test_cached_spotify_analysis_takes_no_admission_slot(monkeypatch, db, user):
+    user.spotify_connected = True
+    user.spotify_token = '{"access_token": "spotify-token"}'
+    db.commit()
+    etag = analysis_cache.make_etag(user.id, "v1")
+    cached = {"version": "v1", "etag": etag, "fetched_at": 1e12, "result": {}}
+    admissions = []
+
+    async def get_cached(source, user_id):
+        return cached
+
+    async def acquire(route, user_id, member, limits):
+        admissions.append(route)
+        return False
+
+    monkeypatch.setattr(analysis_cache, "get_cached", get_cached)
+    monkeypatch.setattr(admission, "_acquire", acquire)
+    monkeypatch.setattr(connectors_api, "project_spotify_analysis", lambda result, verbose: {})
+    app = FastAPI()
+    app.include_router(connectors_api.router)
+    app.dependency_overrides[get_db] = lambda: db
+    token = create_access_token({"sub": user.id})
+
+    with TestClient(app) as client:
+        assert client.get(f"/spotify/analysis?token={token}").status_code == 200
+        revalidated = client.get(
+            f"/spotify/analysis?token={token}", headers={"If-None-Match": etag}
+        )
+        assert revalidated.status_code == 304
+    assert admissions == []
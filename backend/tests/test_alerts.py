@@ -0,0 +1,25 @@
+import asyncio
+from app.services import alerts
+from app.services.analysis_service import record_analysis
+
+SPOTIFY = {"avg_valence": 0.6, "late_night_listening_ratio": 0.5}
+YOUTUBE = {
+    "emotional_diet_score": 55.0,
+    "insights": [{"type": "warning", "message": "Rumination patterns in your searches."}],
+}
+
+def test_alternating_sources_do_not_repeat_warnings(db, user, monkeypatch):
+    published = []
+
+    async def publish(user_id, analysis_id, found):
+        published.extend(found)
+
+    monkeypatch.setattr(alerts, "publish", publish)
+    for source, result in [("spotify", SPOTIFY), ("youtube", YOUTUBE)] * 3:
+        analysis = asyncio.run(record_analysis(db, user.id, source, result))
+
+    messages = [a["message"] for a in published if a["kind"] == "new_warning"]
+    assert len(messages) == 2
+    assert len(set(messages)) == 2
+    # The latest row still holds the other source's warnings
+    assert {w["source"] for w in analysis.warnings} == {"spotify", "youtube"}
@@ -0,0 +1,27 @@
+import asyncio
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import alerts as alerts_api
+from app.core.security import create_access_token
+from app.services.alerts import AlertHub
+
+def test_client_close_ends_the_connection(monkeypatch):
+    async def no_redis(self):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(AlertHub, "_listen", no_redis)
+    hub = AlertHub()
+    monkeypatch.setattr(alerts_api, "hub", hub)
+    app = FastAPI()
+    app.include_router(alerts_api.router)
+    token = create_access_token({"sub": "user-1"})
+
+    with TestClient(app) as client:
+        with client.websocket_connect(f"/ws?token={token}"):
+            assert "user-1" in hub.connections
+        # The close frame is read right away, not at the next ping
+        give_up = time.monotonic() + 5
+        while hub.connections and time.monotonic() < give_up:
+            time.sleep(0.05)
+        assert not hub.connections
@@ -0,0 +1,76 @@
+from concurrent.futures import Future
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from app.models.batch import BatchJob
+from app.models.user import User
+from app.services import batch_analysis
+from app.services.batch_analysis import claim_job, create_job, run_batch_job, validate_selection
+
+def make_job(db, status: str, checkpoint_age: timedelta = timedelta(0)) -> BatchJob:
+    job = create_job(db, ["user-1"], None, ["youtube"])
+    db.execute(
+        update(BatchJob)
+        .where(BatchJob.id == job.id)
+        .values(status=status, updated_at=datetime.now(timezone.utc) - checkpoint_age)
+    )
+    db.commit()
+    return job
+
+def test_claim_takes_pending_and_failed_jobs_once(db, user):
+    for status in ("pending", "failed"):
+        job = make_job(db, status)
+        assert claim_job(db, job.id)
+        assert not claim_job(db, job.id)
+
+def test_claim_leaves_live_running_jobs_alone(db, user):
+    assert not claim_job(db, make_job(db, "running", timedelta(seconds=30)).id)
+    assert claim_job(db, make_job(db, "running", timedelta(hours=2)).id)
+    assert not claim_job(db, make_job(db, "completed").id)
+
+class RecordingExecutor:
+    def __init__(self):
+        self.pending = 0
+        self.most_pending = 0
+
+    def submit(self, fn, *args):
+        self.pending += 1
+        self.most_pending = max(self.most_pending, self.pending)
+        future = Future()
+        future.set_result([])
+        original = future.result
+
+        def result(*a):
+            self.pending -= 1
+            return original(*a)
+
+        future.result = result
+        return future
+
+def test_run_keeps_at_most_max_in_flight_chunks(db, monkeypatch):
+    db.add_all([User(id=f"user-{n:02d}", email=f"{n}@example.com", name="u", google_id=f"g{n}") for n in range(10)])
+    db.commit()
+    monkeypatch.setattr(batch_analysis, "load_chunk", lambda db, user_ids, sources, now: [])
+    job = create_job(db, [f"user-{n:02d}" for n in range(10)], None, ["youtube"])
+    claim_job(db, job.id)
+
+    executor = RecordingExecutor()
+    run_batch_job(db, job, executor, chunk_size=2, max_in_flight=1)
+
+    assert executor.most_pending == 1
+    assert job.status == "completed"
+    assert job.processed == 10
+
+@pytest.mark.parametrize("filters", [
+    {"connected": []},
+    {"created_after": "last tuesday"},
+    {"created_before": 20260101},
+    {"connected": ["myspace"]},
+    {"signed_up": "2026-01-01"},
+])
+def test_bad_selections_are_rejected_up_front(filters):
+    with pytest.raises(ValueError):
+        validate_selection(None, filters, ["youtube"])
+
+def test_date_filters_are_accepted():
+    validate_selection(None, {"created_after": "2026-01-01", "connected": ["spotify"]}, ["spotify"])
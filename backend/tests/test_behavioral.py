@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+import pytest
+from app.engines import behavioral
+from app.engines.behavioral import DAY, extract, sessionize, utc_offsets
+
+NOW = int(datetime(2026, 10, 19, 12, tzinfo=timezone.utc).timestamp())
+TODAY = NOW // DAY
+
+def plays_on(days_ago, hour=12, valence=0.5):
+    # One play per listed day, at `hour` UTC
+    ts = np.array(sorted((TODAY - d) * DAY + hour * 3600 for d in days_ago), dtype=np.int64)
+    return ts, np.full(len(ts), valence)
+
+@pytest.mark.parametrize("moment", [
+    datetime(2026, 3, 8, 6, 59, 59, tzinfo=timezone.utc),  # last second of EST
+    datetime(2026, 3, 8, 7, tzinfo=timezone.utc),  # first second of EDT
+    datetime(2026, 11, 1, 5, 59, 59, tzinfo=timezone.utc),
+    datetime(2026, 11, 1, 6, tzinfo=timezone.utc),
+])
+def test_offsets_change_on_the_dst_hour(moment):
+    zone = ZoneInfo("America/New_York")
+    ts = int(moment.timestamp())
+    # Neighbours on the same day take the per-hour path too
+    batch = np.array([ts - 7200, ts, ts + 7200], dtype=np.int64)
+    expected = [int(datetime.fromtimestamp(int(s), zone).utcoffset().total_seconds()) for s in batch]
+    assert utc_offsets(batch, "America/New_York").tolist() == expected
+
+def test_offsets_without_a_usable_zone_are_utc():
+    ts = np.array([NOW], dtype=np.int64)
+    assert utc_offsets(ts, None).tolist() == [0]
+    assert utc_offsets(ts, "Not/AZone").tolist() == [0]
+
+def test_sessionize_boundaries():
+    gap, skip = behavioral.SESSION_GAP_SECONDS, behavioral.SKIP_LIKE_SECONDS
+    # A gap of exactly SESSION_GAP_SECONDS keeps the session, one more splits
+    # it; a next play exactly SKIP_LIKE_SECONDS later is not a skip
+    ts = np.cumsum([0, gap, gap + 1, skip, skip - 1])
+    sessions, starts, skip_like = sessionize(ts)
+    assert sessions.tolist() == [0, 0, 1, 1, 1]
+    assert starts.tolist() == [True, False, True, False, False]
+    assert skip_like.tolist() == [False, False, False, True, False]
+
+def test_short_history_has_no_baseline():
+    days = list(range(behavioral.MIN_BASELINE_DAYS - 1)) + [d + behavioral.RECENT_DAYS for d in range(4)]
+    ts, valence = plays_on(days)
+    result = extract(ts, valence, None, NOW, 0.5)
+    assert result["baseline"] is None
+    assert result["deviations"] == {}
+    assert result["score"] == 50.0
+
+def test_no_plays_in_the_window():
+    ts, valence = plays_on([behavioral.HISTORY_DAYS + 1])
+    assert extract(ts, valence, None, NOW, 0.5) is None
+
+def test_mood_falls_back_to_the_average_valence():
+    ts, _ = plays_on(range(3))
+    result = extract(ts, np.full(len(ts), np.nan), None, NOW, 0.7)
+    assert result["score"] == 70.0
+
+def test_late_night_penalty_beyond_the_allowance():
+    ts, valence = plays_on(range(behavioral.RECENT_DAYS), hour=2)
+    result = extract(ts, valence, None, NOW, 0.5)
+    assert result["recent"]["late_night_ratio"] == 1.0
+    assert result["score"] == 50.0 - behavioral.LATE_NIGHT_PENALTY
+
+def test_late_night_hours_follow_the_users_zone():
+    # 12:00 UTC is 21:00 in Tokyo, 02:00 in Honolulu
+    ts, valence = plays_on(range(behavioral.RECENT_DAYS))
+    assert extract(ts, valence, "Asia/Tokyo", NOW, 0.5)["score"] == 50.0
+    assert extract(ts, valence, "Pacific/Honolulu", NOW, 0.5)["score"] == 50.0 - behavioral.LATE_NIGHT_PENALTY
+
+def test_adverse_deviation_penalty_is_capped():
+    recent_days = range(behavioral.RECENT_DAYS)
+    baseline_days = range(behavioral.RECENT_DAYS, behavioral.RECENT_DAYS + 10)
+    recent_ts, recent_valence = plays_on(recent_days, valence=0.5)
+    base_ts, base_valence = plays_on(baseline_days, valence=0.8)
+    ts = np.concatenate((base_ts, recent_ts))
+    valence = np.concatenate((base_valence, recent_valence))
+
+    result = extract(ts, valence, None, NOW, 0.5)
+    # 0.3 below a flat baseline is 6 sigma at the 0.05 floor, counted as MAX_SIGMA
+    assert result["deviations"]["valence"] == -6.0
+    assert result["score"] == 50.0 - behavioral.DEVIATION_PENALTY * behavioral.MAX_SIGMA
+
+def test_favourable_deviation_costs_nothing():
+    recent_ts, recent_valence = plays_on(range(behavioral.RECENT_DAYS), valence=0.8)
+    base_ts, base_valence = plays_on(range(behavioral.RECENT_DAYS, behavioral.RECENT_DAYS + 10), valence=0.5)
+    ts = np.concatenate((base_ts, recent_ts))
+    result = extract(ts, np.concatenate((base_valence, recent_valence)), None, NOW, 0.5)
+    assert result["deviations"]["valence"] > 0
+    assert result["score"] == 80.0
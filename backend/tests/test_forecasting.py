@@ -0,0 +1,56 @@
+import numpy as np
+from app.engines import forecasting
+from app.engines.forecasting import fit_batch, high_risk_probability, predict
+from app.engines.risk import HIGH_RISK_BELOW
+
+ORIGIN = 20000
+DAYS = np.arange(ORIGIN, ORIGIN + 120)
+
+def test_constant_series_fits_flat_with_the_std_floor():
+    series = np.full((1, len(DAYS)), 60.0)
+    coef, std, n = fit_batch(series, DAYS, ORIGIN)
+    assert np.allclose(coef[0], [60.0, 0, 0, 0, 0, 0], atol=1e-6)
+    assert std[0] == forecasting.MIN_RESIDUAL_STD
+    assert n[0] == len(DAYS)
+
+def test_trend_is_recovered_on_long_series():
+    series = (40.0 + 1.5 * (DAYS - ORIGIN) / 7.0)[None, :]
+    coef, _, _ = fit_batch(series, DAYS, ORIGIN)
+    assert abs(coef[0, 1] - 1.5) < 0.01
+
+def test_missing_days_are_masked_not_imputed():
+    rng = np.random.default_rng(0)
+    full = 50 + rng.normal(0, 5, len(DAYS))
+    kept = rng.random(len(DAYS)) < 0.4
+    gappy = np.where(kept, full, np.nan)
+
+    coef, std, n = fit_batch(gappy[None, :], DAYS, ORIGIN)
+    dropped, dropped_std, _ = fit_batch(full[kept][None, :], DAYS[kept], ORIGIN)
+    assert np.allclose(coef, dropped)
+    assert np.allclose(std, dropped_std)
+    assert n[0] == kept.sum()
+
+def test_batched_fit_matches_single_fits_and_skips_empty_users():
+    rng = np.random.default_rng(1)
+    series = 50 + rng.normal(0, 5, (3, len(DAYS)))
+    series[1] = np.nan
+    coef, _, n = fit_batch(series, DAYS, ORIGIN)
+    for user in (0, 2):
+        alone, _, _ = fit_batch(series[user:user + 1], DAYS, ORIGIN)
+        assert np.allclose(coef[user], alone[0])
+    assert n[1] == 0
+    assert not coef[1].any()
+
+def test_prediction_is_clipped_and_widens_with_the_horizon():
+    coef = np.array([[150.0, 0, 0, 0, 0, 0], [-20.0, 0, 0, 0, 0, 0]])
+    horizon = np.arange(ORIGIN + 1, ORIGIN + 8)
+    mean, spread = predict(coef, np.array([4.0, 4.0]), np.array([ORIGIN, ORIGIN]), horizon)
+    assert (mean[0] == 100).all() and (mean[1] == 0).all()
+    assert (np.diff(spread, axis=1) > 0).all()
+    assert spread[0, 0] > 4.0
+
+def test_high_risk_probability():
+    spread = np.array([5.0, 5.0, 5.0])
+    p = high_risk_probability(np.array([HIGH_RISK_BELOW - 10, HIGH_RISK_BELOW, HIGH_RISK_BELOW + 10]), spread)
+    assert p[1] == 0.5
+    assert p[0] > 0.95 and p[2] < 0.05
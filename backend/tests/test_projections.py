@@ -0,0 +1,6 @@
+from app.services.projections import project_youtube_analysis
+
+def test_default_youtube_body_keeps_top_searches():
+    result = {"emotional_diet_score": 60.0, "top_searches": ["calm piano"]}
+    assert project_youtube_analysis(result)["top_searches"] == ["calm piano"]
+    assert project_youtube_analysis(result, verbose=True) == result
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select, text
+from app.models.analysis import Analysis, ChatMessage, RawData
+from app.models.user import User
+from app.services.analysis_service import latest_analysis
+
+USERS = 50
+ROWS_PER_USER = 40
+
+@pytest.fixture
+def seeded(db):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for u in range(USERS):
+        user_id = f"user-{u}"
+        db.add(User(id=user_id, email=f"{user_id}@example.com", name=user_id, google_id=user_id))
+        for n in range(ROWS_PER_USER):
+            at = start + timedelta(hours=n)
+            db.add(Analysis(user_id=user_id, created_at=at, analysis_date=at, overall_wellness_score=50.0))
+            db.add(ChatMessage(user_id=user_id, message="hi", response="hello", created_at=at))
+            db.add(RawData(user_id=user_id, source="spotify", data_type="plays", processed=n % 2, created_at=at))
+    db.commit()
+    db.execute(text("ANALYZE"))
+    return db
+
+def query_plan(db, statement) -> list:
+    sql = statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+@pytest.mark.parametrize("statement, index", [
+    (
+        select(Analysis).where(Analysis.user_id == "user-7").order_by(Analysis.created_at.desc()).limit(10),
+        "ix_analyses_user_id_created_at",
+    ),
+    (
+        select(Analysis).where(Analysis.user_id == "user-7").order_by(Analysis.analysis_date.desc()).limit(1),
+        "ix_analyses_user_id_analysis_date",
+    ),
+    (
+        select(ChatMessage).where(ChatMessage.user_id == "user-7").order_by(ChatMessage.created_at.desc()).limit(20),
+        "ix_chat_messages_user_id_created_at",
+    ),
+    (
+        select(RawData)
+        .where(RawData.user_id == "user-7", RawData.source == "spotify")
+        .order_by(RawData.created_at.desc()).limit(10),
+        "ix_raw_data_user_id_source_created_at",
+    ),
+    (
+        select(RawData).where(RawData.processed == 0).order_by(RawData.created_at).limit(100),
+        "ix_raw_data_unprocessed",
+    ),
+])
+def test_per_user_lookups_use_indexes(seeded, statement, index):
+    plan = query_plan(seeded, statement)
+    assert any(f"USING INDEX {index}" in step for step in plan), plan
+    # No sequential scan of the table and no sort step for the ORDER BY
+    assert all("USING" in step for step in plan if step.startswith("SCAN")), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+def test_latest_analysis_reads_one_user(seeded):
+    assert latest_analysis(seeded, "user-7").analysis_date.replace(tzinfo=timezone.utc) == (
+        datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(hours=ROWS_PER_USER - 1)
+    )
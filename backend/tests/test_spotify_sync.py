@@ -0,0 +1,97 @@
+import asyncio
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.events import UserEvent
+from app.models.listening import SpotifySyncState
+from app.services.spotify_sync import analysis_version, claim_analysis_version, sync_listening_history
+
+PLAYS = [
+    {"played_at": f"2026-10-18T12:{minute:02d}:00Z", "track": {"id": f"track-{minute}"}}
+    for minute in range(20)
+]
+
+class FakeConnector:
+    async def get_plays_since(self, cursor):
+        await asyncio.sleep(0)
+        return PLAYS
+
+    async def get_audio_features(self, track_ids):
+        await asyncio.sleep(0)
+        return [{"id": t, "valence": 0.5, "energy": 0.5, "tempo": 120.0, "danceability": 0.5} for t in track_ids]
+
+def test_concurrent_first_syncs_apply_plays_once(engine, user):
+    async def sync_twice():
+        sessions = [Session(engine), Session(engine)]
+        try:
+            return await asyncio.gather(*[
+                sync_listening_history(db, user.id, FakeConnector()) for db in sessions
+            ])
+        finally:
+            for db in sessions:
+                db.close()
+
+    results = asyncio.run(sync_twice())
+
+    assert sorted(added for _, added in results) == [0, len(PLAYS)]
+    with Session(engine) as db:
+        assert db.get(SpotifySyncState, user.id).total_plays == len(PLAYS)
+        assert db.scalar(select(func.count()).select_from(UserEvent)) == len(PLAYS)
+
+def test_replayed_sync_adds_nothing(engine, user):
+    with Session(engine) as db:
+        asyncio.run(sync_listening_history(db, user.id, FakeConnector()))
+        state, added = asyncio.run(sync_listening_history(db, user.id, FakeConnector()))
+        assert added == 0
+        assert state.total_plays == len(PLAYS)
+
+def test_analysis_version_follows_zone_and_local_day(db, user):
+    asyncio.run(sync_listening_history(db, user.id, FakeConnector()))
+    state = db.get(SpotifySyncState, user.id)
+    evening = 1792360800  # 2026-10-18 22:00 UTC
+
+    utc = analysis_version(db, state, evening)
+    assert analysis_version(db, state, evening + 3600) == utc
+    assert analysis_version(db, state, evening + 5 * 3600) != utc
+
+    user.timezone = "Asia/Tokyo"
+    db.commit()
+    assert analysis_version(db, state, evening) != utc
+
+def test_each_analysis_version_is_claimed_once(db, user):
+    asyncio.run(sync_listening_history(db, user.id, FakeConnector()))
+    state = db.get(SpotifySyncState, user.id)
+    evening = 1792360800  # 2026-10-18 22:00 UTC
+
+    today = analysis_version(db, state, evening)
+    assert claim_analysis_version(db, user.id, today)
+    assert not claim_analysis_version(db, user.id, today)
+    # No new plays, but a new local day changes the score: record it too
+    assert claim_analysis_version(db, user.id, analysis_version(db, state, evening + 5 * 3600))
+
+class SameSecondConnector(FakeConnector):
+    async def get_plays_since(self, cursor):
+        await asyncio.sleep(0)
+        return [
+            {"played_at": "2026-10-18T12:00:00.100Z", "track": {"id": "track-a"}},
+            {"played_at": "2026-10-18T12:00:00.900Z", "track": {"id": "track-b"}},
+        ]
+
+def test_plays_within_one_second_are_both_kept(db, user):
+    state, added = asyncio.run(sync_listening_history(db, user.id, SameSecondConnector()))
+    assert added == 2
+    assert state.total_plays == 2
+    assert db.scalar(select(func.count()).select_from(UserEvent)) == 2
+
+    # The cursor moved past both, so the next sync neither fails nor re-adds
+    _, added = asyncio.run(sync_listening_history(db, user.id, SameSecondConnector()))
+    assert added == 0
+
+def test_append_skips_rows_already_stored(db, user):
+    from app.models.events import SOURCE_SPOTIFY
+    from app.services.event_store import EventStore
+
+    store = EventStore(db)
+    store.append(user.id, SOURCE_SPOTIFY, ts=[100, 100], external_ids=["track-a", "track-b"])
+    store.append(user.id, SOURCE_SPOTIFY, ts=[100], external_ids=["track-a"])
+    db.commit()
+    assert db.scalar(select(func.count()).select_from(UserEvent)) == 2
@@ -0,0 +1,42 @@
+import calendar
+import pytest
+from app.connectors.takeout_time import parse_takeout_timestamp
+from app.core import metrics
+
+def epoch(*fields) -> int:
+    return calendar.timegm(fields)
+
+@pytest.mark.parametrize("stamp, expected", [
+    ("Jan 5, 2024, 3:04:05 PM EST", epoch(2024, 1, 5, 20, 4, 5)),
+    ("Jan 5, 2024, 12:04:05 AM EST", epoch(2024, 1, 5, 5, 4, 5)),
+    ("5 Jan 2024, 15:04:05 GMT", epoch(2024, 1, 5, 15, 4, 5)),
+    ("5 janv. 2024, 15:04:05 CET", epoch(2024, 1, 5, 14, 4, 5)),
+    ("5 de ene. de 2024, 15:04 CET", epoch(2024, 1, 5, 14, 4, 0)),
+    ("05.01.2024, 15:04:05 MEZ", epoch(2024, 1, 5, 14, 4, 5)),
+    ("2024/01/05 9:04:05 JST", epoch(2024, 1, 5, 0, 4, 5)),
+    ("Jan 5, 2024, 3:04:05 PM UTC+05:30", epoch(2024, 1, 5, 9, 34, 5)),
+    ("Feb 29, 2024, 1:00:00 PM UTC", epoch(2024, 2, 29, 13, 0, 0)),
+])
+def test_parses_locale_formats(stamp, expected):
+    assert parse_takeout_timestamp(stamp) == expected
+
+@pytest.mark.parametrize("stamp", [
+    "Feb 30, 2024, 1:00:00 PM EST",
+    "Feb 29, 2023, 1:00:00 PM EST",
+    "31.04.2024, 10:00:00 MEZ",
+    "5 Jan 2024, 25:03:00 GMT",
+    "5 Jan 2024, 13:60:00 GMT",
+    "5 Jan 2024, 13:00:61 GMT",
+    "Jan 5, 2024, 13:04:05 PM EST",
+    "Smarch 5, 2024, 3:04:05 PM EST",
+    "Jan 5, 2024",
+    "",
+])
+def test_rejects_invalid_dates_and_clocks(stamp):
+    assert parse_takeout_timestamp(stamp) is None
+
+def test_unknown_zone_is_rejected_and_counted():
+    before = metrics.snapshot()["counters"].get("takeout_unknown_timezones", 0)
+    assert parse_takeout_timestamp("5 Jan 2024, 13:04:05 XYZT") is None
+    assert parse_takeout_timestamp("5 Jan 2024, 13:04:06 XYZT") is None
+    assert metrics.snapshot()["counters"]["takeout_unknown_timezones"] == before + 2
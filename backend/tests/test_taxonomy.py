@@ -0,0 +1,72 @@
+import json
+import os
+import pytest
+from app.connectors import taxonomy
+from app.core import metrics
+from app.core.config import settings
+
+def categories(**extra):
+    base = {
+        "uncategorized": {"code": 10, "sentiment": 0, "keywords": []},
+        "music": {"code": 5, "sentiment": 0.3, "keywords": ["song"]},
+    }
+    base.update(extra)
+    return base
+
+@pytest.fixture
+def taxonomy_file(tmp_path, monkeypatch):
+    path = tmp_path / "taxonomy.json"
+    monkeypatch.setattr(settings, "TAXONOMY_PATH", str(path))
+    monkeypatch.setattr(settings, "TAXONOMY_CHECK_SECONDS", 0)
+    monkeypatch.setattr(taxonomy, "_current", None)
+    monkeypatch.setattr(taxonomy, "_loaded_mtime", None)
+    monkeypatch.setattr(taxonomy, "_checked_at", 0.0)
+    edits = iter(range(1, 100))
+
+    def write(version, cats):
+        path.write_text(json.dumps({"version": version, "categories": cats}))
+        # Distinct mtimes even when edits land within the clock's resolution
+        stamp = next(edits) * 10 ** 9
+        os.utime(path, ns=(stamp, stamp))
+
+    return write
+
+def test_edited_file_is_picked_up(taxonomy_file):
+    taxonomy_file("1", categories())
+    first = taxonomy.current_taxonomy()
+    assert first.classify("a sad song") == "music"
+    assert taxonomy.current_taxonomy() is first
+
+    taxonomy_file("2", categories(gaming={"code": 3, "sentiment": 0, "keywords": ["speedrun"]}))
+    second = taxonomy.current_taxonomy()
+    assert second.version == "2"
+    assert second.classify("speedrun") == "gaming"
+    # Compiled taxonomies are never changed in place
+    assert first.classify("speedrun") == "uncategorized"
+
+def test_file_is_not_checked_within_the_interval(taxonomy_file, monkeypatch):
+    taxonomy_file("1", categories())
+    taxonomy.current_taxonomy()
+    monkeypatch.setattr(settings, "TAXONOMY_CHECK_SECONDS", 3600)
+    taxonomy_file("2", categories())
+    assert taxonomy.current_taxonomy().version == "1"
+    assert taxonomy.reload_taxonomy(force=True).version == "2"
+
+@pytest.mark.parametrize("cats", [
+    # Stored events keep their codes, so a code may not move to another category
+    categories(music={"code": 6, "sentiment": 0.3, "keywords": ["song"]}),
+    categories(gaming={"code": 5, "sentiment": 0, "keywords": ["speedrun"]}),
+    {"music": {"code": 5, "sentiment": 0.3, "keywords": ["song"]}},
+])
+def test_invalid_edit_keeps_the_running_taxonomy(taxonomy_file, cats):
+    taxonomy_file("1", categories())
+    running = taxonomy.current_taxonomy()
+    errors = metrics.snapshot()["counters"].get("taxonomy_reload_errors", 0)
+
+    taxonomy_file("2", cats)
+    assert taxonomy.current_taxonomy() is running
+    assert metrics.snapshot()["counters"]["taxonomy_reload_errors"] == errors + 1
+
+def test_unreadable_file_fails_the_first_load(taxonomy_file):
+    with pytest.raises(OSError):
+        taxonomy.current_taxonomy()
@@ -0,0 +1,46 @@
+import asyncio
+import os
+import time
+from app.core.deadline import CancelToken, JobCancelled, check_deadline
+from app.core.workers import run_in_process, shutdown_process_pool
+
+def spin(cancel: CancelToken, marker: str):
+    # Stands in for a long parse; records that it stopped early
+    try:
+        while True:
+            check_deadline(None, cancel)
+            time.sleep(0.01)
+    except JobCancelled:
+        with open(marker, "w") as f:
+            f.write("cancelled")
+        raise
+
+def test_cancelling_the_request_stops_the_running_job(tmp_path):
+    marker = str(tmp_path / "stopped")
+
+    async def cancel_midway():
+        cancel = CancelToken()
+        task = asyncio.ensure_future(run_in_process(spin, cancel, marker, cancel=cancel))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        give_up = time.monotonic() + 5
+        while not os.path.exists(marker) and time.monotonic() < give_up:
+            await asyncio.sleep(0.05)
+
+    try:
+        asyncio.run(cancel_midway())
+    finally:
+        shutdown_process_pool()
+    assert os.path.exists(marker)
+
+def test_finished_token_leaves_no_file():
+    cancel = CancelToken()
+    assert not cancel.cancelled()
+    cancel.close()
+    assert cancel.cancelled()
+    assert not os.path.exists(cancel.path)
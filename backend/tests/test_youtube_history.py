@@ -0,0 +1,36 @@
+import asyncio
+import io
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.workers import shutdown_process_pool
+from app.models.youtube import YouTubeHistoryState
+from app.services.youtube_history import analyze_upload
+
+def takeout(entries: range) -> io.BytesIO:
+    cells = "".join(
+        '<div class="outer-cell"><div class="content-cell">'
+        f'Watched <a href="https://www.youtube.com/watch?v=video{n:06d}">Calm piano music {n}</a><br>'
+        f'Jan {n % 28 + 1}, 2026, 10:{n % 60:02d}:00 PM EST<br></div></div>'
+        for n in entries
+    )
+    return io.BytesIO(f"<html><body>{cells}</body></html>".encode())
+
+def test_concurrent_overlapping_uploads_merge_each_entry_once(engine, user):
+    async def upload_both():
+        sessions = [Session(engine), Session(engine)]
+        try:
+            return await asyncio.gather(
+                analyze_upload(sessions[0], user.id, takeout(range(0, 10))),
+                analyze_upload(sessions[1], user.id, takeout(range(5, 15))),
+            )
+        finally:
+            for db in sessions:
+                db.close()
+            shutdown_process_pool()
+
+    asyncio.run(upload_both())
+
+    with Session(engine) as db:
+        state = db.get(YouTubeHistoryState, user.id)
+        assert state.aggregates["total_videos"] == 15
+        assert len(np.frombuffer(state.watch_digests, dtype=np.int64)) == 15